@@ -0,0 +1,27 @@
+# apps/discord_bot/cogs/__init__.py
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Tuple
+
+# Манифест когов: имя модуля -> коги, которые должны быть загружены раньше.
+# Зависимость нужна, если ког использует другой ког или его команды при загрузке
+# (telegram_setup добавляет подгруппу в /setup) или обращается к нему через get_cog.
+# Порядок загрузки вычисляет core/cog_loader.py.
+COG_MANIFEST: Dict[str, Tuple[str, ...]] = {
+    'greeting': (),
+    'management': (),
+    'anti_nuke': (),
+    'setup': ('anti_nuke',),
+    'telegram_setup': ('setup',),
+    'join_gate': (),
+    'confirmation': (),
+    'help': (),
+    'backup': (),
+    'dashboard': ('anti_nuke',),
+    'status': (),
+    'moderation': (),
+    'config_events': ('anti_nuke',),
+    'warnings': (),
+    'backup_manager': (),
+    'owner': (),
+}
@@ -1,7 +1,6 @@
 # apps/discord_bot/cogs/anti_nuke.py
 # -*- coding: utf-8 -*-
 
-import os
 import asyncio
 import logging
 from typing import Dict, Any, Coroutine, Callable, TYPE_CHECKING
@@ -9,18 +8,18 @@ from collections import defaultdict
 import discord
 from discord.ext import commands, tasks
 
-from core import metrics
-from core.services import security_service
+from core import metrics, live_stats, tracing
+from core.decisions import create_decision, close_decision_message, register_handler, unregister_handler
+from core.services import security_service, settings_service
+from core.security_context import GuildSecurityContext
+from core.telegram_manager import send_telegram_message
+from core.threat_detectors import THREAT_KEY_PREFIX, get_detector
 
 if TYPE_CHECKING:
     from apps.discord_bot.main import SecurityBot
 
 logger = logging.getLogger(__name__)
 
-SETTINGS_CACHE_TTL = 600
-THREAT_KEY_PREFIX = "threats"
-SETTINGS_KEY_PREFIX = "antinuke_settings"
-
 class AntiNukeCog(commands.Cog, name="Анти-нюк"):
     """
     Реактивная система защиты, отслеживающая быстрые и массовые действия
@@ -29,16 +28,7 @@ class AntiNukeCog(commands.Cog, name="Анти-нюк"):
     def __init__(self, bot: "SecurityBot"):
         self.bot = bot
         
-        self.default_settings = {
-            'threshold': float(os.getenv("THREAT_SCORE_THRESHOLD", 25.0)),
-            'decay': float(os.getenv("SCORE_DECAY_PER_SECOND", 2.0)),
-            'channel_delete': float(os.getenv("SCORE_PER_CHANNEL_DELETE", 10.0)),
-            'channel_create': float(os.getenv("SCORE_PER_CHANNEL_CREATE", 10.0)),
-            'role_create': float(os.getenv("SCORE_PER_ROLE_CREATE", 5.0)),
-            'ban': float(os.getenv("SCORE_PER_BAN", 8.0)),
-            'kick': float(os.getenv("SCORE_PER_KICK", 8.0)),
-            'webhook_create': float(os.getenv("SCORE_PER_WEBHOOK_CREATE", 5.0)),
-        }
+        self.default_settings = settings_service.ANTINUKE_DEFAULTS
         
         self.action_map: Dict[str, Callable[[Any], Coroutine[Any, Any, None]]] = {
             "on_guild_channel_delete": self.on_guild_channel_delete,
@@ -50,65 +40,58 @@ class AntiNukeCog(commands.Cog, name="Анти-нюк"):
         }
         
         self.decay_task.start()
+        register_handler("quarantine", self._resolve_quarantine)
 
     def cog_unload(self):
         self.decay_task.cancel()
+        unregister_handler("quarantine")
         
     async def _get_settings(self, guild_id: int) -> Dict[str, float]:
-        redis_key = f"{SETTINGS_KEY_PREFIX}:{guild_id}"
-        cached_settings = await self.bot.redis.hgetall(redis_key)
-        if cached_settings:
-            return {k: float(v) for k, v in cached_settings.items()}
-        db_settings = {}
-        try:
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT config_key, config_value FROM guild_configs WHERE guild_id = %s AND config_key LIKE 'antinuke_%'", (guild_id,))
-                    rows = await cursor.fetchall()
-                    for row in rows:
-                        key_name = row[0].replace("antinuke_", "")
-                        db_settings[key_name] = float(row[1])
-        except Exception as e:
-            logger.error(f"Не удалось получить настройки анти-нюка из БД для сервера {guild_id}: {e}")
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
             return self.default_settings
-        final_settings = self.default_settings.copy()
-        final_settings.update(db_settings)
-        pipeline = self.bot.redis.pipeline()
-        pipeline.hset(redis_key, mapping=final_settings)
-        pipeline.expire(redis_key, SETTINGS_CACHE_TTL)
-        await pipeline.execute()
-        return final_settings
+        context = await self.bot.security_contexts.get(guild)
+        return context.settings
 
     async def _add_threat_score(self, member: discord.Member, event_type: str):
         if member.bot or member.id == self.bot.user.id or member.id == member.guild.owner_id:
             return
-        guild = member.guild
-        settings = await self._get_settings(guild.id)
-        score_to_add = settings.get(event_type, 0.0)
-        if score_to_add <= 0: return
-        redis_key = f"{THREAT_KEY_PREFIX}:{guild.id}"
-        new_score = float(await self.bot.redis.hincrbyfloat(redis_key, str(member.id), score_to_add))
-        threshold = settings['threshold']
-        logger.debug(f"Anti-nuke: Пользователь {member} ({member.id}) на сервере {guild.name} совершил действие '{event_type}'. Добавлено {score_to_add} очков. Итого: {new_score:.2f}/{threshold}")
-        if new_score >= threshold:
-            lang = await self.bot.get_guild_language(guild.id)
-            reason = self.bot.translator.get(f"security.reasons.{event_type}", lang)
-            await self.bot.redis.hdel(redis_key, str(member.id))
-            await self._trigger_quarantine_procedure(member, new_score, threshold, reason)
+        context = await self.bot.security_contexts.get(member.guild)
+        # Движок выбирается per-guild: 'score' (очки со сгоранием) или 'window' (скользящие окна).
+        detector = get_detector(context.engine)
+        detection = await detector.record(self.bot.redis, context, member.id, event_type)
+        if detection:
+            reason = self.bot.translator.get(f"security.reasons.{event_type}", context.language)
+            logger.info(f"Anti-nuke ({detector.name}): {member} ({member.id}) на сервере {member.guild.name} превысил порог: {detection.rule}")
+            await detector.reset(self.bot.redis, member.guild.id, member.id)
+            await self._trigger_quarantine_procedure(member, detection.score, detection.threshold, reason)
+
+    async def _send_telegram(self, context: GuildSecurityContext, key: str, **kwargs):
+        if not context.telegram_enabled:
+            return
+        message = self.bot.translator.get(key, context.language, **kwargs)
+        await send_telegram_message(context.telegram_token, context.telegram_chat_id, message, context.guild.id)
 
+    @tracing.traced(tracing.KIND_OPERATION, "anti_nuke.quarantine")
     async def _trigger_quarantine_procedure(self, member: discord.Member, score: float, threshold: float, reason: str):
         guild = member.guild
-        lang = await self.bot.get_guild_language(guild.id)
+        # Все, что нужно для реакции, уже разрешено в контексте: без запросов к БД во время атаки.
+        context = await self.bot.security_contexts.get(guild)
+        lang = context.language
         
-        result = await security_service.quarantine_user(self.bot, member, reason)
+        quarantine_role = context.quarantine_role
+        if not context.quarantine_role_id:
+            result = {'status': 'error', 'code': 'quarantine_not_configured'}
+        elif not quarantine_role:
+            result = {'status': 'error', 'code': 'quarantine_role_not_found'}
+        else:
+            result = await security_service.quarantine_user(self.bot, member, reason, quarantine_role)
 
         if result['status'] == 'error':
             error_code = result['code']
             if error_code == 'quarantine_not_configured':
                 logger.warning(f"АТАКА НА СЕРВЕРЕ {guild.name}! Пользователь {member} превысил порог, но роль карантина не настроена!")
-                telegram_cog = self.bot.get_cog("TelegramSetupCog")
-                if telegram_cog:
-                    await telegram_cog.send_telegram_notification(guild.id, 'critical_config', user_name=str(member), user_id=member.id, guild_name=guild.name)
+                await self._send_telegram(context, "security.telegram.critical_config", user_name=str(member), user_id=member.id, guild_name=guild.name)
             elif error_code == 'hierarchy_error':
                 logger.error(f"Недостаточно прав для помещения {member} в карантин на сервере {guild.name}. Пытаюсь забанить как крайнюю меру.")
                 await guild.ban(member, reason="Anti-nuke: Quarantine failed, fallback to ban")
@@ -117,37 +100,76 @@ class AntiNukeCog(commands.Cog, name="Анти-нюк"):
             return
 
         metrics.ANTI_NUKE_TRIGGERS.labels(guild_id=str(guild.id)).inc()
-
-        log_channel_id = 0
-        try:
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT config_value FROM guild_configs WHERE guild_id = %s AND config_key = 'log_channel_id'",(guild.id,))
-                    res = await cursor.fetchone()
-                    if res: log_channel_id = int(res[0])
-        except Exception: pass
-        
-        log_channel = guild.get_channel(log_channel_id)
+        await live_stats.publish_event(self.bot.redis, guild.id, live_stats.EVENT_ANTINUKE, {
+            "action": "quarantine",
+            "userId": str(member.id),
+            "userName": str(member),
+            "score": round(score, 2),
+            "threshold": threshold,
+            "reason": reason,
+        })
+
+        log_channel = context.log_channel
         if log_channel:
             log_message = self.bot.translator.get("security.quarantine_log", lang, user_mention=member.mention, score=score, threshold=threshold)
             await log_channel.send(log_message)
         
-        owner = guild.owner
+        owner = context.owner
         if owner:
-            # Тут нужно будет поправить, когда перенесем confirmation.py
-            # view = self.bot.get_cog("Подтверждения").QuarantineDecisionView(member.id, guild.id)
+            t = self.bot.translator.get
+            view = await create_decision(self.bot, "quarantine", guild.id, member.id, owner.id, [
+                ("ban", t("ui.button_ban_user", lang), discord.ButtonStyle.danger, "🔨"),
+                ("restore", t("ui.button_restore_roles", lang), discord.ButtonStyle.success, "✅"),
+                ("keep", t("ui.button_keep_quarantined", lang), discord.ButtonStyle.secondary, "🗣️"),
+            ])
             embed = discord.Embed(
-                title=self.bot.translator.get("security.embed_titles.incident_report", lang),
-                description=self.bot.translator.get("security.confirm.quarantine.description", lang, user_mention=member.mention, reason=reason),
+                title=t("security.embed_titles.incident_report", lang),
+                description=t("security.confirm.quarantine.description", lang, user_mention=member.mention, reason=reason),
                 color=discord.Color.red()
             )
-            # await owner.send(embed=embed, view=view) # Временно отключено
-            await owner.send(embed=embed)
+            try:
+                await owner.send(embed=embed, view=view)
+            except discord.Forbidden:
+                logger.warning(f"Не удалось отправить отчет об инциденте владельцу сервера {guild.name} (ЛС закрыты).")
+
+        await self._send_telegram(context, "security.telegram.quarantine", guild_name=guild.name, user_name=str(member), user_id=member.id, reason=reason)
+
+    async def _resolve_quarantine(self, interaction: discord.Interaction, decision: Dict[str, Any], choice: str) -> bool:
+        lang = await self.bot.get_guild_language(decision['guild_id'])
+        t = self.bot.translator.get
+        guild = self.bot.get_guild(decision['guild_id'])
+        user_id = decision['target_id']
+        if not guild:
+            # Бота на сервере больше нет: решение применить нельзя, кнопки убираются.
+            await interaction.followup.send("Не удалось найти сервер.", ephemeral=True)
+            await close_decision_message(interaction, t("security.embed_titles.action_timeout", lang), discord.Color.dark_grey())
+            return True
+
+        if choice == "ban":
+            result = await security_service.ban_quarantined_user(self.bot, guild, user_id, "Решение Владельца после инцидента безопасности")
+            log_key, color = "security.confirm.quarantine.ban_log", discord.Color.dark_red()
+        elif choice == "restore":
+            result = await security_service.unquarantine_user(self.bot, guild, user_id, "Восстановление ролей по решению Владельца")
+            log_key, color = "security.confirm.quarantine.restore_log", discord.Color.green()
+        else:
+            result = {'status': 'success'}
+            log_key, color = "security.confirm.quarantine.keep_log", discord.Color.orange()
 
-
-        telegram_cog = self.bot.get_cog("TelegramSetupCog")
-        if telegram_cog:
-            await telegram_cog.send_telegram_notification(guild.id, 'quarantine', guild_name=guild.name, user_name=str(member), user_id=member.id, reason=reason)
+        if result['status'] == 'error':
+            if result['code'] == 'not_in_quarantine':
+                # Карантин уже снят другим путем: решение больше не нужно.
+                await interaction.followup.send(t("management.quarantine.action_already_taken", lang), ephemeral=True)
+                await close_decision_message(interaction, t("security.embed_titles.incident_report", lang), discord.Color.dark_grey())
+                return True
+            # Временная ошибка (Discord, БД): решение возвращается, кнопки остаются рабочими для повтора.
+            await interaction.followup.send(f"❌ Не удалось выполнить действие: `{result['code']}`", ephemeral=True)
+            return False
+
+        log_message = t(log_key, lang, user_mention=f"<@{user_id}>")
+        await interaction.followup.send(log_message, ephemeral=True)
+        logging.getLogger('bot.info').info(log_message)
+        await close_decision_message(interaction, t("security.embed_titles.incident_report", lang), color)
+        return True
 
     @tasks.loop(seconds=2.0)
     async def decay_task(self):
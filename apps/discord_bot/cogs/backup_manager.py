@@ -16,13 +16,8 @@ import asyncio
 import io
 import traceback
 
-# Импорты для работы с Google API
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from googleapiclient.errors import HttpError
+# Клиент Google API импортируется при первой выгрузке в облако (см. _build_gdrive_service):
+# он тяжелый и не нужен для загрузки кога.
 
 if TYPE_CHECKING:
     from main import SecurityBot
@@ -82,15 +77,19 @@ class BackupManagerCog(commands.Cog, name="Менеджер Бэкапов"):
         self.backup_task.cancel()
     
     # --- GOOGLE DRIVE HELPERS ---
-    async def get_gdrive_service(self):
-        """Аутентифицируется через OAuth 2.0 и возвращает объект сервиса Google Drive."""
+    def _build_gdrive_service(self):
+        """Синхронная часть: импорт клиента Google API, обновление токена и сборка сервиса."""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+
         creds = None
         if self.TOKEN_FILE.exists():
             creds = Credentials.from_authorized_user_file(str(self.TOKEN_FILE), self.SCOPES)
         
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
-                await self.bot.loop.run_in_executor(None, creds.refresh, Request())
+                creds.refresh(Request())
             else:
                 logger.error("КРИТИЧЕСКАЯ ОШИБКА: Отсутствует token.json. Требуется ручная авторизация.")
                 return None
@@ -100,6 +99,11 @@ class BackupManagerCog(commands.Cog, name="Менеджер Бэкапов"):
         
         return build("drive", "v3", credentials=creds)
 
+    async def get_gdrive_service(self):
+        """Аутентифицируется через OAuth 2.0 и возвращает объект сервиса Google Drive."""
+        # Импорт и build() читают discovery-документ и заметно блокируют, поэтому выполняются в потоке.
+        return await self.bot.loop.run_in_executor(None, self._build_gdrive_service)
+
     async def find_or_create_folder(self, service, folder_name, parent_id=None):
         """Находит папку по имени или создает ее, если она не существует."""
         query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
@@ -125,6 +129,9 @@ class BackupManagerCog(commands.Cog, name="Менеджер Бэкапов"):
 
     async def upload_file(self, service, file_path, folder_id):
         """Асинхронно загружает файл в указанную папку на Google Drive."""
+        from googleapiclient.errors import HttpError
+        from googleapiclient.http import MediaFileUpload
+
         file_metadata = {'name': file_path.name, 'parents': [folder_id]}
         media = MediaFileUpload(str(file_path), mimetype='application/zip', resumable=True)
         try:
@@ -140,6 +147,7 @@ class BackupManagerCog(commands.Cog, name="Менеджер Бэкапов"):
     async def cleanup_old_files(self, service, folder_id, days_to_keep):
         """Асинхронно удаляет файлы в папке, которые старше указанного количества дней."""
         if days_to_keep <= 0: return
+        from googleapiclient.errors import HttpError
         
         cutoff_date = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days_to_keep)).isoformat()
         query = f"'{folder_id}' in parents and createdTime < '{cutoff_date}' and trashed=false"
@@ -1,10 +1,12 @@
 # cogs/config_events.py
 # -*- coding: utf-8 -*-
 
+import time
+import asyncio
 import logging
 import discord
 from discord.ext import commands
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import json
 
 if TYPE_CHECKING:
@@ -22,6 +24,11 @@ class ConfigEventsCog(commands.Cog, name="События Конфигураци
     def __init__(self, bot: "SecurityBot"):
         self.bot = bot
         self.t = self.bot.translator.get
+        self._audit_task: Optional[asyncio.Task] = None
+
+    def cog_unload(self):
+        if self._audit_task:
+            self._audit_task.cancel()
 
     @commands.Cog.listener()
     async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
@@ -97,19 +104,8 @@ class ConfigEventsCog(commands.Cog, name="События Конфигураци
         if self.bot.is_shutting_down: return
 
         guild = channel.guild
-        log_channel_id = None
-        
-        try:
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT config_value FROM guild_configs WHERE guild_id = %s AND config_key = %s", (guild.id, "moderation_log_channel_id"))
-                    result = await cursor.fetchone()
-                    if result:
-                        log_channel_id = int(result[0])
-        except Exception:
-            return
-
-        if not log_channel_id or log_channel_id != channel.id:
+        context = await self.bot.security_contexts.get(guild)
+        if not context.log_channel_id or context.log_channel_id != channel.id:
             return
 
         deleter = None
@@ -132,6 +128,7 @@ class ConfigEventsCog(commands.Cog, name="События Конфигураци
                 async with self.bot.db_pool.acquire() as conn:
                     async with conn.cursor() as cursor:
                         await cursor.execute("DELETE FROM guild_configs WHERE guild_id = %s AND config_key = %s", (guild.id, "moderation_log_channel_id"))
+                self.bot.security_contexts.invalidate(guild.id)
                 
                 # ИЗМЕНЕНО
                 dm_desc = self.t("setup.logs.owner_deleted_dm_desc", lang=lang, channel_name=channel.name, guild_name=guild.name)
@@ -149,10 +146,11 @@ class ConfigEventsCog(commands.Cog, name="События Конфигураци
         logger.critical(f"КРИТИЧЕСКИЙ ИНЦИДЕНТ на сервере {guild.name}: Пользователь {deleter.name} удалил лог-канал!")
 
         anti_nuke_cog: Optional["AntiNukeCog"] = self.bot.get_cog("Анти-нюк")
-        if anti_nuke_cog:
+        deleter_member = guild.get_member(deleter.id)
+        if anti_nuke_cog and deleter_member:
             # ИЗМЕНЕНО
-            reason_key = "log_channel_deleted"
-            await anti_nuke_cog._quarantine_user(deleter, reason_key, score=999, threshold=1)
+            reason = self.t("security.reasons.log_channel_deleted", lang=context.language)
+            await anti_nuke_cog._trigger_quarantine_procedure(deleter_member, score=999, threshold=1, reason=reason)
         
         try:
             overwrites = {
@@ -171,6 +169,7 @@ class ConfigEventsCog(commands.Cog, name="События Конфигураци
             async with self.bot.db_pool.acquire() as conn:
                 async with conn.cursor() as cursor:
                     await cursor.execute("UPDATE guild_configs SET config_value = %s WHERE guild_id = %s AND config_key = %s", (str(new_channel.id), guild.id, "moderation_log_channel_id"))
+            self.bot.security_contexts.invalidate(guild.id)
 
             if guild.owner:
                 # ИЗМЕНЕНО
@@ -187,12 +186,24 @@ class ConfigEventsCog(commands.Cog, name="События Конфигураци
         except Exception as e:
             logger.error(f"Не удалось обновить БД или отправить уведомление после пересоздания лог-канала: {e}", exc_info=True)
 
+    def start_quarantine_role_audit(self):
+        """Запускает аудит карантинных ролей в фоне, не задерживая on_ready."""
+        if self._audit_task and not self._audit_task.done():
+            return
+        self._audit_task = asyncio.create_task(self.check_quarantine_roles_on_startup())
+
     async def check_quarantine_roles_on_startup(self):
         """
         Проверяет все настроенные карантинные роли при запуске, чтобы
         синхронизировать состояние с БД после возможного простоя.
+        Все расхождения собираются в памяти и применяются одним запросом на вид изменения;
+        владельцы уведомляются через очередь личных сообщений.
         """
         logger.info("Начинаю аудит настроек карантинных ролей...")
+        started = time.perf_counter()
+        # (сервер, сохраненный JSON, старое имя) и (сервер, сохраненный JSON, роль, старое имя).
+        deleted: List[Tuple[discord.Guild, str, str]] = []
+        renamed: List[Tuple[discord.Guild, str, discord.Role, str]] = []
         try:
             async with self.bot.db_pool.acquire() as conn:
                 async with conn.cursor() as cursor:
@@ -215,53 +226,63 @@ class ConfigEventsCog(commands.Cog, name="События Конфигураци
                     
                     if not role:
                         logger.warning(f"[Аудит] Карантинная роль (ID: {role_id}) на сервере '{guild.name}' была удалена в офлайне.")
-                        await self._handle_deleted_role(guild, stored_name)
-                        continue
-                        
-                    if role.name != stored_name:
+                        deleted.append((guild, config_json, stored_name))
+                    elif role.name != stored_name:
                         logger.info(f"[Аудит] Карантинная роль на сервере '{guild.name}' была переименована в офлайне с '{stored_name}' на '{role.name}'.")
-                        await self._handle_renamed_role(guild, role, stored_name)
+                        renamed.append((guild, config_json, role, stored_name))
 
-                except (json.JSONDecodeError, KeyError, TypeError):
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
                     continue
-                    
+
+            await self._apply_audit_changes(deleted, renamed)
         except Exception as e:
             logger.error(f"Критическая ошибка во время аудита карантинных ролей: {e}", exc_info=True)
-            
-        logger.info("Аудит карантинных ролей завершен.")
-        
-    async def _handle_deleted_role(self, guild: discord.Guild, old_role_name: str):
-        """Обрабатывает удаление роли: чистит БД и уведомляет владельца."""
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute("DELETE FROM guild_configs WHERE guild_id = %s AND config_key = %s", (guild.id, "quarantine_role"))
-        
-        owner = guild.owner
-        if owner:
-            lang = await self.bot.get_guild_language(guild.id)
-            # ИЗМЕНЕНО
-            message = self.t("setup.quarantine.role_deleted_dm", lang=lang, guild_name=guild.name)
-            try:
-                await owner.send(message)
-            except discord.Forbidden:
-                logger.warning(f"Не удалось отправить ЛС (аудит) об удалении роли владельцу {guild.name}.")
+            return
+
+        for guild, _, _ in deleted:
+            self.bot.security_contexts.invalidate(guild.id)
+            if guild.owner:
+                lang = await self.bot.get_guild_language(guild.id)
+                message = self.t("setup.quarantine.role_deleted_dm", lang=lang, guild_name=guild.name)
+                self.bot.dm_queue.enqueue(guild.owner, message, description=f"аудит: удалена карантинная роль на {guild.id}")
+        for guild, _, role, old_name in renamed:
+            self.bot.security_contexts.invalidate(guild.id)
+            if guild.owner:
+                lang = await self.bot.get_guild_language(guild.id)
+                message = self.t("setup.quarantine.role_renamed_dm", lang=lang, guild_name=guild.name, old_name=old_name, new_name=role.name)
+                self.bot.dm_queue.enqueue(guild.owner, message, description=f"аудит: переименована карантинная роль на {guild.id}")
 
-    async def _handle_renamed_role(self, guild: discord.Guild, role: discord.Role, old_name: str):
-        """Обрабатывает переименование роли: обновляет БД и уведомляет владельца."""
-        new_config_data = json.dumps({"id": role.id, "name": role.name})
+        logger.info(
+            f"Аудит карантинных ролей завершен за {time.perf_counter() - started:.2f} с: "
+            f"удалено {len(deleted)}, переименовано {len(renamed)}."
+        )
+
+    async def _apply_audit_changes(self, deleted: list, renamed: list):
+        """
+        Применяет результаты аудита: один DELETE и один UPDATE на все серверы.
+        Условие по старому значению не дает затереть настройку, измененную во время аудита.
+        """
+        if not deleted and not renamed:
+            return
         async with self.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute("UPDATE guild_configs SET config_value = %s WHERE guild_id = %s AND config_key = %s", (new_config_data, guild.id, "quarantine_role"))
-
-        owner = guild.owner
-        if owner:
-            lang = await self.bot.get_guild_language(guild.id)
-            # ИЗМЕНЕНО
-            message = self.t("setup.quarantine.role_renamed_dm", lang=lang, guild_name=guild.name, old_name=old_name, new_name=role.name)
-            try:
-                await owner.send(message)
-            except discord.Forbidden:
-                logger.warning(f"Не удалось отправить ЛС (аудит) о переименовании роли владельцу {guild.name}.")
+                if deleted:
+                    pairs = ", ".join(["(%s, %s)"] * len(deleted))
+                    params = [value for guild, config_json, _ in deleted for value in (guild.id, config_json)]
+                    await cursor.execute(
+                        f"DELETE FROM guild_configs WHERE config_key = %s AND (guild_id, config_value) IN ({pairs})",
+                        ("quarantine_role", *params)
+                    )
+                if renamed:
+                    cases = " ".join(["WHEN %s THEN %s"] * len(renamed))
+                    pairs = ", ".join(["(%s, %s)"] * len(renamed))
+                    case_params = [value for guild, _, role, _ in renamed for value in (guild.id, json.dumps({"id": role.id, "name": role.name}))]
+                    where_params = [value for guild, config_json, _, _ in renamed for value in (guild.id, config_json)]
+                    await cursor.execute(
+                        f"UPDATE guild_configs SET config_value = CASE guild_id {cases} END "
+                        f"WHERE config_key = %s AND (guild_id, config_value) IN ({pairs})",
+                        (*case_params, "quarantine_role", *where_params)
+                    )
 
 
 async def setup(bot: "SecurityBot"):
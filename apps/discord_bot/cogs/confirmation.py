@@ -9,18 +9,23 @@ import logging
 import discord
 import asyncio
 import os
-from discord.ext import commands
-from typing import Set, TYPE_CHECKING, Optional
+from discord.ext import commands, tasks
+from typing import Any, Dict, List, Set, TYPE_CHECKING
 
-from core.ui import ConfirmationView
+from core.decisions import DecisionChoice, create_decision, close_decision_message, register_handler, unregister_handler
 from core.telegram_manager import send_telegram_alert
+from core.services.security_service import (
+    ACTION_GRANT_AUDIT, grant_action_permission, consume_action_permission, purge_action_permissions_audit
+)
 
 if TYPE_CHECKING:
     from main import SecurityBot
-    from .anti_nuke import AntiNukeCog
 
 logger = logging.getLogger(__name__)
 
+# Сколько секунд владелец может одобрить перехваченное действие.
+CONFIRMATION_TTL = 3600
+
 class ConfirmationCog(commands.Cog, name="Подтверждения действий"):
     """
     Ког, управляющий системами, которые требуют подтверждения от владельца сервера.
@@ -33,6 +38,50 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
         # так как этот список не зависит от языка сервера (ключи одинаковые).
         # ИЗМЕНЕНО
         self.DANGEROUS_PERMISSIONS: Set[str] = set(self.t("system.permissions", lang=self.bot.default_language).keys())
+        # Те же права в виде одной битовой маски: проверка роли сводится к одному AND.
+        self.dangerous_mask: int = discord.Permissions(**{
+            name: True for name in self.DANGEROUS_PERMISSIONS if name in discord.Permissions.VALID_FLAGS
+        }).value
+        # role_id -> опасные биты роли. Сбрасывается при изменении или удалении роли.
+        self.role_danger_cache: Dict[int, int] = {}
+        if ACTION_GRANT_AUDIT:
+            self.purge_action_audit.start()
+        # Решения владельца обрабатываются постоянными кнопками (core.decisions) и переживают перезапуск.
+        register_handler("role_grant", self._resolve_role_grant)
+        register_handler("role_update", self._resolve_role_update)
+        register_handler("webhook_create", self._resolve_webhook_create)
+
+    def cog_unload(self):
+        self.purge_action_audit.cancel()
+        for kind in ("role_grant", "role_update", "webhook_create"):
+            unregister_handler(kind)
+
+    def _approve_deny_choices(self, lang: str) -> List[DecisionChoice]:
+        return [
+            ("approve", self.t("ui.button_approve", lang=lang), discord.ButtonStyle.green, "✅"),
+            ("deny", self.t("ui.button_deny", lang=lang), discord.ButtonStyle.red, "❌"),
+        ]
+
+    @tasks.loop(hours=24)
+    async def purge_action_audit(self):
+        purged = await purge_action_permissions_audit(self.bot)
+        if purged:
+            logger.info(f"Удалено устаревших записей аудита разрешений: {purged}.")
+
+    @purge_action_audit.before_loop
+    async def before_purge_action_audit(self):
+        await self.bot.wait_until_ready()
+
+    def _dangerous_bits(self, role: discord.Role) -> int:
+        bits = self.role_danger_cache.get(role.id)
+        if bits is None:
+            bits = role.permissions.value & self.dangerous_mask
+            self.role_danger_cache[role.id] = bits
+        return bits
+
+    @staticmethod
+    def _permission_names(bits: int) -> List[str]:
+        return [name for name, value in discord.Permissions(bits) if value]
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
@@ -40,23 +89,33 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
         Срабатывает, когда участнику выдают новую роль.
         Проверяет, содержит ли роль опасные права.
         """
-        if after.id in self.bot.users_under_review or after.id == self.bot.user.id or after.id == after.guild.owner_id:
-            return
-        if len(before.roles) >= len(after.roles):
+        # Сначала сравниваем только ID ролей: большинство обновлений участника
+        # (ник, аватар, статус буста) роли не меняют.
+        added_role_ids = {role.id for role in after.roles} - {role.id for role in before.roles}
+        if not added_role_ids:
             return
-        
-        added_role = next((r for r in after.roles if r not in before.roles), None)
-        if not added_role:
+        if after.id in self.bot.users_under_review or after.id == self.bot.user.id or after.id == after.guild.owner_id:
             return
-        
-        triggered_permissions = [p for p, v in added_role.permissions if v and p in self.DANGEROUS_PERMISSIONS]
-        if not triggered_permissions:
+
+        dangerous_roles: List[discord.Role] = []
+        triggered_bits = 0
+        for role_id in added_role_ids:
+            role = after.guild.get_role(role_id)
+            if role is None:
+                continue
+            bits = self._dangerous_bits(role)
+            if bits:
+                dangerous_roles.append(role)
+                triggered_bits |= bits
+        if not triggered_bits:
             return
+        triggered_permissions = self._permission_names(triggered_bits)
+        roles_str = ", ".join(f"`{role.name}`" for role in dangerous_roles)
         
         moderator = None
         try:
             async for entry in after.guild.audit_logs(action=discord.AuditLogAction.member_role_update, limit=10):
-                if entry.target and entry.target.id == after.id and added_role in entry.changes.after.roles:
+                if entry.target and entry.target.id == after.id and any(role in entry.changes.after.roles for role in dangerous_roles):
                     moderator = entry.user
                     break
         except Exception: pass
@@ -67,10 +126,10 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
         lang = await self.bot.get_guild_language(after.guild.id)
         
         try:
-            await after.remove_roles(added_role, reason="Снятие роли для подтверждения Владельцем")
+            await after.remove_roles(*dangerous_roles, reason="Снятие роли для подтверждения Владельцем")
         except discord.Forbidden:
             # ИЗМЕНЕНО (создадим ключ на лету, т.к. его не было)
-            logging.error(f"Не могу снять роль '{added_role.name}' с {after.mention} для подтверждения! Проверьте иерархию ролей.")
+            logging.error(f"Не могу снять роли {roles_str} с {after.mention} для подтверждения! Проверьте иерархию ролей.")
             return
             
         # ИЗМЕНЕНО
@@ -81,23 +140,19 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
         # ИЗМЕНЕНО
         permissions_list_formatted = "\n".join(f"• `{self.t('system.permissions', lang=lang).get(p, p)}`" for p in triggered_permissions)
         
-        # ИЗМЕНЕНО
-        view = ConfirmationView(
-            author=owner,
-            timeout=3600.0,
-            approve_label=self.t("ui.button_approve", lang=lang),
-            deny_label=self.t("ui.button_deny", lang=lang),
-            interaction_denied_message=self.t("ui.interaction_denied", lang=lang)
+        view = await create_decision(
+            self.bot, "role_grant", after.guild.id, after.id, owner.id, self._approve_deny_choices(lang),
+            ttl=CONFIRMATION_TTL, payload={'role_ids': [role.id for role in dangerous_roles], 'moderator_mention': moderator_mention}
         )
         # ИЗМЕНЕНО (создадим ключ на лету)
-        embed_desc = f"Пользователь **{moderator_mention}** пытается выдать роль **`{added_role.name}`** участнику **{after.mention}**. **Действие было временно отменено.**\n\nРазрешить это действие?"
+        embed_desc = f"Пользователь **{moderator_mention}** пытается выдать роль **{roles_str}** участнику **{after.mention}**. **Действие было временно отменено.**\n\nРазрешить это действие?"
         # ИЗМЕНЕНО
         embed = discord.Embed(title=self.t("security.embed_titles.confirm_required", lang=lang), description=embed_desc, color=discord.Color.gold())
         # ИЗМЕНЕНО
         embed.add_field(name=self.t("security.confirm.generic.permissions_field", lang=lang), value=permissions_list_formatted, inline=False)
         
         try:
-            message = await owner.send(embed=embed, view=view)
+            await owner.send(embed=embed, view=view)
         except discord.Forbidden:
             # ИЗМЕНЕНО
             logging.error(self.t("security.dm_permission_error_log", lang=lang))
@@ -111,50 +166,42 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
                                 moderator_str=moderator_str, 
                                 target_user_name=after.name,
                                 target_user_id=after.id,
-                                role_name=added_role.name)
+                                role_name=", ".join(role.name for role in dangerous_roles))
         await send_telegram_alert(self.bot.db_pool, after.guild.id, telegram_alert)
-        
-        await view.wait()
-        
-        if view.result is True:
-            await after.add_roles(added_role, reason="Действие одобрено Владельцем.")
-            # ИЗМЕНЕНО
-            logging.getLogger('bot.info').info(self.t("security.confirm.generic.role_approved_log", lang=lang, role_name=added_role.name, user_mention=after.mention, moderator_mention=moderator_mention))
-            original_embed = view.interaction.message.embeds[0]
-            # ИЗМЕНЕНО
-            original_embed.title = self.t("security.embed_titles.action_approved", lang=lang)
-            original_embed.color = discord.Color.green()
-            await view.interaction.message.edit(embed=original_embed, view=None)
-        else:
-            # ИЗМЕНЕНО
-            reason = self.t("system.reason_denied", lang=lang) if view.result is False else self.t("system.reason_timed_out", lang=lang)
+
+    async def _resolve_role_grant(self, interaction: discord.Interaction, decision: Dict[str, Any], choice: str):
+        lang = await self.bot.get_guild_language(decision['guild_id'])
+        guild = self.bot.get_guild(decision['guild_id'])
+        payload = decision['payload']
+        member = guild.get_member(decision['target_id']) if guild else None
+        roles = [role for role in (guild.get_role(rid) for rid in payload['role_ids']) if role] if guild else []
+        roles_str = ", ".join(f"`{role.name}`" for role in roles)
+        user_mention = f"<@{decision['target_id']}>"
+        moderator_mention = payload['moderator_mention']
+
+        if choice == "approve" and member and roles:
+            await member.add_roles(*roles, reason="Действие одобрено Владельцем.")
             # ИЗМЕНЕНО
-            logging.getLogger('bot.info').info(self.t("security.confirm.generic.role_denied_log", lang=lang, reason=reason, role_name=added_role.name, user_mention=after.mention, moderator_mention=moderator_mention))
-            if view.interaction:
-                original_embed = view.interaction.message.embeds[0]
-                # ИЗМЕНЕНО
-                original_embed.title = self.t("security.embed_titles.action_denied", lang=lang)
-                original_embed.color = discord.Color.red()
-                await view.interaction.message.edit(embed=original_embed, view=None)
-            else:
-                original_embed = message.embeds[0]
-                # ИЗМЕНЕНО
-                original_embed.title = self.t("security.embed_titles.action_timeout", lang=lang)
-                original_embed.color = discord.Color.dark_grey()
-                await message.edit(embed=original_embed, view=None)
+            logging.getLogger('bot.info').info(self.t("security.confirm.generic.role_approved_log", lang=lang, role_name=roles_str, user_mention=user_mention, moderator_mention=moderator_mention))
+            await close_decision_message(interaction, self.t("security.embed_titles.action_approved", lang=lang), discord.Color.green())
+            return
+
+        if choice == "approve":
+            logger.warning(f"Одобренную выдачу ролей применить нельзя: участник {decision['target_id']} или роли больше не найдены на сервере {decision['guild_id']}.")
+        # ИЗМЕНЕНО
+        reason = self.t("system.reason_denied", lang=lang)
+        # ИЗМЕНЕНО
+        logging.getLogger('bot.info').info(self.t("security.confirm.generic.role_denied_log", lang=lang, reason=reason, role_name=roles_str, user_mention=user_mention, moderator_mention=moderator_mention))
+        await close_decision_message(interaction, self.t("security.embed_titles.action_denied", lang=lang), discord.Color.red())
 
     @commands.Cog.listener()
     async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self.role_danger_cache.pop(after.id, None)
+        added_bits = after.permissions.value & ~before.permissions.value & self.dangerous_mask
+        if not added_bits: return
+        added_dangerous_perms = self._permission_names(added_bits)
         lang = await self.bot.get_guild_language(after.guild.id)
         
-        before_perms = dict(iter(before.permissions))
-        after_perms = dict(iter(after.permissions))
-        added_dangerous_perms = []
-        for perm_name in self.DANGEROUS_PERMISSIONS:
-            if after_perms.get(perm_name) and not before_perms.get(perm_name):
-                added_dangerous_perms.append(perm_name)
-        if not added_dangerous_perms: return
-        
         moderator = None
         try:
             async for entry in after.guild.audit_logs(action=discord.AuditLogAction.role_update, limit=5):
@@ -183,12 +230,9 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
         # ИЗМЕНЕНО
         permissions_list_formatted = "\n".join(f"• `{self.t('system.permissions', lang=lang).get(p, p)}`" for p in added_dangerous_perms)
         
-        # ИЗМЕНЕНО
-        view = ConfirmationView(
-            author=owner, timeout=3600.0,
-            approve_label=self.t("ui.button_approve", lang=lang),
-            deny_label=self.t("ui.button_deny", lang=lang),
-            interaction_denied_message=self.t("ui.interaction_denied", lang=lang)
+        view = await create_decision(
+            self.bot, "role_update", after.guild.id, after.id, owner.id, self._approve_deny_choices(lang),
+            ttl=CONFIRMATION_TTL, payload={'permissions': intended_permissions.value, 'moderator_mention': moderator_mention}
         )
         # ИЗМЕНЕНО
         embed_desc = self.t("security.confirm.role_update.description", lang=lang, user_mention=moderator_mention, role_name=after.name)
@@ -198,7 +242,7 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
         embed.add_field(name=self.t("security.confirm.generic.permissions_field", lang=lang), value=permissions_list_formatted, inline=False)
         
         try:
-            message = await owner.send(embed=embed, view=view)
+            await owner.send(embed=embed, view=view)
         except discord.Forbidden:
             # ИЗМЕНЕНО
             logging.error(self.t("security.dm_permission_error_log", lang=lang))
@@ -215,38 +259,34 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
                                 role_name=after.name,
                                 permissions_str=perms_str)
         await send_telegram_alert(self.bot.db_pool, after.guild.id, telegram_alert)
-        
-        await view.wait()
-        
-        if view.result is True:
+
+    async def _resolve_role_update(self, interaction: discord.Interaction, decision: Dict[str, Any], choice: str):
+        lang = await self.bot.get_guild_language(decision['guild_id'])
+        guild = self.bot.get_guild(decision['guild_id'])
+        role = guild.get_role(decision['target_id']) if guild else None
+        payload = decision['payload']
+        role_name = role.name if role else str(decision['target_id'])
+        moderator_mention = payload['moderator_mention']
+
+        if choice == "approve" and role:
             try:
-                await after.edit(permissions=intended_permissions, reason="Действие одобрено Владельцем")
+                await role.edit(permissions=discord.Permissions(payload['permissions']), reason="Действие одобрено Владельцем")
                 # ИЗМЕНЕНО (создадим ключ)
-                logging.getLogger('bot.info').info(f"✅ Владелец **одобрил** изменение прав для роли **`{after.name}`** (инициатор: **{moderator_mention}**).")
+                logging.getLogger('bot.info').info(f"✅ Владелец **одобрил** изменение прав для роли **`{role_name}`** (инициатор: **{moderator_mention}**).")
             except discord.Forbidden:
-                logging.error(f"Не могу применить одобренные права к роли `{after.name}`! Иерархия изменилась?")
-            original_embed = view.interaction.message.embeds[0]
-            # ИЗМЕНЕНО
-            original_embed.title = self.t("security.embed_titles.action_approved", lang=lang)
-            original_embed.color = discord.Color.green()
-            await view.interaction.message.edit(embed=original_embed, view=None)
-        else:
-            # ИЗМЕНЕНО
-            reason = self.t("system.reason_denied", lang=lang) if view.result is False else self.t("system.reason_timed_out", lang=lang)
-            # ИЗМЕНЕНО (создадим ключ)
-            logging.getLogger('bot.info').info(f"❌ Владелец **{reason}** изменение прав для роли **`{after.name}`** (инициатор: **{moderator_mention}**).")
-            if view.interaction:
-                original_embed = view.interaction.message.embeds[0]
-                # ИЗМЕНЕНО
-                original_embed.title = self.t("security.embed_titles.action_denied", lang=lang)
-                original_embed.color = discord.Color.red()
-                await view.interaction.message.edit(embed=original_embed, view=None)
-            else:
-                original_embed = message.embeds[0]
-                # ИЗМЕНЕНО
-                original_embed.title = self.t("security.embed_titles.action_timeout", lang=lang)
-                original_embed.color = discord.Color.dark_grey()
-                await message.edit(embed=original_embed, view=None)
+                logging.error(f"Не могу применить одобренные права к роли `{role_name}`! Иерархия изменилась?")
+            await close_decision_message(interaction, self.t("security.embed_titles.action_approved", lang=lang), discord.Color.green())
+            return
+
+        # ИЗМЕНЕНО
+        reason = self.t("system.reason_denied", lang=lang)
+        # ИЗМЕНЕНО (создадим ключ)
+        logging.getLogger('bot.info').info(f"❌ Владелец **{reason}** изменение прав для роли **`{role_name}`** (инициатор: **{moderator_mention}**).")
+        await close_decision_message(interaction, self.t("security.embed_titles.action_denied", lang=lang), discord.Color.red())
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.role_danger_cache.pop(role.id, None)
 
     @commands.Cog.listener()
     async def on_webhooks_update(self, channel: discord.TextChannel):
@@ -265,28 +305,11 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
             if not actor or not entry or actor.id == self.bot.user.id or actor.id == guild.owner_id:
                 return
 
-            anti_nuke_cog: Optional["AntiNukeCog"] = self.bot.get_cog("Анти-нюк")
-            if anti_nuke_cog:
-                score = await anti_nuke_cog._get_guild_setting(guild.id, "webhook_create")
-                # ИЗМЕНЕНО
-                await anti_nuke_cog._handle_threat(actor, score, "webhook_spam")
-            
+            # Очки/окна анти-нюка за создание вебхука учитывает AntiNukeCog в собственном слушателе.
             if actor.id in self.bot.users_under_review:
                 return
 
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute(
-                        "SELECT id FROM action_permissions WHERE guild_id = %s AND user_id = %s AND action_type = %s AND expires_at > NOW() AND is_used = FALSE",
-                        (guild.id, actor.id, "webhook_create")
-                    )
-                    permission_row = await cursor.fetchone()
-
-            if permission_row:
-                permission_id = permission_row[0]
-                async with self.bot.db_pool.acquire() as conn:
-                    async with conn.cursor() as cursor:
-                        await cursor.execute("UPDATE action_permissions SET is_used = TRUE WHERE id = %s", (permission_id,))
+            if await consume_action_permission(self.bot, guild.id, actor.id, "webhook_create"):
                 logger.info(f"Пользователь {actor.name} использовал временное разрешение на создание вебхука.")
                 return
 
@@ -318,12 +341,9 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
                 except Exception as e:
                     logger.error(f"Неизвестная ошибка при отправке ЛС-запроса пользователю {actor.name}: {e}")
 
-            # ИЗМЕНЕНО
-            view = ConfirmationView(
-                author=owner, timeout=3600.0,
-                approve_label=self.t("ui.button_approve", lang=lang),
-                deny_label=self.t("ui.button_deny", lang=lang),
-                interaction_denied_message=self.t("ui.interaction_denied", lang=lang)
+            view = await create_decision(
+                self.bot, "webhook_create", guild.id, actor.id, owner.id, self._approve_deny_choices(lang),
+                ttl=CONFIRMATION_TTL, payload={'webhook_name': webhook_name, 'channel_id': channel.id}
             )
             
             # ИЗМЕНЕНО
@@ -340,73 +360,60 @@ class ConfirmationCog(commands.Cog, name="Подтверждения дейст
             # ИЗМЕНЕНО
             embed = discord.Embed(title=self.t("security.embed_titles.confirm_required", lang=lang), description=embed_desc_for_discord, color=discord.Color.gold())
 
-            message = None
             try:
-                message = await owner.send(embed=embed, view=view)
+                await owner.send(embed=embed, view=view)
                 await send_telegram_alert(self.bot.db_pool, guild.id, telegram_alert)
             except discord.Forbidden:
                 # ИЗМЕНЕНО
                 logging.error(self.t("security.dm_permission_error_log", lang=lang))
                 return
+        except Exception as e:
+            logger.error(f"Критическая ошибка при обработке события webhooks_update: {e}", exc_info=True)
 
-            await view.wait()
+    async def _notify_webhook_creator(self, guild: discord.Guild, user_id: int, channel_id: int, message_to_user: str):
+        member_obj = guild.get_member(user_id)
+        if not member_obj:
+            return
+        try:
+            await member_obj.send(message_to_user)
+        except discord.Forbidden:
+            logger.warning(f"Не удалось уведомить {member_obj.name} о решении по вебхуку (ЛС закрыты).")
+            channel = guild.get_channel(channel_id)
+            if not channel:
+                return
+            try:
+                await channel.send(f"{member_obj.mention}, {message_to_user}")
+            except discord.Forbidden:
+                logger.error(f"Не удалось отправить резервное сообщение о решении по вебхуку в канал #{channel.name}.")
 
-            if view.result is True:
-                try:
-                    async with self.bot.db_pool.acquire() as conn:
-                        async with conn.cursor() as cursor:
-                            await cursor.execute("INSERT INTO action_permissions (guild_id, user_id, action_type, expires_at) VALUES (%s, %s, %s, NOW() + INTERVAL 1 HOUR)", (guild.id, actor.id, "webhook_create"))
-                    
-                    if member_obj:
-                        # ИЗМЕНЕНО
-                        message_to_user = self.t("security.confirm.webhook_create.creator_request_approved", lang=lang, webhook_name=webhook_name)
-                        try:
-                            await member_obj.send(message_to_user)
-                        except discord.Forbidden:
-                            logger.warning(f"Не удалось уведомить {actor.name} об одобрении вебхука (ЛС закрыты).")
-                            try:
-                                await channel.send(f"{member_obj.mention}, {message_to_user}")
-                            except discord.Forbidden:
-                                logger.error(f"Не удалось отправить резервное сообщение об одобрении в канал #{channel.name}.")
-                except Exception as e:
-                    logger.error(f"Не удалось создать разрешение на вебхук в БД: {e}", exc_info=True)
+    async def _resolve_webhook_create(self, interaction: discord.Interaction, decision: Dict[str, Any], choice: str):
+        lang = await self.bot.get_guild_language(decision['guild_id'])
+        guild = self.bot.get_guild(decision['guild_id'])
+        payload = decision['payload']
+        webhook_name = payload['webhook_name']
+        actor_id = decision['target_id']
 
-                original_embed = view.interaction.message.embeds[0]
-                # ИЗМЕНЕНО
-                original_embed.title = self.t("security.embed_titles.action_approved", lang=lang)
-                original_embed.color = discord.Color.green()
-                await view.interaction.message.edit(embed=original_embed, view=None)
-            else:
-                if member_obj:
-                    # ИЗМЕНЕНО
-                    message_to_user = self.t("security.confirm.webhook_create.creator_request_denied", lang=lang, webhook_name=webhook_name)
-                    try:
-                        await member_obj.send(message_to_user)
-                    except discord.Forbidden:
-                        logger.warning(f"Не удалось уведомить {actor.name} об отклонении запроса на вебхук (ЛС закрыты).")
-                        try:
-                            await channel.send(f"{member_obj.mention}, {message_to_user}")
-                        except discord.Forbidden:
-                            logger.error(f"Не удалось отправить резервное сообщение об отклонении в канал #{channel.name}.")
-                
-                # ИЗМЕНЕНО
-                reason = self.t("system.reason_denied", lang=lang) if view.result is False else self.t("system.reason_timed_out", lang=lang)
-                # ИЗМЕНЕНО
-                logging.getLogger('bot.info').info(self.t("security.confirm.generic.webhook_denied_log", lang=lang, reason=reason, webhook_name=webhook_name, creator_mention=actor.mention))
-                if view.interaction:
-                    original_embed = view.interaction.message.embeds[0]
-                    # ИЗМЕНЕНО
-                    original_embed.title = self.t("security.embed_titles.action_denied", lang=lang)
-                    original_embed.color = discord.Color.red()
-                    await view.interaction.message.edit(embed=original_embed, view=None)
-                elif message:
-                    original_embed = message.embeds[0]
+        if choice == "approve":
+            try:
+                await grant_action_permission(self.bot, decision['guild_id'], actor_id, "webhook_create")
+                if guild:
                     # ИЗМЕНЕНО
-                    original_embed.title = self.t("security.embed_titles.action_timeout", lang=lang)
-                    original_embed.color = discord.Color.dark_grey()
-                    await message.edit(embed=original_embed, view=None)
-        except Exception as e:
-            logger.error(f"Критическая ошибка при обработке события webhooks_update: {e}", exc_info=True)
+                    message_to_user = self.t("security.confirm.webhook_create.creator_request_approved", lang=lang, webhook_name=webhook_name)
+                    await self._notify_webhook_creator(guild, actor_id, payload['channel_id'], message_to_user)
+            except Exception as e:
+                logger.error(f"Не удалось создать разрешение на вебхук: {e}", exc_info=True)
+            await close_decision_message(interaction, self.t("security.embed_titles.action_approved", lang=lang), discord.Color.green())
+            return
+
+        if guild:
+            # ИЗМЕНЕНО
+            message_to_user = self.t("security.confirm.webhook_create.creator_request_denied", lang=lang, webhook_name=webhook_name)
+            await self._notify_webhook_creator(guild, actor_id, payload['channel_id'], message_to_user)
+        # ИЗМЕНЕНО
+        reason = self.t("system.reason_denied", lang=lang)
+        # ИЗМЕНЕНО
+        logging.getLogger('bot.info').info(self.t("security.confirm.generic.webhook_denied_log", lang=lang, reason=reason, webhook_name=webhook_name, creator_mention=f"<@{actor_id}>"))
+        await close_decision_message(interaction, self.t("security.embed_titles.action_denied", lang=lang), discord.Color.red())
 
 async def setup(bot: "SecurityBot"):
     await bot.add_cog(ConfirmationCog(bot))
\ No newline at end of file
@@ -96,12 +96,13 @@ class ServerSelectView(discord.ui.View):
                 "ban": "ban", "kick": "kick",
             }
 
+            guild_settings = await antinuke_cog._get_settings(guild.id)
             for key, translation_key_suffix in setting_keys.items():
-                value = await antinuke_cog._get_guild_setting(guild.id, key)
+                value = guild_settings.get(key, antinuke_cog.default_settings.get(key))
                 # ИЗМЕНЕНО
                 name = t(f"setup.antinuke.field_{translation_key_suffix}", lang=lang)
                 
-                is_default = (value == antinuke_cog.defaults.get(key))
+                is_default = (value == antinuke_cog.default_settings.get(key))
                 # ИЗМЕНЕНО
                 default_suffix = t("system.default_value_suffix", lang=lang)
                 value_str = f"**{name}:** {value}{default_suffix if is_default else ''}"
@@ -4,24 +4,55 @@
 # Этот ког отвечает исключительно за обработку события on_member_join.
 # Его задача - служить "привратником" для сервера, проверяя каждого, кто входит.
 
+import time
+import asyncio
 import logging
 import discord
-from discord.ext import commands
-from typing import TYPE_CHECKING
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from discord.ext import commands, tasks
+from typing import Dict, TYPE_CHECKING
+
+from core.membership_index import ALLOWED_BOTS, QUARANTINED
+from core.raid_detection import JoinVelocityTracker
+from core.security_context import GuildSecurityContext
+from core.services import security_service
+from core.telegram_manager import send_telegram_message
 
 if TYPE_CHECKING:
     from main import SecurityBot
 
 logger = logging.getLogger(__name__)
 
+# Сколько секунд копить входы во время блокировки перед массовой обработкой.
+RAID_BATCH_DELAY = 1.0
+
+@dataclass
+class RaidLockdown:
+    action: str
+    expires_at: float
+    handled: int = 0
+
 class JoinGateCog(commands.Cog, name="Контроль входа"):
     """
     Ког, управляющий логикой при входе нового участника на сервер.
     Разделяет проверку на два основных случая: если вошел бот и если вошел обычный пользователь.
+    Для обычных пользователей перед проверкой карантина работает защита от рейдов.
     """
     def __init__(self, bot: "SecurityBot"):
         self.bot = bot
         self.t = self.bot.translator.get
+        self.join_tracker = JoinVelocityTracker()
+        self.lockdowns: Dict[int, RaidLockdown] = {}
+        self.pending: Dict[int, Dict[int, discord.Member]] = defaultdict(dict)
+        self.flush_tasks: Dict[int, asyncio.Task] = {}
+        self.expire_lockdowns.start()
+
+    def cog_unload(self):
+        self.expire_lockdowns.cancel()
+        for task in self.flush_tasks.values():
+            task.cancel()
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -48,14 +79,10 @@ class JoinGateCog(commands.Cog, name="Контроль входа"):
             except Exception as e: 
                 logger.error(f"Ошибка при проверке аудит-лога для {member.name}: {e}")
 
-            # Проверяем, есть ли бот в "белом списке" в нашей базе данных.
+            # Проверяем, есть ли бот в "белом списке" (индекс в памяти/Redis, без запроса к БД).
             is_allowed = False
             try:
-                async with self.bot.db_pool.acquire() as conn:
-                    async with conn.cursor() as cursor:
-                        await cursor.execute("SELECT 1 FROM allowed_bots WHERE guild_id = %s AND bot_id = %s", (member.guild.id, member.id))
-                        if await cursor.fetchone(): 
-                            is_allowed = True
+                is_allowed = await self.bot.membership.contains(ALLOWED_BOTS, member.guild.id, member.id)
             except Exception as e: 
                 logger.error(f"Ошибка при проверке бота {member.id} в БД.", exc_info=True)
             
@@ -84,32 +111,154 @@ class JoinGateCog(commands.Cog, name="Контроль входа"):
             return # Завершаем выполнение, так как это был бот.
 
         # --- Сценарий 2: Вошел обычный пользователь ---
+        context = await self.bot.security_contexts.get(member.guild)
+        # Карантин проверяется до рейдовой защиты: изолированный нарушитель, перезашедший во время
+        # рейда, должен снова получить карантинную роль, а не только действие блокировки.
+        quarantined = await self._reapply_quarantine(member, context)
+        await self._check_raid(member, context, quarantined)
+
+    async def _reapply_quarantine(self, member: discord.Member, context: GuildSecurityContext) -> bool:
+        """Возвращает True, если у участника есть активный карантин (роль выдается снова)."""
         try:
-            # Проверяем, не находится ли этот пользователь в нашей базе данных карантина.
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT 1 FROM quarantined_users WHERE user_id = %s AND guild_id = %s", (member.id, member.guild.id))
-                    is_quarantined = await cursor.fetchone()
-                    if is_quarantined:
-                        # Если пользователь в карантине, снова выдаем ему карантинную роль.
-                        await cursor.execute("SELECT config_value FROM guild_configs WHERE guild_id = %s AND config_key = %s", (member.guild.id, "quarantine_role_id"))
-                        result = await cursor.fetchone()
-                        if not result:
-                            logging.error(f"Не могу применить карантин к {member.mention}: карантинная роль не настроена для этого сервера.")
-                            return
-                        quarantine_role_id = int(result[0])
-                        quarantine_role = member.guild.get_role(quarantine_role_id)
-                        if not quarantine_role:
-                            logging.error(f"Не могу применить карантин к {member.mention}: роль с ID {quarantine_role_id} не найдена.")
-                            return
-                        await member.add_roles(quarantine_role, reason="Повторное применение карантина при перезаходе на сервер")
-                        # ИЗМЕНЕНО (создадим ключ на лету)
-                        logging.getLogger('bot.info').info(f"Пользователь {member.mention} перезашел на сервер и был снова помещен в карантин.")
+            # Проверка по индексу активных карантинов: обычно без обращения к Redis и MySQL.
+            if not await self.bot.membership.contains(QUARANTINED, member.guild.id, member.id):
+                return False
+        except Exception as e:
+            logger.error(f"Ошибка при проверке карантина для пользователя {member.id} при входе: {e}", exc_info=True)
+            return False
+        try:
+            # Если пользователь в карантине, снова выдаем ему карантинную роль.
+            if not context.quarantine_role_id:
+                logging.error(f"Не могу применить карантин к {member.mention}: карантинная роль не настроена для этого сервера.")
+                return True
+            quarantine_role = context.quarantine_role
+            if not quarantine_role:
+                logging.error(f"Не могу применить карантин к {member.mention}: роль с ID {context.quarantine_role_id} не найдена.")
+                return True
+            await member.add_roles(quarantine_role, reason="Повторное применение карантина при перезаходе на сервер")
+            # ИЗМЕНЕНО (создадим ключ на лету)
+            logging.getLogger('bot.info').info(f"Пользователь {member.mention} перезашел на сервер и был снова помещен в карантин.")
         except discord.Forbidden:
             # ИЗМЕНЕНО (создадим ключ на лету)
             logging.error(f"Не удалось повторно поместить {member.mention} в карантин: ошибка прав.")
         except Exception as e:
-            logger.error(f"Ошибка при проверке карантина для пользователя {member.id} при входе: {e}", exc_info=True)
+            logger.error(f"Ошибка при повторном применении карантина к пользователю {member.id} при входе: {e}", exc_info=True)
+        return True
+
+    # =========================================================================================
+    # >> ЗАЩИТА ОТ РЕЙДОВ
+    # =========================================================================================
+    async def _check_raid(self, member: discord.Member, context: GuildSecurityContext, quarantined: bool = False) -> bool:
+        """
+        Учитывает вход в скорости входов сервера. При превышении порога переводит сервер
+        в режим блокировки: подозрительные недавние и все новые входы обрабатываются пачками.
+        Участник с активным карантином учитывается в скорости, но в пачку не попадает.
+        Возвращает True, если участник поставлен в очередь на обработку.
+        """
+        if context.raid_action == "off":
+            return False
+        settings = context.raid_settings
+        guild_id = member.guild.id
+        now = time.monotonic()
+        record, joins = self.join_tracker.record(member, settings, now)
+
+        lockdown = self.lockdowns.get(guild_id)
+        if lockdown:
+            lockdown.expires_at = now + settings['lockdown']
+            targets = [member] if record.risk >= settings['min_risk'] and not quarantined else []
+        elif joins >= settings['joins']:
+            lockdown = self.lockdowns[guild_id] = RaidLockdown(context.raid_action, now + settings['lockdown'])
+            recent = self.join_tracker.recent(guild_id, settings['window'], now)
+            suspects = {r.member_id for r in recent if r.risk >= settings['min_risk']}
+            if quarantined:
+                suspects.discard(member.id)
+            targets = [m for m in map(member.guild.get_member, suspects) if m is not None]
+            await self._announce_lockdown(context, joins)
+        else:
+            return False
+
+        if not targets:
+            return False
+        self.pending[guild_id].update({target.id: target for target in targets})
+        if guild_id not in self.flush_tasks:
+            self.flush_tasks[guild_id] = asyncio.create_task(self._flush_pending(member.guild, lockdown))
+        return True
+
+    async def _flush_pending(self, guild: discord.Guild, lockdown: "RaidLockdown"):
+        """Собирает входы за RAID_BATCH_DELAY секунд и обрабатывает их одной пачкой."""
+        try:
+            await asyncio.sleep(RAID_BATCH_DELAY)
+            members = list(self.pending.pop(guild.id, {}).values())
+        finally:
+            self.flush_tasks.pop(guild.id, None)
+        # Участники с активным карантином уже изолированы: действие блокировки затерло бы их сохраненные роли.
+        in_quarantine = await asyncio.gather(*(
+            self.bot.membership.contains(QUARANTINED, guild.id, member.id) for member in members
+        ), return_exceptions=True)
+        members = [member for member, flag in zip(members, in_quarantine) if flag is not True]
+        if not members:
+            return
+
+        context = await self.bot.security_contexts.get(guild)
+        reason = "Автоматическая защита: рейд на сервер"
+        if lockdown.action == "quarantine":
+            result = await security_service.quarantine_users(self.bot, guild, members, reason, context.quarantine_role)
+        elif lockdown.action == "kick":
+            result = await security_service.kick_users(self.bot, guild, members, reason)
+        else:
+            duration = timedelta(minutes=context.raid_settings['timeout_minutes'])
+            result = await security_service.timeout_users(self.bot, guild, members, duration, reason)
+
+        if result['status'] == 'error':
+            logger.error(f"Рейд на сервере {guild.name}: не удалось выполнить '{lockdown.action}' для {len(members)} участников: {result['code']}")
+            return
+        succeeded = sum(1 for outcome in result['results'].values() if outcome['status'] == 'success')
+        lockdown.handled += succeeded
+        logger.info(f"Рейд на сервере {guild.name}: '{lockdown.action}' применен к {succeeded}/{len(members)} участникам.")
+
+    async def _announce_lockdown(self, context: GuildSecurityContext, joins: int):
+        guild = context.guild
+        lang = context.language
+        settings = context.raid_settings
+        minutes = round(settings['lockdown'] / 60, 1)
+        logging.getLogger('bot.info').info(f"🚨 Рейд на сервере {guild.name}: {joins} входов за {settings['window']:.0f} с. Блокировка на {minutes} мин. ({context.raid_action}).")
+        log_channel = context.log_channel
+        if log_channel:
+            try:
+                await log_channel.send(self.t("security.raid.lockdown_started", lang, joins=joins, window=f"{settings['window']:.0f}", minutes=minutes, action=context.raid_action))
+            except discord.HTTPException as e:
+                logger.warning(f"Не удалось отправить уведомление о рейде на сервере {guild.name}: {e}")
+        if context.telegram_enabled:
+            message = self.t("security.telegram.raid_lockdown", lang, guild_name=guild.name, joins=joins, window=f"{settings['window']:.0f}", minutes=minutes, action=context.raid_action)
+            await send_telegram_message(context.telegram_token, context.telegram_chat_id, message, guild.id)
+
+    @tasks.loop(seconds=10.0)
+    async def expire_lockdowns(self):
+        now = time.monotonic()
+        for guild_id, lockdown in list(self.lockdowns.items()):
+            if lockdown.expires_at > now or guild_id in self.flush_tasks:
+                continue
+            del self.lockdowns[guild_id]
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+            context = await self.bot.security_contexts.get(guild)
+            logging.getLogger('bot.info').info(f"✅ Блокировка из-за рейда на сервере {guild.name} снята. Обработано участников: {lockdown.handled}.")
+            log_channel = context.log_channel
+            if log_channel:
+                try:
+                    await log_channel.send(self.t("security.raid.lockdown_ended", context.language, count=lockdown.handled))
+                except discord.HTTPException as e:
+                    logger.warning(f"Не удалось отправить уведомление о снятии блокировки на сервере {guild.name}: {e}")
+
+    @expire_lockdowns.before_loop
+    async def before_expire_lockdowns(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.join_tracker.forget(guild.id)
+        self.lockdowns.pop(guild.id, None)
 
 async def setup(bot: "SecurityBot"):
     """Функция для загрузки кога в бота."""
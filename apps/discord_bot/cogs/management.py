@@ -15,7 +15,7 @@ from core.services import security_service, management_service
 
 # Этот импорт показывает, что мы должны будем перенести ui.py в общую папку core
 # Если ты уже это сделал, он будет работать. Если нет, мы сделаем это на следующем шаге.
-from core.ui import PaginationView
+from core.ui import PaginationView, KeysetPageSource
 
 # Указываем полный путь к нашему главному классу бота для type hinting
 if TYPE_CHECKING:
@@ -23,28 +23,32 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Не больше 25: на каждой странице строится Select с опцией на каждого пользователя.
+QUARANTINE_PER_PAGE = 20
+
 # Класс QuarantineListActionView мы оставляем здесь, так как он очень специфичен
 # для команды /quarantine list и вряд ли будет переиспользован где-то еще.
 # Разделение логики и представления уже достигнуто тем, что коллбэки кнопок
 # вызывают функции из сервисного слоя.
-class QuarantineListActionView(discord.ui.View):
-    def __init__(self, bot: "SecurityBot", author_id: int, user_options: list, lang: str):
-        super().__init__(timeout=300.0)
-        self.bot = bot
-        self.author_id = author_id
-        self.lang = lang
+class QuarantineListActionView(PaginationView):
+    """
+    Записи страницы - кортежи (user_id, quarantined_at). Список выбора перестраивается
+    под каждую страницу, поэтому не упирается в лимит Discord в 25 опций.
+    """
+    def __init__(self, interaction: discord.Interaction, source: KeysetPageSource, bot: "SecurityBot", lang: str):
+        super().__init__(interaction, source, bot, lang)
         t = self.bot.translator.get
 
         self.select_menu = discord.ui.Select(
             placeholder=t("management.quarantine.select_placeholder", lang=lang),
-            options=user_options, min_values=1, max_values=1
+            options=[discord.SelectOption(label="-", value="0")], min_values=1, max_values=1, row=0
         )
         self.select_menu.callback = self.select_callback
         self.add_item(self.select_menu)
 
-        self.restore_button = discord.ui.Button(label=t("ui.button_restore_roles", lang=lang), style=discord.ButtonStyle.success, emoji="✅", disabled=True)
-        self.ban_button = discord.ui.Button(label=t("ui.button_ban_user", lang=lang), style=discord.ButtonStyle.danger, emoji="🔨", disabled=True)
-        self.keep_button = discord.ui.Button(label=t("ui.button_close", lang=lang), style=discord.ButtonStyle.secondary, emoji="✖️", disabled=True)
+        self.restore_button = discord.ui.Button(label=t("ui.button_restore_roles", lang=lang), style=discord.ButtonStyle.success, emoji="✅", disabled=True, row=1)
+        self.ban_button = discord.ui.Button(label=t("ui.button_ban_user", lang=lang), style=discord.ButtonStyle.danger, emoji="🔨", disabled=True, row=1)
+        self.keep_button = discord.ui.Button(label=t("ui.button_close", lang=lang), style=discord.ButtonStyle.secondary, emoji="✖️", disabled=True, row=1)
 
         self.restore_button.callback = self.restore_callback
         self.ban_button.callback = self.ban_callback
@@ -54,8 +58,20 @@ class QuarantineListActionView(discord.ui.View):
         self.add_item(self.ban_button)
         self.add_item(self.keep_button)
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        return interaction.user.id == self.author_id
+    async def on_page_loaded(self, entries: list):
+        t = self.bot.translator.get
+        guild = self.interaction.guild
+        options = []
+        for user_id, _ in entries:
+            user = guild.get_member(user_id)
+            user_display = user.display_name if user else t("system.unknown_user", lang=self.lang)
+            options.append(discord.SelectOption(label=user_display[:100], value=str(user_id)))
+        self.select_menu.options = options or [discord.SelectOption(label="-", value="0")]
+        self.select_menu.max_values = max(len(options), 1)
+        self.select_menu.disabled = not options
+        self.restore_button.disabled = True
+        self.ban_button.disabled = True
+        self.keep_button.disabled = True
 
     async def select_callback(self, interaction: discord.Interaction):
         self.restore_button.disabled = False
@@ -66,29 +82,48 @@ class QuarantineListActionView(discord.ui.View):
     async def _handle_action(self, interaction: discord.Interaction, action_type: str):
         await interaction.response.defer()
         t = self.bot.translator.get
-        target_user_id = int(self.select_menu.values[0])
-        user_mention = f"<@{target_user_id}>"
+        target_user_ids = [int(value) for value in self.select_menu.values]
+        moderator_reason = f"Решение Владельца ({interaction.user})"
         
-        result = {}
         if action_type == 'restore':
-            result = await security_service.unquarantine_user(self.bot, interaction.guild, target_user_id, f"Решение Владельца ({interaction.user})")
-        elif action_type == 'ban':
-            result = await security_service.ban_quarantined_user(self.bot, interaction.guild, target_user_id, f"Решение Владельца ({interaction.user})")
-        
-        if result.get('status') == 'success':
+            result = await security_service.restore_users(self.bot, interaction.guild, target_user_ids, moderator_reason)
+        else:
+            result = await security_service.ban_users(self.bot, interaction.guild, target_user_ids, moderator_reason)
+
+        if result['status'] == 'error':
+            await interaction.edit_original_response(content=t("system.db_error", lang=self.lang), embed=None, view=None)
+            return
+
+        results = result['results']
+        succeeded = [user_id for user_id in target_user_ids if results.get(user_id, {}).get('status') == 'success']
+        failed = [user_id for user_id in target_user_ids if user_id not in succeeded]
+
+        if len(target_user_ids) == 1 and succeeded:
             title_key = "security.embed_titles.roles_restored" if action_type == 'restore' else "security.embed_titles.user_banned"
             desc_key = "management.quarantine.unquarantine_success" if action_type == 'restore' else "security.confirm.quarantine.ban_log"
             color = discord.Color.green() if action_type == 'restore' else discord.Color.dark_red()
-            
             new_embed = discord.Embed(
                 title=t(title_key, lang=self.lang),
-                description=t(desc_key, lang=self.lang, user_mention=user_mention),
+                description=t(desc_key, lang=self.lang, user_mention=f"<@{succeeded[0]}>"),
                 color=color
             )
-            for item in self.children: item.disabled = True
-            await interaction.edit_original_response(embed=new_embed, view=self)
         else:
-            await interaction.edit_original_response(content=t("system.db_error", lang=self.lang), embed=None, view=None)
+            done_key = "management.quarantine.bulk_restored" if action_type == 'restore' else "management.quarantine.bulk_banned"
+            lines = [t(done_key, lang=self.lang, count=len(succeeded))]
+            if failed:
+                lines.append(t("management.quarantine.bulk_failed", lang=self.lang, count=len(failed)))
+                lines.extend(
+                    t("management.quarantine.bulk_failed_entry", lang=self.lang, user_mention=f"<@{user_id}>", code=results.get(user_id, {}).get('code', 'unknown_error'))
+                    for user_id in failed
+                )
+            new_embed = discord.Embed(
+                title=t("management.quarantine.bulk_title", lang=self.lang),
+                description="\n".join(lines),
+                color=discord.Color.green() if not failed else discord.Color.orange()
+            )
+
+        for item in self.children: item.disabled = True
+        await interaction.edit_original_response(embed=new_embed, view=self)
 
     async def restore_callback(self, interaction: discord.Interaction):
         await self._handle_action(interaction, 'restore')
@@ -114,33 +149,35 @@ class ManagementCog(commands.Cog, name="Управление"):
         lang = await self.bot.get_guild_language(interaction.guild_id)
         t = self.bot.translator.get
 
-        quarantined_users = await security_service.get_quarantined_users(self.bot, interaction.guild_id)
+        def format_page(rows, offset: int) -> discord.Embed:
+            description_lines = []
+            for user_id, quarantined_at in rows:
+                user = interaction.guild.get_member(user_id)
+                user_mention = user.mention if user else f"`{user_id}`"
+                timestamp = discord.utils.format_dt(quarantined_at, 'R')
+                description_lines.append(t("management.quarantine.list_entry", lang=lang, user_mention=user_mention, user_id=user_id, timestamp=timestamp))
+            return discord.Embed(
+                title=t("management.quarantine.list_title", lang=lang, guild_name=interaction.guild.name),
+                description="\n".join(description_lines),
+                color=discord.Color.orange()
+            )
 
-        if not quarantined_users:
+        source = KeysetPageSource(
+            self.bot,
+            table="quarantined_users",
+            columns="user_id, quarantined_at",
+            where="guild_id = %s AND status = 'active'",
+            args=(interaction.guild_id,),
+            per_page=QUARANTINE_PER_PAGE,
+            formatter=format_page
+        )
+
+        if not await source.get_total():
             await interaction.response.send_message(t("management.quarantine.list_empty", lang=lang), ephemeral=True)
             return
 
-        embed = discord.Embed(
-            title=t("management.quarantine.list_title", lang=lang, guild_name=interaction.guild.name),
-            color=discord.Color.orange()
-        )
-        
-        user_options = []
-        description_lines = []
-        for user_data in quarantined_users:
-            user_id = user_data['user_id']
-            user = interaction.guild.get_member(user_id)
-            user_mention = user.mention if user else f"`{user_id}`"
-            user_display = user.display_name if user else t("system.unknown_user", lang)
-            
-            timestamp = discord.utils.format_dt(user_data['quarantined_at'], 'R')
-            description_lines.append(t("management.quarantine.list_entry", lang=lang, user_mention=user_mention, user_id=user_id, timestamp=timestamp))
-            user_options.append(discord.SelectOption(label=user_display, value=str(user_id)))
-
-        embed.description = "\n".join(description_lines)
-        view = QuarantineListActionView(self.bot, interaction.user.id, user_options, lang)
-        
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        view = QuarantineListActionView(interaction, source, self.bot, lang)
+        await view.start(ephemeral=True)
 
     @quarantine_group.command(name="add", description="Вручную поместить пользователя в карантин.")
     @app_commands.describe(member="Пользователь, которого нужно поместить в карантин.", reason="Причина (будет видна в логах и уведомлениях).")
@@ -12,8 +12,9 @@ import re
 import os
 
 # --- ИСПРАВЛЕНИЕ ИМПОРТОВ ---
-from core.ui import PaginationView
-from core.services.moderation_service import timeout_member, untimeout_member
+from core.ui import PaginationView, KeysetPageSource
+from core.services.moderation_service import timeout_member, untimeout_member, sync_mute_with_timeout
+from core.mute_scheduler import MuteScheduler
 
 if TYPE_CHECKING:
     from apps.discord_bot.main import SecurityBot
@@ -48,6 +49,23 @@ class ModerationCog(commands.Cog, name="Модерация"):
     def __init__(self, bot: "SecurityBot"):
         self.bot = bot
 
+    async def cog_load(self):
+        self.bot.mute_scheduler = MuteScheduler(self.bot)
+        await self.bot.mute_scheduler.start()
+
+    async def cog_unload(self):
+        if self.bot.mute_scheduler:
+            await self.bot.mute_scheduler.stop()
+            self.bot.mute_scheduler = None
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        # Тайм-аут сняли или изменили в обход бота - синхронизируем таблицу mutes.
+        if before.timed_out_until == after.timed_out_until:
+            return
+        if before.is_timed_out():
+            await sync_mute_with_timeout(self.bot, after)
+
     @app_commands.command(name="mute", description="Изолировать участника (выдать мьют).")
     @app_commands.describe(member="Участник, которого нужно изолировать.")
     @app_commands.checks.has_permissions(moderate_members=True)
@@ -198,47 +216,43 @@ class ModerationCog(commands.Cog, name="Модерация"):
     @app_commands.checks.has_permissions(moderate_members=True)
     async def muted(self, interaction: discord.Interaction):
         lang = await self.bot.get_guild_language(interaction.guild_id)
-        
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(
-                    "SELECT user_id, moderator_id, reason, end_timestamp FROM mutes WHERE guild_id = %s AND status = 'active' ORDER BY created_at DESC",
-                    (interaction.guild_id,)
-                )
-                muted_users = await cursor.fetchall()
 
-        if not muted_users:
-            await interaction.response.send_message(self.bot.translator.get("moderation.muted_list.empty", lang), ephemeral=True)
-            return
-            
-        entries = []
-        for i, (user_id, moderator_id, reason, end_timestamp) in enumerate(muted_users):
-            member = interaction.guild.get_member(user_id)
-            moderator = interaction.guild.get_member(moderator_id)
-            
-            entry_text = self.bot.translator.get(
-                "moderation.muted_list.entry", lang,
-                index=i + 1,
-                member_mention=member.mention if member else f"`{user_id}`",
-                moderator_mention=moderator.mention if moderator else self.bot.translator.get("system.unknown_user", lang),
-                reason=reason,
-                end_timestamp=discord.utils.format_dt(end_timestamp, 'R')
-            )
-            entries.append(entry_text)
-            
-        limit = int(os.getenv("PAGINATION_LIMIT", 20))
-        embeds = []
-        for i in range(0, len(entries), limit):
-            chunk = entries[i:i+limit]
-            embed = discord.Embed(
+        def format_page(rows, offset: int) -> discord.Embed:
+            entries = []
+            for i, (user_id, moderator_id, reason, end_timestamp) in enumerate(rows):
+                member = interaction.guild.get_member(user_id)
+                moderator = interaction.guild.get_member(moderator_id)
+                entries.append(self.bot.translator.get(
+                    "moderation.muted_list.entry", lang,
+                    index=offset + i + 1,
+                    member_mention=member.mention if member else f"`{user_id}`",
+                    moderator_mention=moderator.mention if moderator else self.bot.translator.get("system.unknown_user", lang),
+                    reason=reason,
+                    end_timestamp=discord.utils.format_dt(end_timestamp, 'R')
+                ))
+            return discord.Embed(
                 title=self.bot.translator.get("moderation.muted_list.title", lang),
-                description="\n\n".join(chunk),
+                description="\n\n".join(entries)[:4096],
                 color=discord.Color.blue()
             )
-            embeds.append(embed)
-            
-        view = PaginationView(interaction, embeds) # Исправлено
-        await interaction.response.send_message(embed=embeds[0], view=view)
+
+        source = KeysetPageSource(
+            self.bot,
+            table="mutes",
+            columns="user_id, moderator_id, reason, end_timestamp",
+            where="guild_id = %s AND status = 'active'",
+            args=(interaction.guild_id,),
+            per_page=int(os.getenv("PAGINATION_LIMIT", 20)),
+            formatter=format_page,
+            key="mute_id"
+        )
+
+        if not await source.get_total():
+            await interaction.response.send_message(self.bot.translator.get("moderation.muted_list.empty", lang), ephemeral=True)
+            return
+
+        view = PaginationView(interaction, source, self.bot, lang)
+        await view.start()
 
 async def setup(bot: "SecurityBot"):
     await bot.add_cog(ModerationCog(bot))
\ No newline at end of file
@@ -0,0 +1,69 @@
+# apps/discord_bot/cogs/owner.py
+# -*- coding: utf-8 -*-
+
+import os
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+from discord.ext import commands, tasks
+
+from core.permissions import is_bot_owner_classic
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+LOCALE_WATCH_INTERVAL = float(os.getenv("LOCALE_WATCH_INTERVAL", 5.0))
+
+class OwnerCog(commands.Cog, name="Владелец бота"):
+    """
+    Служебные команды владельца бота и фоновое отслеживание файлов локализации.
+    """
+    def __init__(self, bot: "SecurityBot"):
+        self.bot = bot
+        self.seen_locale_mtimes = self.bot.translator.mtimes
+        if LOCALE_WATCH_INTERVAL > 0:
+            self.watch_locales.change_interval(seconds=LOCALE_WATCH_INTERVAL)
+            self.watch_locales.start()
+
+    def cog_unload(self):
+        self.watch_locales.cancel()
+
+    async def _reload_locales(self) -> dict:
+        # Парсинг YAML выполняется в отдельном потоке, чтобы не блокировать цикл событий.
+        stats = await asyncio.to_thread(self.bot.translator.reload)
+        self.seen_locale_mtimes = self.bot.translator.mtimes
+        return stats
+
+    @tasks.loop(seconds=5.0)
+    async def watch_locales(self):
+        current = await asyncio.to_thread(self.bot.translator.scan_mtimes)
+        if current == self.seen_locale_mtimes:
+            return
+        # Запоминаем состояние сразу, чтобы битый файл не перезагружался на каждом тике.
+        self.seen_locale_mtimes = current
+        try:
+            stats = await self._reload_locales()
+            logging.getLogger('bot.info').info(f"🌐 Файлы локализации изменены и перезагружены за {stats['total_ms']:.1f} мс.")
+        except Exception as e:
+            logger.error(f"Не удалось перезагрузить локализацию, используются прежние переводы: {e}")
+
+    @commands.command(name="reload-locales", hidden=True)
+    @commands.check(is_bot_owner_classic)
+    async def reload_locales(self, ctx: commands.Context):
+        """Перезагружает файлы локализации без перезапуска бота."""
+        lang = await self.bot.get_guild_language(ctx.guild.id if ctx.guild else None)
+        try:
+            stats = await self._reload_locales()
+        except Exception as e:
+            await ctx.reply(self.bot.translator.get("system.locales_reload_failed", lang, error=e))
+            return
+        await ctx.reply(self.bot.translator.get(
+            "system.locales_reloaded", lang,
+            total_ms=stats['total_ms'], load_ms=stats['load_ms'], build_ms=stats['build_ms'],
+            cache_hits=stats['cache_hits'], files=stats['files'], languages=", ".join(stats['languages'])
+        ))
+
+async def setup(bot: "SecurityBot"):
+    await bot.add_cog(OwnerCog(bot))
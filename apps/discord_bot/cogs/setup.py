@@ -13,6 +13,7 @@ import json
 # --- ИСПРАВЛЕНИЕ ИМПОРТОВ ---
 from core.permissions import is_guild_owner_check
 from core.services import settings_service
+from core.threat_detectors import parse_window_rules, format_window_rules
 
 # Указываем полный путь к нашему главному классу бота и другим когам для type hinting
 if TYPE_CHECKING:
@@ -103,6 +104,14 @@ class AntiNukeSetupGroup(app_commands.Group, name="antinuke", description="На
             "ban": t("setup.antinuke.field_ban", lang=lang), "kick": t("setup.antinuke.field_kick", lang=lang),
         }
 
+    async def get_reset_keys(self, lang: str) -> dict:
+        t = self.bot.translator.get
+        setting_keys = await self.get_setting_keys(lang)
+        setting_keys["engine"] = t("setup.antinuke.field_engine", lang=lang)
+        for action in settings_service.ANTINUKE_WINDOW_DEFAULTS:
+            setting_keys[f"window_{action}"] = t("setup.antinuke.field_window", lang=lang, action=action)
+        return setting_keys
+
     @app_commands.command(name="view", description="Показать текущие настройки системы Анти-нюк для этого сервера")
     @app_commands.check(is_guild_owner_check)
     async def view(self, interaction: discord.Interaction):
@@ -130,7 +139,21 @@ class AntiNukeSetupGroup(app_commands.Group, name="antinuke", description="На
             default_suffix = t("system.default_value_suffix", lang=lang)
             value_str = f"{value} {default_suffix}" if is_default else f"**{value}**"
             embed.add_field(name=name, value=value_str, inline=True)
-            
+
+        context = await self.bot.security_contexts.get(interaction.guild)
+        default_suffix = t("system.default_value_suffix", lang=lang)
+        engine_default = context.engine == settings_service.ANTINUKE_ENGINE_DEFAULT
+        embed.add_field(
+            name=t("setup.antinuke.field_engine", lang=lang),
+            value=f"{context.engine} {default_suffix}" if engine_default else f"**{context.engine}**", inline=False
+        )
+        window_lines = []
+        for action, rules in context.window_rules.items():
+            rules_str = format_window_rules(rules)
+            is_default = rules == parse_window_rules(settings_service.ANTINUKE_WINDOW_DEFAULTS[action])
+            window_lines.append(f"`{action}`: {rules_str} {default_suffix}" if is_default else f"`{action}`: **{rules_str}**")
+        embed.add_field(name=t("setup.antinuke.field_windows", lang=lang), value="\n".join(window_lines), inline=False)
+
         await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="configure", description="Изменить один или несколько параметров системы Анти-нюк")
@@ -166,6 +189,50 @@ class AntiNukeSetupGroup(app_commands.Group, name="antinuke", description="На
         else:
             await interaction.followup.send(t("system.db_error", lang=lang))
 
+    @app_commands.command(name="engine", description="Выбрать движок обнаружения атак")
+    @app_commands.describe(engine="score - очки со сгоранием, window - лимиты действий в скользящих окнах")
+    @app_commands.choices(engine=[app_commands.Choice(name=name, value=name) for name in settings_service.ANTINUKE_ENGINES])
+    @app_commands.check(is_guild_owner_check)
+    async def engine(self, interaction: discord.Interaction, engine: str):
+        lang = await self.bot.get_guild_language(interaction.guild_id)
+        t = self.bot.translator.get
+
+        await interaction.response.defer(ephemeral=True)
+
+        result = await settings_service.set_guild_setting(self.bot, interaction.guild_id, "antinuke_engine", engine)
+        if result['status'] == 'success':
+            await interaction.followup.send(t("setup.antinuke.engine_success", lang=lang, engine=engine))
+        else:
+            await interaction.followup.send(t("system.db_error", lang=lang))
+
+    @app_commands.command(name="window", description="Задать лимиты скользящих окон для действия (движок window)")
+    @app_commands.describe(
+        action="Отслеживаемое действие",
+        rules="Лимиты через запятую в формате количество/период, например: 5/10s, 20/5m"
+    )
+    @app_commands.choices(action=[app_commands.Choice(name=name, value=name) for name in settings_service.ANTINUKE_WINDOW_DEFAULTS])
+    @app_commands.check(is_guild_owner_check)
+    async def window(self, interaction: discord.Interaction, action: str, rules: str):
+        lang = await self.bot.get_guild_language(interaction.guild_id)
+        t = self.bot.translator.get
+
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            parsed = parse_window_rules(rules)
+        except ValueError:
+            parsed = []
+        if not parsed:
+            await interaction.followup.send(t("setup.antinuke.window_invalid", lang=lang, rules=rules))
+            return
+
+        rules_str = format_window_rules(parsed)
+        result = await settings_service.set_guild_setting(self.bot, interaction.guild_id, f"antinuke_window_{action}", rules_str)
+        if result['status'] == 'success':
+            await interaction.followup.send(t("setup.antinuke.window_success", lang=lang, action=action, rules=rules_str))
+        else:
+            await interaction.followup.send(t("system.db_error", lang=lang))
+
     @app_commands.command(name="reset", description="Сбросить настройку Анти-нюка до значения по умолчанию")
     @app_commands.describe(setting="Настройка, которую нужно сбросить")
     @app_commands.check(is_guild_owner_check)
@@ -175,7 +242,7 @@ class AntiNukeSetupGroup(app_commands.Group, name="antinuke", description="На
         
         await interaction.response.defer(ephemeral=True)
         
-        setting_keys = await self.get_setting_keys(lang)
+        setting_keys = await self.get_reset_keys(lang)
         if setting not in setting_keys:
             await interaction.followup.send("Выбрана неверная настройка.")
             return
@@ -192,12 +259,88 @@ class AntiNukeSetupGroup(app_commands.Group, name="antinuke", description="На
     @reset.autocomplete('setting')
     async def reset_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
         lang = await self.bot.get_guild_language(interaction.guild.id)
-        setting_keys = await self.get_setting_keys(lang)
+        setting_keys = await self.get_reset_keys(lang)
         choices = [app_commands.Choice(name=name, value=key) for key, name in setting_keys.items()]
         if current:
             return [choice for choice in choices if current.lower() in choice.name.lower()]
         return choices
 
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+class RaidSetupGroup(app_commands.Group, name="raid", description="Настроить защиту от рейдов (массовых входов на сервер)"):
+    def __init__(self, bot: "SecurityBot"):
+        super().__init__()
+        self.bot = bot
+
+    @app_commands.command(name="view", description="Показать текущие настройки защиты от рейдов")
+    @app_commands.check(is_guild_owner_check)
+    async def view(self, interaction: discord.Interaction):
+        lang = await self.bot.get_guild_language(interaction.guild_id)
+        t = self.bot.translator.get
+
+        await interaction.response.defer(ephemeral=True)
+
+        context = await self.bot.security_contexts.get(interaction.guild)
+        default_suffix = t("system.default_value_suffix", lang=lang)
+        embed = discord.Embed(
+            title=t("setup.raid.settings_title", lang=lang, guild_name=interaction.guild.name),
+            description=t("setup.antinuke.settings_desc", lang=lang), color=discord.Color.blue()
+        )
+        is_default = context.raid_action == settings_service.RAID_ACTION_DEFAULT
+        embed.add_field(
+            name=t("setup.raid.field_action", lang=lang),
+            value=f"{context.raid_action} {default_suffix}" if is_default else f"**{context.raid_action}**", inline=True
+        )
+        for key, default in settings_service.RAID_DEFAULTS.items():
+            value = context.raid_settings.get(key, default)
+            value_str = f"{value:g} {default_suffix}" if value == default else f"**{value:g}**"
+            embed.add_field(name=t(f"setup.raid.field_{key}", lang=lang), value=value_str, inline=True)
+
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="configure", description="Изменить параметры защиты от рейдов")
+    @app_commands.describe(
+        action="Что делать с новыми участниками во время блокировки (off - отключить защиту)",
+        joins="Сколько входов за окно включает блокировку",
+        window="Окно подсчета входов, в секундах",
+        lockdown="Длительность блокировки после последнего входа, в секундах",
+        account_age_days="Аккаунт младше стольких дней считается новым",
+        min_risk="Минимальный риск (0-3: новый аккаунт, аватар по умолчанию, похожий ник) для действия",
+        timeout_minutes="Длительность тайм-аута для действия timeout, в минутах"
+    )
+    @app_commands.choices(action=[app_commands.Choice(name=name, value=name) for name in settings_service.RAID_ACTIONS])
+    @app_commands.check(is_guild_owner_check)
+    async def configure(self, interaction: discord.Interaction,
+                        action: Optional[str] = None,
+                        joins: Optional[app_commands.Range[int, 2, 1000]] = None,
+                        window: Optional[app_commands.Range[int, 1, 600]] = None,
+                        lockdown: Optional[app_commands.Range[int, 10, 86400]] = None,
+                        account_age_days: Optional[app_commands.Range[int, 0, 365]] = None,
+                        min_risk: Optional[app_commands.Range[int, 0, 3]] = None,
+                        timeout_minutes: Optional[app_commands.Range[int, 1, 40320]] = None):
+        lang = await self.bot.get_guild_language(interaction.guild_id)
+        t = self.bot.translator.get
+
+        await interaction.response.defer(ephemeral=True)
+
+        settings_to_update = {
+            "action": action, "joins": joins, "window": window, "lockdown": lockdown,
+            "account_age_days": account_age_days, "min_risk": min_risk, "timeout_minutes": timeout_minutes,
+        }
+        tasks = [
+            settings_service.set_guild_setting(self.bot, interaction.guild_id, f"raid_{key}", value)
+            for key, value in settings_to_update.items() if value is not None
+        ]
+        if not tasks:
+            await interaction.followup.send(t("setup.raid.no_changes", lang=lang))
+            return
+
+        results = await asyncio.gather(*tasks)
+        if all(res['status'] == 'success' for res in results):
+            await interaction.followup.send(t("setup.raid.configure_success", lang=lang))
+        else:
+            await interaction.followup.send(t("system.db_error", lang=lang))
+
 @app_commands.guild_only()
 @app_commands.default_permissions(administrator=True)
 class BackupSettingsGroup(app_commands.Group, name="backup-settings", description="Настроить лимит сообщений для бэкапов"):
@@ -261,6 +404,7 @@ class SetupGroup(app_commands.Group, name="setup", description="Управлен
         self.add_command(LanguageSetupGroup(bot))
         self.add_command(QuarantineSetupGroup(bot))
         self.add_command(AntiNukeSetupGroup(bot))
+        self.add_command(RaidSetupGroup(bot))
         self.add_command(BackupSettingsGroup(bot))
         self.add_command(LogSetupGroup(bot))
 
@@ -9,10 +9,10 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import typing
-import aiogram
 
 # Импортируем наши кастомные модули
 from core import crypto
+from core.telegram_manager import load_aiogram
 from core.permissions import is_guild_owner_check
 
 if typing.TYPE_CHECKING:
@@ -55,6 +55,7 @@ class TelegramSetupGroup(app_commands.Group, name="telegram", description="На
                         "INSERT INTO guild_configs (guild_id, config_key, config_value) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE config_value = %s", 
                         (interaction.guild.id, "telegram_bot_token_encrypted", encrypted_token, encrypted_token)
                     )
+            self.bot.security_contexts.invalidate(interaction.guild.id)
             # ИЗМЕНЕНО
             await interaction.followup.send(t("setup.telegram.success", lang=lang))
         except ValueError:
@@ -87,6 +88,8 @@ class TelegramSetupGroup(app_commands.Group, name="telegram", description="На
                 user_id = user_id_res[0]
                 token = crypto.decrypt_data(token_res[0])
                 
+                # aiogram импортируется в отдельном потоке, если еще не был загружен в фоне после запуска.
+                aiogram = await load_aiogram()
                 tg_bot = aiogram.Bot(token=token)
                 try:
                     # ИЗМЕНЕНО
@@ -115,6 +118,7 @@ class TelegramSetupGroup(app_commands.Group, name="telegram", description="На
                         "DELETE FROM guild_configs WHERE guild_id = %s AND config_key IN (%s, %s)", 
                         (interaction.guild.id, "telegram_user_id", "telegram_bot_token_encrypted")
                     )
+            self.bot.security_contexts.invalidate(interaction.guild.id)
             # ИЗМЕНЕНО
             await interaction.followup.send(t("setup.telegram.remove_success", lang=lang))
         except Exception as e:
@@ -7,14 +7,13 @@ from typing import Optional, TYPE_CHECKING
 from datetime import datetime, timedelta
 import discord
 from discord import app_commands
-from discord.ext import commands
-import humanize
+from discord.ext import commands, tasks
 import re
 import os
 
 # --- ИСПРАВЛЕНИЕ ИМПОРТОВ ---
-from core.ui import PaginationView
-from core.services.moderation_service import add_warning, check_and_apply_auto_mute
+from core.ui import PaginationView, KeysetPageSource
+from core.services.moderation_service import add_warning, archive_warning, check_and_apply_auto_mute, expire_warnings
 from core.translator import Translator
 
 if TYPE_CHECKING:
@@ -22,6 +21,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+WARNS_PER_PAGE = 5
+
 def _parse_duration_string(duration_str: str) -> int:
     """
     Простая функция для парсинга строки времени (e.g., "10m", "1h", "7d").
@@ -61,7 +62,20 @@ class WarningsCog(commands.Cog, name="Предупреждения"):
 
     def __init__(self, bot: "SecurityBot"):
         self.bot = bot
-        humanize.i18n.activate("ru_RU")
+        self.expire_warnings_task.start()
+
+    def cog_unload(self):
+        self.expire_warnings_task.cancel()
+
+    @tasks.loop(minutes=10)
+    async def expire_warnings_task(self):
+        result = await expire_warnings(self.bot)
+        if result['expired']:
+            logger.info(f"Сгорело предупреждений: {result['expired']}.")
+
+    @expire_warnings_task.before_loop
+    async def before_expire_warnings_task(self):
+        await self.bot.wait_until_ready()
 
     warns_group = app_commands.Group(name="warns", description="Управление системой предупреждений")
 
@@ -280,45 +294,48 @@ class WarningsCog(commands.Cog, name="Предупреждения"):
     @app_commands.checks.has_permissions(manage_messages=True)
     async def warns_list(self, interaction: discord.Interaction, member: discord.Member):
         lang = await self.bot.get_guild_language(interaction.guild_id)
-        
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(
-                    "SELECT incident_id, moderator_id, reason, created_at, status FROM warnings WHERE guild_id = %s AND user_id = %s ORDER BY created_at DESC",
-                    (interaction.guild_id, member.id)
-                )
-                warnings = await cursor.fetchall()
-
-        if not warnings:
-            await interaction.response.send_message(self.bot.translator.get("moderation.warns_list.no_warns", lang, member_mention=member.mention), ephemeral=True)
-            return
-
-        embeds = []
-        for i, (incident_id, moderator_id, reason, created_at, status) in enumerate(warnings):
-            mod = interaction.guild.get_member(moderator_id) or self.bot.translator.get("system.unknown_user", lang)
-            timestamp = discord.utils.format_dt(created_at, 'f')
-            status_text = ""
-            if status == 'archived':
-                status_text = self.bot.translator.get("moderation.warns_list.status_archived", lang)
-            elif status == 'expired':
-                status_text = self.bot.translator.get("moderation.warns_list.status_expired", lang)
 
-            embed = discord.Embed(
-                title=self.bot.translator.get("moderation.warns_list.title", lang, member_name=member.display_name),
-                description=self.bot.translator.get(
+        def format_page(rows, offset: int) -> discord.Embed:
+            entries = []
+            for i, (moderator_id, reason, created_at, status) in enumerate(rows):
+                mod = interaction.guild.get_member(moderator_id) or self.bot.translator.get("system.unknown_user", lang)
+                timestamp = discord.utils.format_dt(created_at, 'f')
+                status_text = ""
+                if status == 'archived':
+                    status_text = self.bot.translator.get("moderation.warns_list.status_archived", lang)
+                elif status == 'expired':
+                    status_text = self.bot.translator.get("moderation.warns_list.status_expired", lang)
+
+                entries.append(self.bot.translator.get(
                     "moderation.warns_list.entry", lang,
-                    index=i + 1,
+                    index=offset + i + 1,
                     moderator_mention=mod.mention if isinstance(mod, discord.Member) else mod,
                     timestamp=timestamp,
                     status=status_text,
                     reason=reason
-                ),
+                ))
+            return discord.Embed(
+                title=self.bot.translator.get("moderation.warns_list.title", lang, member_name=member.display_name),
+                description="\n\n".join(entries)[:4096],
                 color=discord.Color.blue()
             )
-            embeds.append(embed)
-        
-        view = PaginationView(interaction, embeds)
-        await interaction.response.send_message(embed=embeds[0], view=view)
+
+        source = KeysetPageSource(
+            self.bot,
+            table="warnings",
+            columns="moderator_id, reason, created_at, status",
+            where="guild_id = %s AND user_id = %s",
+            args=(interaction.guild_id, member.id),
+            per_page=WARNS_PER_PAGE,
+            formatter=format_page
+        )
+
+        if not await source.get_total():
+            await interaction.response.send_message(self.bot.translator.get("moderation.warns_list.no_warns", lang, member_mention=member.mention), ephemeral=True)
+            return
+
+        view = PaginationView(interaction, source, self.bot, lang)
+        await view.start()
 
     @warns_group.command(name="remove", description="Снять предупреждение с участника по номеру.")
     @app_commands.describe(
@@ -332,23 +349,21 @@ class WarningsCog(commands.Cog, name="Предупреждения"):
         async with self.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "SELECT id FROM warnings WHERE guild_id = %s AND user_id = %s ORDER BY created_at DESC",
-                    (interaction.guild_id, member.id)
+                    "SELECT id FROM warnings WHERE guild_id = %s AND user_id = %s ORDER BY id DESC LIMIT 1 OFFSET %s",
+                    (interaction.guild_id, member.id, max(incident_index - 1, 0))
                 )
-                warnings_ids = [row[0] for row in await cursor.fetchall()]
+                row = await cursor.fetchone()
 
-        if not warnings_ids or incident_index <= 0 or incident_index > len(warnings_ids):
+        if not row or incident_index <= 0:
             await interaction.response.send_message(self.bot.translator.get("moderation.warns_remove.not_found", lang, incident_index=incident_index), ephemeral=True)
             return
         
-        incident_to_remove_id = warnings_ids[incident_index - 1]
+        incident_to_remove_id = row[0]
         
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(
-                    "UPDATE warnings SET status = 'archived' WHERE id = %s",
-                    (incident_to_remove_id,)
-                )
+        result = await archive_warning(self.bot, interaction.guild_id, member.id, incident_to_remove_id)
+        if result['status'] == 'error':
+            await interaction.response.send_message(self.bot.translator.get("system.db_error", lang), ephemeral=True)
+            return
 
         embed = discord.Embed(
             title=self.bot.translator.get("moderation.warns_remove.success_title", lang),
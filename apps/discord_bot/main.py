@@ -19,12 +19,23 @@ import redis.asyncio as redis
 
 from prometheus_client import generate_latest
 from aiohttp import web
-from core import metrics
+from core import metrics, live_stats, telegram_manager, timeseries, tracing
+from core.cog_loader import load_cogs, profile_startup
+from core.command_tree import InstrumentedCommandTree
 from core.db import Database
+from core.debug_endpoints import setup_debug_routes
+from core.loop_monitor import LoopMonitor
+from core.decisions import DecisionButton
+from core.dm_queue import DMQueue
+from core.membership_index import MembershipIndex
+from core.security_context import SecurityContextCache
+from core.startup import StartupTimeline, COMMAND_TREE_HASH_KEY, command_tree_hash
 from core.translator import Translator
 from core.log_handler import DiscordLogHandler
+from apps.discord_bot.cogs import COG_MANIFEST
 
 if TYPE_CHECKING:
+    from core.mute_scheduler import MuteScheduler
     from apps.discord_bot.cogs.greeting import GreetingCog
     from apps.discord_bot.cogs.config_events import ConfigEventsCog
 
@@ -33,6 +44,17 @@ translator = Translator()
 DEFAULT_LANGUAGE = os.getenv("BOT_LANGUAGE", "ru").lower()
 logger = logging.getLogger(__name__)
 
+# Поля статистики, которые меняются почти на каждом тике и не отображаются на дашборде.
+# Их изменение не должно сбрасывать ETag/версию снимка в web API.
+VOLATILE_STATS_FIELDS = {"botLatency"}
+
+# Язык сервера кэшируется локально в процессе и в Redis (lang:{guild_id}).
+# При смене языка в этот канал публикуется ID сервера, и все процессы бота сбрасывают локальную копию.
+LANGUAGE_INVALIDATION_CHANNEL = "lang_invalidate"
+LANGUAGE_CACHE_TTL = int(os.getenv("LANGUAGE_CACHE_TTL", 86400))
+# Принудительная синхронизация слэш-команд, даже если дерево команд не менялось.
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "false").lower() == "true"
+
 async def send_shutdown_webhook(message: str, color: int = 0x808080):
     webhook_url = os.getenv("SHUTDOWN_WEBHOOK_URL")
     if not webhook_url: return
@@ -81,6 +103,9 @@ async def metrics_handler(request):
 
 class SecurityBot(commands.Bot):
     def __init__(self, *args, **kwargs):
+        kwargs.setdefault('tree_cls', InstrumentedCommandTree)
+        # Запросы к Discord REST попадают в трассу текущего слушателя или команды.
+        kwargs.setdefault('http_trace', tracing.create_http_trace_config())
         super().__init__(*args, **kwargs)
         self.db_manager = Database()
         self.translator = translator 
@@ -88,20 +113,31 @@ class SecurityBot(commands.Bot):
         self.redis: redis.Redis = None
         self.discord_handler = None
         self._synced_once = False
+        self.startup_timeline = StartupTimeline()
         self.users_under_review: set[int] = set()
         self.default_language = DEFAULT_LANGUAGE
         self.hardcoded_language = "en"
         self.start_time = discord.utils.utcnow()
         self.is_shutting_down = False
+        self.last_stats_snapshots: Dict[int, Dict[str, str]] = {}
+        self.mute_scheduler: Optional["MuteScheduler"] = None
+        self.language_cache: Dict[int, str] = {}
+        self._language_cache_generation = 0
+        self.language_cache_stats = {'hits': 0, 'redis_hits': 0, 'misses': 0}
+        self._language_listener_task: Optional[asyncio.Task] = None
+        self._telegram_warmup_task: Optional[asyncio.Task] = None
+        self.security_contexts = SecurityContextCache(self)
+        self.membership = MembershipIndex(self)
+        self.loop_monitor = LoopMonitor()
+        self.dm_queue = DMQueue(self)
         self.tree.on_error = self.on_app_command_error
-        self.tree.interaction_check = self.global_interaction_check
 
     @tasks.loop(seconds=15.0)
     async def update_stats_in_redis(self):
         for guild in self.guilds:
             try:
                 online_members = sum(1 for m in guild.members if m.status != discord.Status.offline)
-                
+
                 stats = {
                     "serverName": str(guild.name),
                     "memberCount": str(guild.member_count),
@@ -111,12 +147,32 @@ class SecurityBot(commands.Bot):
                     "voiceChannelCount": str(len(guild.voice_channels)),
                     "botLatency": str(round(self.latency * 1000))
                 }
-                
-                # --- ИСПРАВЛЕНИЕ: Используем pipeline для надежной записи ---
+
+                # Версия снимка растет только при изменении значимых полей:
+                # по ней web API строит ETag и отвечает 304 на повторные запросы.
+                previous = self.last_stats_snapshots.get(guild.id) or {}
+                delta = {
+                    key: value for key, value in stats.items()
+                    if key not in VOLATILE_STATS_FIELDS and previous.get(key) != value
+                }
+
+                redis_key = f"stats:{guild.id}"
+                now = int(discord.utils.utcnow().timestamp())
+                updated_at = str(now)
                 async with self.redis.pipeline(transaction=False) as pipe:
-                    for key, value in stats.items():
-                        await pipe.hset(f"stats:{guild.id}", key, value)
-                    await pipe.execute()
+                    pipe.hset(redis_key, mapping=stats)
+                    if delta:
+                        pipe.hincrby(redis_key, "version", 1)
+                        pipe.hset(redis_key, "updatedAt", updated_at)
+                    timeseries.record_sample(pipe, guild.id, stats, now)
+                    results = await pipe.execute()
+                self.last_stats_snapshots[guild.id] = stats
+
+                # Дашборд получает только изменившиеся поля вместе с новой версией снимка.
+                if delta:
+                    delta["version"] = str(results[1])
+                    delta["updatedAt"] = updated_at
+                    await live_stats.publish_event(self.redis, guild.id, live_stats.EVENT_STATS, delta)
 
             except Exception as e:
                 logger.warning(f"Не удалось обновить статистику для сервера {guild.id}: {e}")
@@ -143,6 +199,10 @@ class SecurityBot(commands.Bot):
             self.is_shutting_down = True
             logging.getLogger('bot.startup').info("💤 Начинается процедура выключения бота...")
             await self.cleanup_before_shutdown()
+            if self._language_listener_task:
+                self._language_listener_task.cancel()
+            await self.loop_monitor.stop()
+            await self.dm_queue.stop()
             if self.redis:
                 try:
                     await self.redis.aclose()
@@ -155,9 +215,20 @@ class SecurityBot(commands.Bot):
 
     async def get_guild_language(self, guild_id: int | None) -> str:
         if not guild_id: return self.default_language
+        lang = self.language_cache.get(guild_id)
+        if lang:
+            self.language_cache_stats['hits'] += 1
+            return lang
+        # Если во время чтения язык будет изменен, устаревшее значение не попадет в локальный кэш.
+        generation = self._language_cache_generation
         redis_key = f"lang:{guild_id}"
         cached_lang = await self.redis.get(redis_key)
-        if cached_lang: return cached_lang
+        if cached_lang:
+            self.language_cache_stats['redis_hits'] += 1
+            if generation == self._language_cache_generation:
+                self.language_cache[guild_id] = cached_lang
+            return cached_lang
+        self.language_cache_stats['misses'] += 1
         lang = None
         try:
             async with self.db_pool.acquire() as conn:
@@ -169,12 +240,69 @@ class SecurityBot(commands.Bot):
             logger.error(f"Не удалось получить настройку языка из БД для сервера {guild_id}: {e}")
         lang = lang or self.default_language
         if lang not in self.translator.strings: lang = self.hardcoded_language
-        await self.redis.set(redis_key, lang)
+        if generation == self._language_cache_generation:
+            await self.redis.set(redis_key, lang, ex=LANGUAGE_CACHE_TTL)
+            self.language_cache[guild_id] = lang
         return lang
 
+    async def invalidate_guild_language(self, guild_id: int):
+        """Сбрасывает кэш языка сервера во всех процессах бота."""
+        self._language_cache_generation += 1
+        self.language_cache.pop(guild_id, None)
+        self.security_contexts.invalidate(guild_id)
+        await self.redis.delete(f"lang:{guild_id}")
+        await self.redis.publish(LANGUAGE_INVALIDATION_CHANNEL, str(guild_id))
+
+    async def _listen_language_invalidations(self):
+        while not self.is_shutting_down:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(LANGUAGE_INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message" and str(message["data"]).isdigit():
+                        self._language_cache_generation += 1
+                        self.language_cache.pop(int(message["data"]), None)
+                        self.security_contexts.invalidate(int(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Подписка на сброс кэша языков прервана: {e}. Локальный кэш очищен, переподключение...")
+                self.language_cache.clear()
+                self.security_contexts.clear()
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def preload_guild_languages(self):
+        """Заполняет кэш языков для всех серверов одним запросом к БД."""
+        try:
+            async with self.db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("SELECT guild_id, config_value FROM guild_configs WHERE config_key = 'language'")
+                    configured = {row[0]: row[1] for row in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Не удалось предзагрузить языки серверов: {e}")
+            return
+        languages = {}
+        for guild in self.guilds:
+            lang = configured.get(guild.id) or self.default_language
+            if lang not in self.translator.strings: lang = self.hardcoded_language
+            languages[guild.id] = lang
+        self.language_cache.update(languages)
+        if languages:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for guild_id, lang in languages.items():
+                    pipe.set(f"lang:{guild_id}", lang, ex=LANGUAGE_CACHE_TTL)
+                await pipe.execute()
+        logger.info(f"Предзагружены языки для {len(languages)} серверов.")
+
     async def start_metrics_server(self):
         app = web.Application()
         app.router.add_get("/metrics", metrics_handler)
+        setup_debug_routes(app, self)
         runner = web.AppRunner(app)
         await runner.setup()
         site = web.TCPSite(runner, '0.0.0.0', 8000)
@@ -188,36 +316,43 @@ class SecurityBot(commands.Bot):
         self.discord_handler = setup_logging()
         if self.discord_handler: self.discord_handler.set_bot(self)
         logging.info("Запуск setup_hook...")
+        await self.loop_monitor.start()
+        self.dm_queue.start()
+        timeline = self.startup_timeline
         try:
-            self.db_pool = await self.db_manager.create_pool()
-            await self.db_manager.initialize_tables(self.db_pool)
-            redis_host = os.getenv("REDIS_HOST", "localhost")
-            redis_port = int(os.getenv("REDIS_PORT", 6379))
-            redis_db = int(os.getenv("REDIS_DB", 0))
-            redis_password = os.getenv("REDIS_PASSWORD") or None
-            self.redis = redis.Redis(host=redis_host, port=redis_port, db=redis_db, password=redis_password, decode_responses=True)
-            await self.redis.ping()
-            logging.getLogger('bot.info').info("✅ Успешное подключение к Redis.")
+            # MySQL и Redis не зависят друг от друга и поднимаются одновременно.
+            await timeline.parallel({'mysql': self._init_database(), 'redis': self._init_redis()})
+            self._language_listener_task = asyncio.create_task(self._listen_language_invalidations())
         except Exception as e:
             logging.critical(f"❌ Не удалось подключиться к внешним сервисам. Бот не может продолжить работу.", exc_info=True)
             await self.close()
             return
-        cogs_to_load = ['greeting', 'management', 'setup', 'telegram_setup', 'join_gate', 'anti_nuke', 'confirmation', 'help', 'backup', 'dashboard', 'status', 'moderation', 'config_events', 'warnings', 'backup_manager']
-        for cog_name in cogs_to_load:
-            try:
-                await self.load_extension(f"apps.discord_bot.cogs.{cog_name}")
-                logging.info(f"Ког '{cog_name}' успешно загружен.")
-            except Exception as e:
-                logging.error(f"Не удалось загрузить ког 'apps.discord_bot.cogs.{cog_name}'.", exc_info=True)
+        # Постоянные кнопки решений владельца: регистрируются один раз и работают после перезапуска.
+        self.add_dynamic_items(DecisionButton)
+        # Индекс читает БД и Redis, пока импортируются коги: его ждут только проверки при входе.
+        await timeline.parallel({
+            'membership_index': self.membership.rebuild(),
+            'cogs': load_cogs(self, COG_MANIFEST),
+        }, fail_fast=False)
         asyncio.create_task(self.start_metrics_server())
 
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        # Каждый вызов слушателя - отдельная трасса: длительность по слушателю и разбивка по БД/Redis/Discord.
+        owner = getattr(coro, '__self__', None)
+        name = f"{type(owner).__name__}.{coro.__name__}" if owner is not None and owner is not self else event_name
+        with tracing.trace(tracing.KIND_LISTENER, name):
+            await super()._run_event(coro, event_name, *args, **kwargs)
+
     async def on_guild_join(self, guild: discord.Guild):
         logging.getLogger('bot.info').info(f"👋 Бот был добавлен на новый сервер: **{guild.name}** (ID: {guild.id}).")
         metrics.GUILDS_COUNT.inc()
         await self._handle_new_guild(guild)
 
     async def on_guild_remove(self, guild: discord.Guild):
-        await self.redis.delete(f"lang:{guild.id}", f"antinuke_settings:{guild.id}", f"threats:{guild.id}")
+        await self.redis.delete(f"lang:{guild.id}", f"threats:{guild.id}", f"stats:{guild.id}", *self.membership.keys_for_guild(guild.id), *timeseries.keys_for_guild(guild.id))
+        self.last_stats_snapshots.pop(guild.id, None)
+        self.language_cache.pop(guild.id, None)
+        self.security_contexts.invalidate(guild.id)
         metrics.GUILDS_COUNT.dec()
         logging.getLogger('bot.info').info(f"😭 Бот был удален с сервера: **{guild.name}** (ID: {guild.id}). Очищаю данные...")
         async with self.db_pool.acquire() as conn:
@@ -225,25 +360,61 @@ class SecurityBot(commands.Bot):
                 await cursor.execute("DELETE FROM guilds WHERE guild_id = %s", (guild.id,))
                 await cursor.execute("DELETE FROM guild_configs WHERE guild_id = %s", (guild.id,))
 
+    async def _init_database(self):
+        self.db_pool = await self.db_manager.create_pool()
+        await self.db_manager.initialize_tables(self.db_pool)
+
+    async def _init_redis(self):
+        redis_host = os.getenv("REDIS_HOST", "localhost")
+        redis_port = int(os.getenv("REDIS_PORT", 6379))
+        redis_db = int(os.getenv("REDIS_DB", 0))
+        redis_password = os.getenv("REDIS_PASSWORD") or None
+        self.redis = tracing.instrument_redis(redis.Redis(host=redis_host, port=redis_port, db=redis_db, password=redis_password, decode_responses=True))
+        await self.redis.ping()
+        logging.getLogger('bot.info').info("✅ Успешное подключение к Redis.")
+
     async def sync_commands(self):
         startup_logger = logging.getLogger('bot.startup')
         try:
+            # Глобальная синхронизация ограничена Discord по частоте, поэтому без изменений команд она пропускается.
+            tree_hash = command_tree_hash(self.tree)
+            hash_key = f"{COMMAND_TREE_HASH_KEY}:{self.application_id}"
+            if not FORCE_COMMAND_SYNC and await self.redis.get(hash_key) == tree_hash:
+                startup_logger.info("Слэш-команды не изменились с прошлой синхронизации, синхронизация пропущена.")
+                return
             startup_logger.info("Начинаю синхронизацию слэш-команд...")
             synced = await self.tree.sync()
+            await self.redis.set(hash_key, tree_hash)
             startup_logger.info(f"✅ Успешно синхронизировано {len(synced)} слэш-команд(ы).")
         except Exception as e:
             startup_logger.error(f"❌ Ошибка при синхронизации слэш-команд: {e}", exc_info=True)
 
+    async def _sync_guilds_languages_and_contexts(self):
+        # Языки предзагружаются после синхронизации: новым серверам язык выставляется в sync_guilds.
+        await self.sync_guilds()
+        await self.preload_guild_languages()
+        # Контексты - последними: _build берет язык из уже заполненного language_cache, а сброс
+        # языка новых серверов в sync_guilds не отменяет предзагрузку (invalidate меняет поколение).
+        await self.security_contexts.preload(self.guilds)
+
     async def on_ready(self):
         if not self._synced_once:
-            await self.sync_commands()
-            await self.sync_guilds()
-            metrics.GUILDS_COUNT.set(len(self.guilds))
-            config_events_cog: Optional["ConfigEventsCog"] = self.get_cog("События Конфигурации")
-            if config_events_cog and hasattr(config_events_cog, "check_quarantine_roles_on_startup"):
-                await config_events_cog.check_quarantine_roles_on_startup()
-            self.update_stats_in_redis.start()
             self._synced_once = True
+            timeline = self.startup_timeline
+            await timeline.parallel({
+                'command_sync': self.sync_commands(),
+                'guilds_languages_contexts': self._sync_guilds_languages_and_contexts(),
+            }, fail_fast=False)
+            # Аудит карантинных ролей идет в фоне: уведомления владельцам уходят через очередь ЛС.
+            config_events_cog: Optional["ConfigEventsCog"] = self.get_cog("События Конфигурации")
+            if config_events_cog:
+                tracing.detached(config_events_cog.start_quarantine_role_audit)
+            # aiogram загружается в фоне сейчас, а не в момент первого оповещения посреди атаки.
+            self._telegram_warmup_task = tracing.detached(asyncio.create_task, telegram_manager.warm_up(self.db_pool))
+            metrics.GUILDS_COUNT.set(len(self.guilds))
+            # Фоновые циклы запускаются вне трассы on_ready, иначе их спаны копились бы в ней.
+            tracing.detached(self.update_stats_in_redis.start)
+            logging.getLogger('bot.startup').info(timeline.report())
         logging.getLogger('bot.startup').info(f"🚀 Бот {self.user} запущен и готов к работе!")
 
     async def _determine_and_set_language(self, guild: discord.Guild):
@@ -258,7 +429,7 @@ class SecurityBot(commands.Bot):
             async with self.db_pool.acquire() as conn:
                 async with conn.cursor() as cursor:
                     await cursor.execute("INSERT INTO guild_configs (guild_id, config_key, config_value) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE config_value = %s", (guild.id, 'language', target_lang, target_lang))
-            await self.redis.delete(f"lang:{guild.id}")
+            await self.invalidate_guild_language(guild.id)
             logger.info(f"Для сервера '{guild.name}' (ID: {guild.id}) АВТОМАТИЧЕСКИ УСТАНОВЛЕН ЯЗЫК: {target_lang.upper()}")
         except Exception as e:
             logger.error(f"Не удалось автоматически установить язык для сервера {guild.id}: {e}")
@@ -293,16 +464,12 @@ class SecurityBot(commands.Bot):
             info_logger.info(f"➖ Обнаружен удаленный сервер: ID **{guild_id}**.")
             async with self.db_pool.acquire() as conn:
                 async with conn.cursor() as cursor:
-                    await cursor.execute("DELETE FROM guilds WHERE guild_id = %s", (guild.id,))
-                    await cursor.execute("DELETE FROM guild_configs WHERE guild_id = %s", (guild.id,))
+                    await cursor.execute("DELETE FROM guilds WHERE guild_id = %s", (guild_id,))
+                    await cursor.execute("DELETE FROM guild_configs WHERE guild_id = %s", (guild_id,))
         info_logger.info("Синхронизация списка серверов завершена.")
 
-    async def global_interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.command:
-            metrics.COMMANDS_PROCESSED.labels(command_name=interaction.command.qualified_name).inc()
-        return True
-
     async def on_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        self.tree.record_error(interaction, error)
         lang = await self.get_guild_language(interaction.guild_id)
         if isinstance(error, app_commands.CheckFailure):
             if not interaction.response.is_done():
@@ -323,6 +490,11 @@ async def main():
         await bot.start(os.getenv("DISCORD_BOT_TOKEN"))
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv[1:]:
+        # Разбор цены импорта когов без подключения к Discord, БД и Redis.
+        os.chdir(project_root)
+        profile_startup(COG_MANIFEST)
+        sys.exit(0)
     try:
         os.chdir(project_root)
         asyncio.run(main())
@@ -7,16 +7,36 @@ import logging
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, project_root)
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 import redis.asyncio as redis
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import random # Для генерации фейковых данных
 
+from apps.web_api.stream import StatsStreamHub
+from core import timeseries
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Время жизни in-process кэша ответов (секунды). Бот обновляет статистику раз в 15 секунд,
+# поэтому несколько секунд кэша снимают повторные HGETALL при открытии дашборда.
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", 5))
+STATS_CACHE_MAX_ENTRIES = 4096
+BATCH_MAX_GUILDS = 100
+# Интервал комментариев-пингов в SSE, чтобы прокси не закрывали простаивающее соединение.
+STREAM_HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", 20))
+
 app = FastAPI(title="Citadel Warden API")
 
 app.add_middleware(
@@ -25,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
 redis_client = redis.Redis(
@@ -35,6 +56,16 @@ redis_client = redis.Redis(
     decode_responses=True
 )
 
+@dataclass
+class CachedStats:
+    expires_at: float
+    version: int
+    updated_at: int
+    payload: Optional[Dict[str, Any]]
+
+_stats_cache: "OrderedDict[int, CachedStats]" = OrderedDict()
+stream_hub = StatsStreamHub(redis_client)
+
 @app.on_event("startup")
 async def startup_event():
     try:
@@ -42,13 +73,13 @@ async def startup_event():
         print("Успешное подключение к Redis из FastAPI.")
     except Exception as e:
         logger.error(f"Не удалось подключиться к Redis из FastAPI: {e}")
+    stream_hub.start()
 
-@app.get("/api/guilds/{guild_id}/dashboard-stats")
-async def get_dashboard_stats(guild_id: int):
-    stats = await redis_client.hgetall(f"stats:{guild_id}")
-    if not stats:
-        raise HTTPException(status_code=404, detail="Статистика для этого сервера не найдена.")
-    
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stream_hub.stop()
+
+def build_dashboard_payload(stats: Dict[str, str]) -> Dict[str, Any]:
     # --- ИЗМЕНЕНИЕ: Формируем ответ в структуре, которую ожидает фронтенд ---
     # Добавляем заглушки для данных, которых у нас пока нет
     return {
@@ -71,4 +102,160 @@ async def get_dashboard_stats(guild_id: int):
             "totalBackups": random.randint(1, 10),
             "totalSize": f"{random.randint(50, 500)} MB"
         }
-    }
\ No newline at end of file
+    }
+
+def _prune_stats_cache():
+    """Вытесняет самые давно запрошенные серверы, пока кэш не уложится в STATS_CACHE_MAX_ENTRIES."""
+    while len(_stats_cache) > STATS_CACHE_MAX_ENTRIES:
+        _stats_cache.popitem(last=False)
+
+async def get_cached_stats(guild_ids: List[int]) -> Dict[int, CachedStats]:
+    """
+    Возвращает снимки статистики для списка серверов.
+    Свежие записи берутся из in-process кэша, остальные читаются из Redis
+    одним pipeline (один round trip вместо N запросов HGETALL).
+    """
+    now = time.monotonic()
+    result: Dict[int, CachedStats] = {}
+    missing: List[int] = []
+    for guild_id in guild_ids:
+        entry = _stats_cache.get(guild_id)
+        if entry and entry.expires_at > now:
+            _stats_cache.move_to_end(guild_id)
+            result[guild_id] = entry
+        else:
+            missing.append(guild_id)
+
+    if missing:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for guild_id in missing:
+                pipe.hgetall(f"stats:{guild_id}")
+            rows = await pipe.execute()
+
+        for guild_id, stats in zip(missing, rows):
+            entry = CachedStats(
+                expires_at=now + STATS_CACHE_TTL,
+                version=int(stats.get("version", 0)) if stats else 0,
+                updated_at=int(stats.get("updatedAt", 0)) if stats else 0,
+                payload=build_dashboard_payload(stats) if stats else None,
+            )
+            _stats_cache[guild_id] = entry
+            _stats_cache.move_to_end(guild_id)
+            result[guild_id] = entry
+        _prune_stats_cache()
+    return result
+
+def _cache_headers(etag: str, updated_at: int) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(STATS_CACHE_TTL)}"}
+    if updated_at:
+        headers["Last-Modified"] = formatdate(updated_at, usegmt=True)
+    return headers
+
+def _is_not_modified(request: Request, etag: str, updated_at: int) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and updated_at:
+        try:
+            return int(parsedate_to_datetime(if_modified_since).timestamp()) >= updated_at
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _parse_guild_ids(ids: str) -> List[int]:
+    guild_ids: List[int] = []
+    seen = set()
+    for raw_id in ids.split(","):
+        raw_id = raw_id.strip()
+        if not raw_id:
+            continue
+        try:
+            guild_id = int(raw_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Некорректный ID сервера: {raw_id}")
+        if guild_id not in seen:
+            seen.add(guild_id)
+            guild_ids.append(guild_id)
+    if not guild_ids:
+        raise HTTPException(status_code=400, detail="Не указан ни один ID сервера.")
+    if len(guild_ids) > BATCH_MAX_GUILDS:
+        raise HTTPException(status_code=400, detail=f"Можно запросить не более {BATCH_MAX_GUILDS} серверов за раз.")
+    return guild_ids
+
+@app.get("/api/guilds/stats")
+async def get_guilds_stats(request: Request, ids: str = Query(..., description="ID серверов через запятую")):
+    guild_ids = _parse_guild_ids(ids)
+    entries = await get_cached_stats(guild_ids)
+
+    version_key = ",".join(f"{guild_id}:{entries[guild_id].version}:{entries[guild_id].updated_at}" for guild_id in guild_ids)
+    etag = f'W/"batch-{hashlib.sha1(version_key.encode()).hexdigest()[:16]}"'
+    updated_at = max((entry.updated_at for entry in entries.values()), default=0)
+    headers = _cache_headers(etag, updated_at)
+
+    if _is_not_modified(request, etag, updated_at):
+        return Response(status_code=304, headers=headers)
+
+    content = {
+        "guilds": {str(guild_id): entries[guild_id].payload for guild_id in guild_ids if entries[guild_id].payload},
+        "missing": [str(guild_id) for guild_id in guild_ids if not entries[guild_id].payload],
+    }
+    return JSONResponse(content=content, headers=headers)
+
+@app.get("/api/guilds/{guild_id}/dashboard-stats")
+async def get_dashboard_stats(guild_id: int, request: Request):
+    entry = (await get_cached_stats([guild_id]))[guild_id]
+    if not entry.payload:
+        raise HTTPException(status_code=404, detail="Статистика для этого сервера не найдена.")
+
+    # version начинается заново, если stats:{guild_id} удален (сервер убран, сброс Redis),
+    # поэтому в ETag входит и updated_at: старый ETag не совпадет с новыми данными.
+    etag = f'W/"{guild_id}-{entry.version}-{entry.updated_at}"'
+    headers = _cache_headers(etag, entry.updated_at)
+    if _is_not_modified(request, etag, entry.updated_at):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=entry.payload, headers=headers)
+
+def _sse_message(event_type: str, data: str) -> str:
+    return f"event: {event_type}\ndata: {data}\n\n"
+
+@app.get("/api/guilds/{guild_id}/stream")
+async def stream_guild_stats(guild_id: int, request: Request):
+    """
+    SSE-поток live-статистики сервера: сначала полный снимок,
+    затем дельты статистики и события анти-нюка по мере их появления.
+    """
+    async def event_generator():
+        async with stream_hub.subscribe(guild_id) as queue:
+            entry = (await get_cached_stats([guild_id]))[guild_id]
+            snapshot = {"version": entry.version, "updatedAt": entry.updated_at, "data": entry.payload}
+            yield _sse_message("snapshot", json.dumps(snapshot, ensure_ascii=False))
+
+            while not await request.is_disconnected():
+                try:
+                    event_type, data = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                # Свежая дельта делает закэшированный снимок устаревшим.
+                _stats_cache.pop(guild_id, None)
+                yield _sse_message(event_type, data)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=headers)
+
+@app.get("/api/guilds/{guild_id}/history")
+async def get_guild_history(
+    guild_id: int,
+    resolution: str = Query("1m", description="Разрешение: 1m (24 часа) или 1h (30 дней)"),
+    points: int = Query(60, ge=1, description="Количество точек на графике"),
+):
+    series_resolution = timeseries.RESOLUTIONS.get(resolution)
+    if series_resolution is None:
+        raise HTTPException(status_code=400, detail=f"Неизвестное разрешение: {resolution}. Доступно: {', '.join(timeseries.RESOLUTIONS)}")
+
+    history = await timeseries.query_series(redis_client, guild_id, series_resolution, points, int(time.time()))
+    # Новый бакет появляется не чаще раза в шаг статистики бота, дольше кэшировать нет смысла.
+    headers = {"Cache-Control": f"private, max-age={min(series_resolution.step, 15)}"}
+    return JSONResponse(content=history, headers=headers)
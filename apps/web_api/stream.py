@@ -0,0 +1,87 @@
+# apps/web_api/stream.py
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+import redis.asyncio as redis
+
+from core import live_stats
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5.0
+
+class StatsStreamHub:
+    """
+    Раздает события live-статистики подключенным клиентам дашборда.
+    На весь процесс держится одна psubscribe-подписка на stats_events:*,
+    события раскладываются по очередям подписчиков конкретного сервера.
+    """
+    def __init__(self, redis_client: redis.Redis, queue_size: int = 64):
+        self.redis = redis_client
+        self.queue_size = queue_size
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self.dropped_events = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, guild_id: int) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers[guild_id].add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self.subscribers.get(guild_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.subscribers[guild_id]
+
+    def _dispatch(self, channel: str, raw: str):
+        guild_id = live_stats.guild_id_from_channel(channel)
+        queues = self.subscribers.get(guild_id)
+        if not queues:
+            return
+        # Разбираем сообщение один раз, а не в каждом клиенте.
+        event = live_stats.decode_event(raw)
+        if event is None:
+            return
+        for queue in queues:
+            if queue.full():
+                # Медленный клиент не должен тормозить остальных: выбрасываем самое старое событие.
+                queue.get_nowait()
+                self.dropped_events += 1
+            queue.put_nowait((event["type"], raw))
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(live_stats.STATS_CHANNEL_PATTERN)
+                logger.info(f"Подписка на {live_stats.STATS_CHANNEL_PATTERN} установлена.")
+                async for message in pubsub.listen():
+                    if message.get("type") == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Подписка на события статистики прервана: {e}. Переподключение через {RECONNECT_DELAY} сек.")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
@@ -0,0 +1,492 @@
+# benchmarks/antinuke_replay.py
+# -*- coding: utf-8 -*-
+"""
+Стенд воспроизведения атак для AntiNukeCog.
+
+Строит тестовые серверы, участников и каналы, подключает настоящий AntiNukeCog
+к Redis (локальному или fakeredis) и хранилищу БД в памяти и прогоняет
+через слушатели кога синтетические или записанные "штормы" событий:
+массовое удаление каналов, волну банов, спам вебхуками.
+
+Отчет по каждому сценарию: p50/p99 времени до карантина (от первого события
+нарушителя до завершения карантина), событий в секунду, команд Redis и
+запросов к БД на событие. С --baseline сравнивает результат с эталоном и
+завершается с кодом 1 при регрессии (для CI).
+
+Задержка вызовов Discord API задается --api-latency-ms. Слушатели kick и webhook
+содержат собственную паузу в 1 с, она входит во время до карантина.
+
+Режим --redis fakeredis (по умолчанию) требует пакета fakeredis, он не входит
+в зависимости бота:
+    pip install -r benchmarks/requirements.txt
+
+Запуск из корня репозитория:
+    python benchmarks/antinuke_replay.py [--redis fakeredis|local] [--scenario mass_channel_delete]
+    python benchmarks/antinuke_replay.py --write-baseline benchmarks/antinuke_baseline.json
+    python benchmarks/antinuke_replay.py --baseline benchmarks/antinuke_baseline.json [--tolerance 0.25]
+    python benchmarks/antinuke_replay.py --replay storm.jsonl
+
+Формат записанного шторма (JSON Lines):
+    {"offset": 0.015, "action": "channel_delete", "actor": 1001}
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+import discord
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from apps.discord_bot.cogs.anti_nuke import AntiNukeCog
+from core.membership_index import MembershipIndex
+from core.security_context import SecurityContextCache
+from core.translator import Translator
+
+GUILD_ID = 900000000000000001
+OWNER_ID = 1
+BOT_USER_ID = 2
+QUARANTINE_ROLE_ID = 700
+LOG_CHANNEL_ID = 800
+
+# Сценарий: (действие, число нарушителей, событий на нарушителя).
+SCENARIOS: Dict[str, Tuple[str, int, int]] = {
+    "mass_channel_delete": ("channel_delete", 3, 10),
+    "ban_wave": ("ban", 3, 15),
+    "webhook_spam": ("webhook_create", 1, 20),
+}
+
+# Событие шторма: (смещение от начала в секундах, действие, ID нарушителя).
+ReplayEvent = Tuple[float, str, int]
+
+# =========================================================================================
+# >> СЧЕТЧИКИ
+# =========================================================================================
+@dataclass
+class Counters:
+    redis_ops: int = 0
+    db_queries: int = 0
+
+    def reset(self):
+        self.redis_ops = 0
+        self.db_queries = 0
+
+def instrument_redis(client, counters: Counters):
+    """Считает команды Redis, включая команды внутри pipeline."""
+    original_execute_command = client.execute_command
+    original_pipeline = client.pipeline
+
+    async def execute_command(*args, **kwargs):
+        counters.redis_ops += 1
+        return await original_execute_command(*args, **kwargs)
+
+    def pipeline(*args, **kwargs):
+        pipe = original_pipeline(*args, **kwargs)
+        original_execute = pipe.execute
+
+        async def execute(*execute_args, **execute_kwargs):
+            counters.redis_ops += len(pipe.command_stack)
+            return await original_execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = execute
+        return pipe
+
+    client.execute_command = execute_command
+    client.pipeline = pipeline
+    return client
+
+# =========================================================================================
+# >> ХРАНИЛИЩЕ БД В ПАМЯТИ
+# =========================================================================================
+class MemoryCursor:
+    def __init__(self, db: "MemoryDatabase"):
+        self.db = db
+        self.rowcount = 0
+        self._rows: List[tuple] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query: str, params: Optional[tuple] = None):
+        self.db.counters.db_queries += 1
+        self._rows = []
+        self.rowcount = 0
+        if "FROM guild_configs" in query and params:
+            self._rows = [
+                (guild_id, key, value)
+                for guild_id, config in self.db.configs.items() if guild_id in params
+                for key, value in config.items()
+            ]
+        elif query.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            self.rowcount = 1
+
+    async def executemany(self, query: str, rows: List[tuple]):
+        self.db.counters.db_queries += 1
+        self.rowcount = len(rows)
+
+    async def fetchall(self):
+        return self._rows
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+class MemoryConnection:
+    def __init__(self, db: "MemoryDatabase"):
+        self.db = db
+
+    def cursor(self):
+        return MemoryCursor(self.db)
+
+class MemoryDatabase:
+    """Заменяет aiomysql-пул: хранит guild_configs в словаре и считает запросы."""
+    def __init__(self, counters: Counters, configs: Dict[int, Dict[str, str]]):
+        self.counters = counters
+        self.configs = configs
+
+    def acquire(self):
+        db = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return MemoryConnection(db)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+# =========================================================================================
+# >> ТЕСТОВЫЕ ОБЪЕКТЫ DISCORD
+# =========================================================================================
+async def api_call(latency: float):
+    await asyncio.sleep(latency)
+
+class FakeRole:
+    def __init__(self, role_id: int, guild: "FakeGuild"):
+        self.id = role_id
+        self.guild = guild
+        self.mention = f"<@&{role_id}>"
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: "FakeGuild"):
+        self.id = channel_id
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        await api_call(self.guild.api_latency)
+        self.sent += 1
+
+class FakeMember(discord.Member):
+    """
+    Наследник discord.Member, чтобы проходить проверки isinstance в коге.
+    Все используемые атрибуты переопределены, состояние discord.py не нужно.
+    """
+    def __init__(self, member_id: int, guild: "FakeGuild", roles: List[FakeRole]):
+        self._fake_id = member_id
+        self._fake_guild = guild
+        self._fake_roles = roles
+
+    id = property(lambda self: self._fake_id)
+    guild = property(lambda self: self._fake_guild)
+    roles = property(lambda self: self._fake_roles)
+    bot = property(lambda self: False)
+    mention = property(lambda self: f"<@{self._fake_id}>")
+
+    def __str__(self):
+        return f"attacker-{self._fake_id}"
+
+    def __repr__(self):
+        return f"<FakeMember id={self._fake_id}>"
+
+    def __hash__(self):
+        return hash(self._fake_id)
+
+    async def edit(self, *, roles=None, reason=None, **kwargs):
+        await api_call(self._fake_guild.api_latency)
+        if roles is not None:
+            self._fake_roles = list(roles)
+
+    async def send(self, *args, **kwargs):
+        await api_call(self._fake_guild.api_latency)
+
+class FakeGuild:
+    def __init__(self, guild_id: int, api_latency: float):
+        self.id = guild_id
+        self.name = f"replay-{guild_id}"
+        self.owner_id = OWNER_ID
+        self.api_latency = api_latency
+        self.default_role = FakeRole(guild_id, self)
+        self.roles = {QUARANTINE_ROLE_ID: FakeRole(QUARANTINE_ROLE_ID, self), 701: FakeRole(701, self)}
+        self.channels = {LOG_CHANNEL_ID: FakeChannel(LOG_CHANNEL_ID, self)}
+        self.members: Dict[int, FakeMember] = {}
+        self.owner = FakeMember(OWNER_ID, self, [])
+        # Журнал аудита: самая новая запись первой, как отдает Discord.
+        self.audit_log: Dict[discord.AuditLogAction, List[SimpleNamespace]] = {}
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self.roles.get(role_id)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    def member(self, member_id: int) -> FakeMember:
+        if member_id not in self.members:
+            self.members[member_id] = FakeMember(member_id, self, [self.default_role, self.roles[701]])
+        return self.members[member_id]
+
+    def add_audit_entry(self, action: discord.AuditLogAction, user: FakeMember, target: Any):
+        self.audit_log.setdefault(action, []).insert(0, SimpleNamespace(user=user, target=target, created_at=discord.utils.utcnow()))
+
+    async def audit_logs(self, limit: int = 100, action: Optional[discord.AuditLogAction] = None):
+        await api_call(self.api_latency)
+        for entry in self.audit_log.get(action, [])[:limit]:
+            yield entry
+
+    async def ban(self, user, reason=None):
+        await api_call(self.api_latency)
+
+class ReplayBot:
+    """Минимальный SecurityBot: только то, что использует AntiNukeCog и его сервисы."""
+    def __init__(self, redis_client, db: MemoryDatabase, guild: FakeGuild):
+        self.user = SimpleNamespace(id=BOT_USER_ID)
+        self.redis = redis_client
+        self.db_pool = db
+        self.translator = Translator()
+        self.guild = guild
+        self.security_contexts = SecurityContextCache(self)
+        self.membership = MembershipIndex(self)
+
+    async def get_guild_language(self, guild_id: int | None) -> str:
+        return "en"
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self.guild if guild_id == self.guild.id else None
+
+    async def wait_until_ready(self):
+        return None
+
+# =========================================================================================
+# >> ВОСПРОИЗВЕДЕНИЕ
+# =========================================================================================
+def synthetic_storm(action: str, attackers: int, events_per_attacker: int, interval: float) -> List[ReplayEvent]:
+    """Нарушители действуют одновременно: события чередуются по кругу."""
+    events = []
+    for i in range(events_per_attacker * attackers):
+        events.append((i * interval, action, 1000 + i % attackers))
+    return events
+
+def load_storm(path: str) -> List[ReplayEvent]:
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                events.append((float(record['offset']), record['action'], int(record['actor'])))
+    return sorted(events)
+
+def dispatch(cog: AntiNukeCog, guild: FakeGuild, action: str, actor: FakeMember, seq: int):
+    """Создает запись аудита и вызывает слушатель кога так же, как это делает discord.py."""
+    audit = discord.AuditLogAction
+    if action == "channel_delete":
+        channel = FakeChannel(10_000 + seq, guild)
+        guild.add_audit_entry(audit.channel_delete, actor, channel)
+        return cog.on_guild_channel_delete(channel)
+    if action == "channel_create":
+        channel = FakeChannel(10_000 + seq, guild)
+        guild.add_audit_entry(audit.channel_create, actor, channel)
+        return cog.on_guild_channel_create(channel)
+    if action == "role_create":
+        role = FakeRole(20_000 + seq, guild)
+        guild.add_audit_entry(audit.role_create, actor, role)
+        return cog.on_guild_role_create(role)
+    if action == "ban":
+        victim = guild.member(50_000 + seq)
+        guild.add_audit_entry(audit.ban, actor, victim)
+        return cog.on_member_ban(guild, victim)
+    if action == "kick":
+        victim = guild.member(50_000 + seq)
+        guild.add_audit_entry(audit.kick, actor, victim)
+        return cog.on_member_remove(victim)
+    if action == "webhook_create":
+        # Спам вебхуками обычно идет в один канал нарушителя.
+        channel = guild.channels.setdefault(30_000 + actor.id, FakeChannel(30_000 + actor.id, guild))
+        guild.add_audit_entry(audit.webhook_create, actor, SimpleNamespace(id=40_000 + seq, channel_id=channel.id))
+        return cog.on_webhooks_update(channel)
+    raise ValueError(f"Неизвестное действие: {action}")
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float('nan')
+    # Метод ближайшего ранга.
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+async def run_scenario(redis_client, counters: Counters, events: List[ReplayEvent], engine: str, api_latency: float) -> Dict[str, Any]:
+    await redis_client.flushdb()
+    guild = FakeGuild(GUILD_ID, api_latency)
+    db = MemoryDatabase(counters, {GUILD_ID: {
+        'quarantine_role_id': str(QUARANTINE_ROLE_ID),
+        'log_channel_id': str(LOG_CHANNEL_ID),
+        'antinuke_engine': engine,
+    }})
+    bot = ReplayBot(redis_client, db, guild)
+    cog = AntiNukeCog(bot)
+
+    first_event: Dict[int, float] = {}
+    quarantined_at: Dict[int, float] = {}
+    original_trigger = cog._trigger_quarantine_procedure
+
+    async def timed_trigger(member, score, threshold, reason):
+        await original_trigger(member, score, threshold, reason)
+        quarantined_at.setdefault(member.id, time.perf_counter())
+
+    cog._trigger_quarantine_procedure = timed_trigger
+
+    # Контекст собирается при запуске бота (on_ready), а не во время атаки.
+    await bot.security_contexts.preload([guild])
+    counters.reset()
+
+    tasks = []
+    started = time.perf_counter()
+    try:
+        for seq, (offset, action, actor_id) in enumerate(events):
+            delay = started + offset - time.perf_counter()
+            await asyncio.sleep(max(0.0, delay))
+            actor = guild.member(actor_id)
+            first_event.setdefault(actor_id, time.perf_counter())
+            tasks.append(asyncio.create_task(dispatch(cog, guild, action, actor, seq)))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        cog.cog_unload()
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for error in errors[:3]:
+        logging.getLogger(__name__).error(f"Ошибка в слушателе: {error!r}")
+
+    latencies = [(quarantined_at[user_id] - first_event[user_id]) * 1000 for user_id in quarantined_at]
+    total = len(events)
+    return {
+        'events': total,
+        'attackers': len(first_event),
+        'quarantined': len(quarantined_at),
+        'errors': len(errors),
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'events_per_sec': total / elapsed if elapsed else float('inf'),
+        'redis_ops_per_event': counters.redis_ops / total,
+        'db_queries_per_event': counters.db_queries / total,
+    }
+
+def find_regressions(name: str, result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    problems = []
+    if result['quarantined'] < result['attackers']:
+        problems.append(f"{name}: изолировано {result['quarantined']} из {result['attackers']} нарушителей")
+    if result['errors']:
+        problems.append(f"{name}: ошибок в слушателях: {result['errors']}")
+    if not baseline:
+        return problems
+    # Для этих метрик меньше - лучше.
+    for metric in ('p50_ms', 'p99_ms', 'redis_ops_per_event', 'db_queries_per_event'):
+        if metric in baseline and result[metric] > baseline[metric] * (1 + tolerance):
+            problems.append(f"{name}: {metric} = {result[metric]:.2f}, эталон {baseline[metric]:.2f}")
+    if 'events_per_sec' in baseline and result['events_per_sec'] < baseline['events_per_sec'] / (1 + tolerance):
+        problems.append(f"{name}: events_per_sec = {result['events_per_sec']:.0f}, эталон {baseline['events_per_sec']:.0f}")
+    return problems
+
+async def create_redis(kind: str):
+    if kind == "fakeredis":
+        from fakeredis import aioredis as fake_aioredis
+        return fake_aioredis.FakeRedis(decode_responses=True)
+    import redis.asyncio as redis
+    return redis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"), port=int(os.getenv("REDIS_PORT", 6379)),
+        db=int(os.getenv("REPLAY_REDIS_DB", 15)), password=os.getenv("REDIS_PASSWORD") or None, decode_responses=True
+    )
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis", choices=("fakeredis", "local"), default="fakeredis",
+                        help="local - Redis из REDIS_* (база REPLAY_REDIS_DB, по умолчанию 15, очищается!)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Сценарий (можно несколько). По умолчанию - все")
+    parser.add_argument("--replay", help="Файл JSON Lines с записанным штормом вместо синтетических сценариев")
+    parser.add_argument("--engine", choices=("score", "window"), default="score", help="Движок обнаружения анти-нюка")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="Интервал между событиями синтетического шторма")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Имитация задержки Discord API на вызов")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов на сценарий (берется лучший по p99)")
+    parser.add_argument("--baseline", help="JSON с эталонными метриками: при регрессии код выхода 1")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустимое ухудшение относительно эталона")
+    parser.add_argument("--write-baseline", help="Сохранить результаты как эталон")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    counters = Counters()
+    redis_client = instrument_redis(await create_redis(args.redis), counters)
+
+    if args.replay:
+        storms = {os.path.basename(args.replay): load_storm(args.replay)}
+    else:
+        storms = {
+            name: synthetic_storm(*SCENARIOS[name], interval=args.interval_ms / 1000)
+            for name in (args.scenario or SCENARIOS)
+        }
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    problems: List[str] = []
+    try:
+        for name, events in storms.items():
+            runs = [await run_scenario(redis_client, counters, events, args.engine, args.api_latency_ms / 1000) for _ in range(args.repeat)]
+            result = min(runs, key=lambda run: run['p99_ms'] if run['quarantined'] else float('inf'))
+            results[name] = result
+            print(
+                f"{name:<22} событий {result['events']:>4}  изолировано {result['quarantined']}/{result['attackers']}  "
+                f"p50 {result['p50_ms']:8.1f} мс  p99 {result['p99_ms']:8.1f} мс  "
+                f"{result['events_per_sec']:8.0f} соб/с  Redis {result['redis_ops_per_event']:5.2f}/соб  "
+                f"БД {result['db_queries_per_event']:5.2f}/соб"
+            )
+            problems.extend(find_regressions(name, result, baseline.get(name, {}), args.tolerance))
+    finally:
+        await redis_client.flushdb()
+        await redis_client.aclose()
+
+    if args.write_baseline:
+        with open(args.write_baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                name: {metric: round(result[metric], 3) for metric in ('p50_ms', 'p99_ms', 'events_per_sec', 'redis_ops_per_event', 'db_queries_per_event')}
+                for name, result in results.items()
+            }, f, indent=2)
+        print(f"Эталон сохранен в {args.write_baseline}")
+
+    if problems:
+        print("\nРЕГРЕССИЯ:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,91 @@
+# benchmarks/bench_translator.py
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк Translator.get: сравнивает прежний поиск по вложенным словарям
+(split + обход + str.format на каждый вызов) с плоскими таблицами.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_translator.py [--number 200000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from core.translator import Translator
+
+# Набор ключей, похожий на реальную нагрузку: приветствие + типичные команды.
+KEYS = [
+    ("welcome.embed_title", {"bot_name": "Citadel"}),
+    ("welcome.field_roles_title", {}),
+    ("welcome.field_setup_value", {}),
+    ("welcome.footer_text", {}),
+    ("ui.button_approve", {}),
+    ("ui.pagination_page_indicator", {"current": 1, "total": 5}),
+    ("system.db_error", {}),
+    ("moderation.warns_list.title", {"member_name": "user"}),
+]
+
+def legacy_get(strings, default_lang, key, lang, **kwargs):
+    """Копия прежней реализации Translator.get (без логирования) для сравнения."""
+    def _find_key(data_dict, key_path):
+        current_level = data_dict
+        for k in key_path.split('.'):
+            if not isinstance(current_level, dict) or k not in current_level:
+                raise KeyError(key_path)
+            current_level = current_level[k]
+        return current_level
+
+    lang = lang.lower()
+    try:
+        template = _find_key(strings.get(lang, {}), key)
+    except KeyError:
+        try:
+            template = _find_key(strings[default_lang], key)
+        except KeyError:
+            return f"MISSING_TRANSLATION_FOR_{key.upper()}"
+    if isinstance(template, dict):
+        return template
+    try:
+        return template.format(**kwargs)
+    except Exception:
+        return f"FORMATTING_ERROR_FOR_{key.upper()}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200000, help="Количество вызовов на каждый вариант")
+    parser.add_argument("--lang", default="ru")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    translator = Translator()
+    keys = KEYS * (args.number // len(KEYS))
+
+    for key, kwargs in KEYS:
+        assert legacy_get(translator.strings, translator.default_lang, key, args.lang, **kwargs) == translator.get(key, args.lang, **kwargs), key
+
+    def run_legacy():
+        for key, kwargs in keys:
+            legacy_get(translator.strings, translator.default_lang, key, args.lang, **kwargs)
+
+    def run_flat():
+        get = translator.get
+        for key, kwargs in keys:
+            get(key, args.lang, **kwargs)
+
+    legacy = min(timeit.repeat(run_legacy, number=1, repeat=5))
+    flat = min(timeit.repeat(run_flat, number=1, repeat=5))
+    calls = len(keys)
+    print(f"Вызовов: {calls}")
+    print(f"Прежний поиск:   {legacy:.3f} с ({legacy / calls * 1e9:.0f} нс/вызов)")
+    print(f"Плоские таблицы: {flat:.3f} с ({flat / calls * 1e9:.0f} нс/вызов)")
+    print(f"Ускорение: x{legacy / flat:.2f}")
+
+if __name__ == "__main__":
+    main()
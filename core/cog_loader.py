@@ -0,0 +1,121 @@
+# core/cog_loader.py
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import time
+import logging
+import subprocess
+from graphlib import TopologicalSorter, CycleError
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+from core import metrics
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+COGS_PACKAGE = "apps.discord_bot.cogs"
+# Модули, которые импортирует сам бот: их стоимость не относится ни к одному когу.
+PROFILE_BASELINE_MODULES = ("discord", "discord.ext.commands", "discord.app_commands", "aiohttp", "redis.asyncio", "core.translator")
+PROFILE_MARKER = "--- cog ---"
+PROFILE_TOP_IMPORTS = 8
+# Пути импорта как у запущенного бота: каталог main.py (коги импортируют "main") и корень проекта.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_DIR = os.path.join(PROJECT_ROOT, "apps", "discord_bot")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def load_order(manifest: Dict[str, Tuple[str, ...]]) -> List[str]:
+    """Порядок загрузки когов: каждый ког идет после своих зависимостей, иначе - в порядке манифеста."""
+    unknown = {dep for deps in manifest.values() for dep in deps if dep not in manifest}
+    if unknown:
+        raise ValueError(f"В манифесте когов указаны неизвестные зависимости: {', '.join(sorted(unknown))}")
+    sorter = TopologicalSorter(manifest)
+    try:
+        sorter.prepare()
+    except CycleError as e:
+        raise ValueError(f"Циклическая зависимость когов: {' -> '.join(e.args[1])}")
+    position = {name: index for index, name in enumerate(manifest)}
+    order = []
+    while sorter.is_active():
+        ready = sorted(sorter.get_ready(), key=position.__getitem__)
+        order.extend(ready)
+        sorter.done(*ready)
+    return order
+
+async def load_cogs(bot: "SecurityBot", manifest: Dict[str, Tuple[str, ...]]) -> Dict[str, float]:
+    """
+    Загружает коги в порядке зависимостей. Ког, чья зависимость не загрузилась, пропускается.
+    Время загрузки и число новых модулей (цена импортов) пишутся в лог и в метрики.
+    """
+    timings: Dict[str, float] = {}
+    failed = set()
+    for name in load_order(manifest):
+        missing = [dep for dep in manifest[name] if dep in failed]
+        if missing:
+            failed.add(name)
+            logging.error(f"Ког '{name}' не загружен: не загрузились зависимости {', '.join(missing)}.")
+            continue
+        modules_before = len(sys.modules)
+        started = time.perf_counter()
+        try:
+            await bot.load_extension(f"{COGS_PACKAGE}.{name}")
+        except Exception:
+            failed.add(name)
+            logging.error(f"Не удалось загрузить ког '{COGS_PACKAGE}.{name}'.", exc_info=True)
+            continue
+        elapsed = time.perf_counter() - started
+        new_modules = len(sys.modules) - modules_before
+        timings[name] = elapsed
+        metrics.COG_LOAD_SECONDS.labels(cog=name).set(elapsed)
+        metrics.COG_IMPORTED_MODULES.labels(cog=name).set(new_modules)
+        logging.info(f"Ког '{name}' успешно загружен за {elapsed * 1000:.1f} мс (новых модулей: {new_modules}).")
+
+    total = sum(timings.values())
+    slowest = ", ".join(f"{name} {seconds * 1000:.0f} мс" for name, seconds in sorted(timings.items(), key=lambda item: -item[1])[:3])
+    logger.info(f"Загружено когов: {len(timings)}/{len(manifest)} за {total:.2f} с. Самые медленные: {slowest}.")
+    return timings
+
+def _cog_import_profile(name: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    Импортирует ког в отдельном процессе с -X importtime после базовых модулей бота.
+    Возвращает (собственная цена импорта в секундах, самые тяжелые вложенные импорты).
+    """
+    module = f"{COGS_PACKAGE}.{name}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys, {', '.join(PROFILE_BASELINE_MODULES)}\nsys.stderr.write({PROFILE_MARKER!r} + '\\n')\nimport {module}"],
+        capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, (BOT_DIR, PROJECT_ROOT, os.environ.get("PYTHONPATH"))))},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"код {result.returncode}")
+    # Базовые модули импортируются до маркера и в разбор не попадают.
+    cog_output = result.stderr.split(PROFILE_MARKER, 1)[-1]
+    entries = [match for match in map(_IMPORTTIME_RE.match, cog_output.splitlines()) if match]
+    total = next((int(match[2]) for match in entries if match[4] == module), 0) / 1e6
+    # Верхний уровень вложенности под когом - прямые импорты, сгруппированные по пакету.
+    top = sorted(
+        ((int(match[2]) / 1e6, match[4]) for match in entries if match[4] != module and len(match[3]) == 3),
+        reverse=True,
+    )[:PROFILE_TOP_IMPORTS]
+    return total, top
+
+def profile_startup(manifest: Dict[str, Tuple[str, ...]]):
+    """Режим --profile-startup: печатает цену импорта каждого кога и его самых тяжелых зависимостей."""
+    print(f"Цена импорта когов (поверх: {', '.join(PROFILE_BASELINE_MODULES)}):\n")
+    results = []
+    for name in load_order(manifest):
+        try:
+            total, top = _cog_import_profile(name)
+        except Exception as e:
+            print(f"{name:<16} ошибка импорта: {e}")
+            continue
+        results.append((total, name))
+        print(f"{name:<16} {total * 1000:8.1f} мс")
+        for seconds, module in top:
+            print(f"    {seconds * 1000:8.1f} мс  {module}")
+    print(f"\nИтого: {sum(total for total, _ in results) * 1000:.1f} мс на {len(results)} когов.")
@@ -0,0 +1,90 @@
+# core/command_tree.py
+# -*- coding: utf-8 -*-
+
+import logging
+from typing import Optional, Tuple
+import discord
+from discord import app_commands
+
+from core import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+# Discord ждет ответа (defer или сообщения) на взаимодействие не дольше 3 секунд.
+ACK_DEADLINE = 3.0
+# Код ошибки Discord "Unknown interaction": ответ пришел после истечения окна.
+UNKNOWN_INTERACTION_CODE = 10062
+# Ключ в interaction.extras, под которым обработчик ошибок оставляет ошибку команды.
+ERROR_EXTRAS_KEY = "citadel_command_error"
+
+def classify_error(error: Exception) -> Tuple[str, str]:
+    """Возвращает (outcome, code) для метрик: класс ошибки или код Discord API."""
+    if isinstance(error, app_commands.CheckFailure):
+        return "check_failure", type(error).__name__
+    if isinstance(error, app_commands.CommandInvokeError):
+        error = error.original
+    if isinstance(error, discord.HTTPException) and error.code:
+        return "error", f"http_{error.code}"
+    return "error", type(error).__name__
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """
+    Дерево команд с метриками: каждая слэш-команда выполняется как трасса (длительность -
+    в citadel_operation_duration_seconds{kind="command"}), итог пишется по коду ошибки,
+    время первого ответа - по типу ответа, пропущенные 3 секунды - отдельным счетчиком.
+    """
+    def record_error(self, interaction: discord.Interaction, error: Exception):
+        """Вызывается из обработчика ошибок дерева, чтобы итог команды получил код ошибки."""
+        interaction.extras[ERROR_EXTRAS_KEY] = error
+
+    async def _call(self, interaction: discord.Interaction):
+        command = interaction.command
+        name = command.qualified_name if command else (interaction.data or {}).get('name', 'unknown')
+        if interaction.type == discord.InteractionType.autocomplete:
+            with tracing.trace(tracing.KIND_COMMAND, f"{name}:autocomplete"):
+                await super()._call(interaction)
+            return
+
+        outcome, code = "success", "ok"
+        span: Optional[tracing.Span] = None
+        try:
+            with tracing.trace(tracing.KIND_COMMAND, name) as span:
+                await super()._call(interaction)
+        except app_commands.AppCommandError as e:
+            # Ошибки до запуска команды (например, CommandNotFound) уходят в on_error выше по стеку.
+            outcome, code = classify_error(e)
+            raise
+        finally:
+            if outcome == "success" and interaction.command_failed:
+                error = interaction.extras.get(ERROR_EXTRAS_KEY)
+                # Без ошибки команда могла быть отклонена только interaction_check.
+                outcome, code = classify_error(error) if error else ("check_failure", "interaction_check")
+            name = interaction.command.qualified_name if interaction.command else name
+            metrics.COMMANDS_PROCESSED.labels(command_name=name).inc()
+            metrics.COMMAND_RESULTS.labels(command_name=name, outcome=outcome, code=code).inc()
+            self._record_first_response(interaction, name, span, code)
+
+    def _record_first_response(self, interaction: discord.Interaction, name: str, span: Optional[tracing.Span], code: str):
+        """
+        Время первого ответа берется из спана запроса .../callback (см. tracing.create_http_trace_config)
+        и отсчитывается от создания взаимодействия на стороне Discord, как и окно в 3 секунды.
+        """
+        response_type = interaction.response.type
+        callbacks = [
+            s for s in (span.finished if span else [])
+            if s.kind == tracing.KIND_DISCORD and s.name.endswith("/callback")
+        ]
+        missed = code == f"http_{UNKNOWN_INTERACTION_CODE}"
+        if callbacks:
+            answered_at = min(s.started_wall + s.duration for s in callbacks)
+            latency = max(0.0, answered_at - interaction.created_at.timestamp())
+            metrics.COMMAND_FIRST_RESPONSE.labels(
+                command_name=name, response_type=response_type.name if response_type else "unknown"
+            ).observe(latency)
+            missed = missed or latency > ACK_DEADLINE
+        elif response_type is None:
+            # Команда завершилась, так и не ответив: пользователь увидит "Приложение не отвечает".
+            missed = True
+        if missed:
+            metrics.COMMAND_ACK_MISSED.labels(command_name=name).inc()
+            logger.warning(f"Команда /{name} не ответила на взаимодействие за {ACK_DEADLINE:.0f} с. Стоит добавить defer().")
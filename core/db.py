@@ -5,6 +5,8 @@ import os
 import logging
 import aiomysql
 
+from core.tracing import TracedCursor
+
 logger = logging.getLogger(__name__)
 
 class Database:
@@ -25,7 +27,9 @@ class Database:
                 user=self.db_user, 
                 password=self.db_password, 
                 db=self.db_name, 
-                autocommit=True
+                autocommit=True,
+                # Каждый запрос становится спаном 'db' в трассе текущего слушателя или команды.
+                cursorclass=TracedCursor
             )
             logger.info("Пул соединений с MySQL успешно создан.")
             return pool
@@ -33,6 +37,13 @@ class Database:
             logger.error(f"Не удалось создать пул соединений с MySQL: {e}")
             raise
 
+    async def _ensure_index(self, cursor: aiomysql.Cursor, table: str, index_name: str, columns: str):
+        """Создает индекс на уже существующей таблице, если его еще нет."""
+        await cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (index_name,))
+        if not await cursor.fetchone():
+            logger.info(f"Создаю индекс '{index_name}' для таблицы '{table}'...")
+            await cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+
     async def initialize_tables(self, pool: aiomysql.Pool):
         """
         Проверяет наличие всех необходимых таблиц при запуске бота
@@ -41,10 +52,12 @@ class Database:
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 logger.info("Проверка и создание таблиц в базе данных...")
+                # Один запрос на список таблиц вместо SHOW TABLES LIKE для каждой.
+                await cursor.execute("SHOW TABLES")
+                existing_tables = {row[0] for row in await cursor.fetchall()}
                 
                 # Таблица 'allowed_bots'
-                await cursor.execute("SHOW TABLES LIKE 'allowed_bots'")
-                if not await cursor.fetchone():
+                if 'allowed_bots' not in existing_tables:
                     logger.info("Таблица 'allowed_bots' не найдена, создаю новую...")
                     await cursor.execute("""
                         CREATE TABLE allowed_bots (
@@ -56,8 +69,7 @@ class Database:
                     logger.info("Таблица 'allowed_bots' успешно создана.")
                 
                 # Таблица 'guilds'
-                await cursor.execute("SHOW TABLES LIKE 'guilds'")
-                if not await cursor.fetchone():
+                if 'guilds' not in existing_tables:
                     logger.info("Таблица 'guilds' не найдена, создаю новую...")
                     await cursor.execute("""
                         CREATE TABLE guilds (
@@ -69,8 +81,7 @@ class Database:
                     logger.info("Таблица 'guilds' успешно создана.")
 
                 # Таблица 'guild_configs'
-                await cursor.execute("SHOW TABLES LIKE 'guild_configs'")
-                if not await cursor.fetchone():
+                if 'guild_configs' not in existing_tables:
                     logger.info("Таблица 'guild_configs' не найдена, создаю новую...")
                     await cursor.execute("""
                         CREATE TABLE guild_configs (
@@ -84,8 +95,7 @@ class Database:
 
                 # --- ИСПРАВЛЕНИЕ ЗДЕСЬ ---
                 # Таблица 'quarantined_users'
-                await cursor.execute("SHOW TABLES LIKE 'quarantined_users'")
-                if not await cursor.fetchone():
+                if 'quarantined_users' not in existing_tables:
                     logger.info("Таблица 'quarantined_users' не найдена, создаю новую...")
                     await cursor.execute("""
                         CREATE TABLE quarantined_users (
@@ -96,14 +106,16 @@ class Database:
                             reason TEXT,
                             status VARCHAR(20) DEFAULT 'active',
                             quarantined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            UNIQUE KEY (user_id, guild_id)
+                            UNIQUE KEY (user_id, guild_id),
+                            INDEX idx_quarantined_guild_status (guild_id, status)
                         )
                     """)
                     logger.info("Таблица 'quarantined_users' успешно создана.")
+                else:
+                    await self._ensure_index(cursor, 'quarantined_users', 'idx_quarantined_guild_status', 'guild_id, status')
                     
                 # Таблица 'action_permissions'
-                await cursor.execute("SHOW TABLES LIKE 'action_permissions'")
-                if not await cursor.fetchone():
+                if 'action_permissions' not in existing_tables:
                     logger.info("Таблица 'action_permissions' не найдена, создаю новую...")
                     await cursor.execute("""
                         CREATE TABLE action_permissions (
@@ -112,14 +124,16 @@ class Database:
                             user_id BIGINT NOT NULL,
                             action_type VARCHAR(50) NOT NULL,
                             expires_at TIMESTAMP NOT NULL,
-                            is_used BOOLEAN DEFAULT FALSE
+                            is_used BOOLEAN DEFAULT FALSE,
+                            INDEX idx_action_permissions_expires (expires_at)
                         )
                     """)
                     logger.info("Таблица 'action_permissions' успешно создана.")
+                else:
+                    await self._ensure_index(cursor, 'action_permissions', 'idx_action_permissions_expires', 'expires_at')
 
                 # Таблица 'backups'
-                await cursor.execute("SHOW TABLES LIKE 'backups'")
-                if not await cursor.fetchone():
+                if 'backups' not in existing_tables:
                     logger.info("Таблица 'backups' не найдена, создаю новую...")
                     await cursor.execute("""
                         CREATE TABLE backups (
@@ -136,8 +150,7 @@ class Database:
                     logger.info("Таблица 'backups' успешно создана.")
 
                 # Таблица 'mutes' (заменяет active_mutes)
-                await cursor.execute("SHOW TABLES LIKE 'mutes'")
-                if not await cursor.fetchone():
+                if 'mutes' not in existing_tables:
                     logger.info("Таблица 'mutes' не найдена, создаю...")
                     await cursor.execute("""
                         CREATE TABLE mutes (
@@ -148,14 +161,16 @@ class Database:
                             reason TEXT,
                             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                             end_timestamp TIMESTAMP,
-                            status VARCHAR(20) DEFAULT 'active'
+                            status VARCHAR(20) DEFAULT 'active',
+                            INDEX idx_mutes_guild_status (guild_id, status)
                         )
                     """)
                     logger.info("Таблица 'mutes' успешно создана.")
+                else:
+                    await self._ensure_index(cursor, 'mutes', 'idx_mutes_guild_status', 'guild_id, status')
 
                 # Таблица 'warnings'
-                await cursor.execute("SHOW TABLES LIKE 'warnings'")
-                if not await cursor.fetchone():
+                if 'warnings' not in existing_tables:
                     logger.info("Таблица 'warnings' не найдена, создаю новую...")
                     await cursor.execute("""
                         CREATE TABLE warnings (
@@ -166,9 +181,33 @@ class Database:
                             reason TEXT,
                             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                             status VARCHAR(10) NOT NULL DEFAULT 'active',
-                            punishment_id INT NULL DEFAULT NULL
+                            punishment_id INT NULL DEFAULT NULL,
+                            INDEX idx_warnings_status_created (status, created_at),
+                            INDEX idx_warnings_guild_user (guild_id, user_id, created_at)
                         )
                     """)
                     logger.info("Таблица 'warnings' успешно создана.")
+                else:
+                    # Индексы для движка сгорания предупреждений на уже существующих установках.
+                    await self._ensure_index(cursor, 'warnings', 'idx_warnings_status_created', 'status, created_at')
+                    await self._ensure_index(cursor, 'warnings', 'idx_warnings_guild_user', 'guild_id, user_id, created_at')
+
+                # Таблица 'warning_counters' (счетчик активных предупреждений пользователя)
+                if 'warning_counters' not in existing_tables:
+                    logger.info("Таблица 'warning_counters' не найдена, создаю новую...")
+                    await cursor.execute("""
+                        CREATE TABLE warning_counters (
+                            guild_id BIGINT NOT NULL,
+                            user_id BIGINT NOT NULL,
+                            active_count INT NOT NULL DEFAULT 0,
+                            PRIMARY KEY (guild_id, user_id)
+                        )
+                    """)
+                    await cursor.execute("""
+                        INSERT INTO warning_counters (guild_id, user_id, active_count)
+                        SELECT guild_id, user_id, COUNT(*) FROM warnings
+                        WHERE status = 'active' GROUP BY guild_id, user_id
+                    """)
+                    logger.info(f"Таблица 'warning_counters' успешно создана, перенесено записей: {cursor.rowcount}.")
 
                 logger.info("Проверка таблиц завершена.")
\ No newline at end of file
@@ -0,0 +1,221 @@
+# core/debug_endpoints.py
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import hmac
+import json
+import time
+import marshal
+import asyncio
+import cProfile
+import logging
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional, TYPE_CHECKING
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+# Секрет владельца для /debug/*. Без него отладочные эндпоинты не регистрируются.
+DEBUG_ENDPOINTS_TOKEN = os.getenv("DEBUG_ENDPOINTS_TOKEN", "")
+# Ограничение длительности профилирования и частота сэмплирования стека.
+PROFILE_MAX_SECONDS = 60
+PROFILE_SAMPLE_INTERVAL = 0.005
+# Глубина стеков в снимках tracemalloc и в /debug/tasks.
+TRACEMALLOC_FRAMES = 10
+TASK_STACK_LIMIT = 10
+
+_json_dumps = functools.partial(json.dumps, ensure_ascii=False, indent=2, default=str)
+# Одновременно возможен только один профиль: cProfile и сэмплер мешают друг другу.
+_profile_lock = asyncio.Lock()
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+def _require_token(handler):
+    """Пускает только запросы с 'Authorization: Bearer <DEBUG_ENDPOINTS_TOKEN>'."""
+    @functools.wraps(handler)
+    async def wrapper(request: web.Request) -> web.StreamResponse:
+        header = request.headers.get("Authorization", "")
+        token = header[7:] if header.startswith("Bearer ") else ""
+        if not hmac.compare_digest(token.encode(), DEBUG_ENDPOINTS_TOKEN.encode()):
+            logger.warning(f"Отклонен запрос к {request.path} с {request.remote}: неверный токен.")
+            raise web.HTTPUnauthorized()
+        return await handler(request)
+    return wrapper
+
+def _int_param(request: web.Request, name: str, default: int, maximum: int) -> int:
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"'{name}' должен быть числом")
+    return max(1, min(value, maximum))
+
+def _hit_rate(hits: int, total: int) -> Optional[float]:
+    return round(hits / total, 4) if total else None
+
+# =========================================================================================
+# >> ПРОФИЛИРОВАНИЕ
+# =========================================================================================
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    filename = os.path.relpath(code.co_filename) if code.co_filename.startswith(os.getcwd()) else os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename})"
+
+def _sample_stacks(thread_id: int, seconds: float) -> Counter:
+    """Сэмплирует стек потока цикла событий из отдельного потока; результат - свернутые стеки."""
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        if names:
+            stacks[";".join(reversed(names))] += 1
+        time.sleep(PROFILE_SAMPLE_INTERVAL)
+    return stacks
+
+@_require_token
+async def profile_handler(request: web.Request) -> web.StreamResponse:
+    """
+    /debug/profile?seconds=N&format=collapsed|pstats
+    collapsed - сэмплирующий профиль в формате свернутых стеков (flamegraph.pl, speedscope);
+    pstats - детерминированный cProfile потока цикла событий, файл для snakeviz / pstats.
+    """
+    seconds = _int_param(request, "seconds", 10, PROFILE_MAX_SECONDS)
+    output = request.query.get("format", "collapsed")
+    if output not in ("collapsed", "pstats"):
+        raise web.HTTPBadRequest(text="format: collapsed или pstats")
+    if _profile_lock.locked():
+        raise web.HTTPConflict(text="Профилирование уже выполняется")
+
+    async with _profile_lock:
+        logger.info(f"Запущено профилирование ({output}) на {seconds} с.")
+        if output == "collapsed":
+            stacks = await asyncio.to_thread(_sample_stacks, threading.get_ident(), seconds)
+            body = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+            return web.Response(text=body)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        return web.Response(
+            body=marshal.dumps(profiler.stats), content_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="citadel-{int(time.time())}.prof"'}
+        )
+
+# =========================================================================================
+# >> ЗАДАЧИ И ПАМЯТЬ
+# =========================================================================================
+@_require_token
+async def tasks_handler(request: web.Request) -> web.StreamResponse:
+    """/debug/tasks - живые задачи asyncio со стеками и сводка по корутинам."""
+    tasks = []
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        stack = io.StringIO()
+        task.print_stack(limit=TASK_STACK_LIMIT, file=stack)
+        tasks.append({
+            'name': task.get_name(),
+            'coro': getattr(coro, '__qualname__', repr(coro)),
+            'done': task.done(),
+            'stack': stack.getvalue().splitlines()[1:],
+        })
+    tasks.sort(key=lambda task: task['coro'])
+    summary = Counter(task['coro'] for task in tasks)
+    return web.json_response({'total': len(tasks), 'by_coro': dict(summary.most_common()), 'tasks': tasks}, dumps=_json_dumps)
+
+def _memory_diff(top: int) -> Dict:
+    global _last_snapshot
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    previous, _last_snapshot = _last_snapshot, snapshot
+    stats = snapshot.compare_to(previous, "lineno") if previous else snapshot.statistics("lineno")
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'traced_kb': current // 1024, 'peak_kb': peak // 1024,
+        'compared_to_previous': previous is not None,
+        'top': [{
+            'location': str(stat.traceback[0]),
+            'size_kb': round(stat.size / 1024, 1),
+            'size_diff_kb': round(getattr(stat, 'size_diff', 0) / 1024, 1),
+            'count': stat.count,
+            'count_diff': getattr(stat, 'count_diff', 0),
+        } for stat in stats[:top]],
+    }
+
+@_require_token
+async def memory_handler(request: web.Request) -> web.StreamResponse:
+    """
+    /debug/memory?top=N - топ строк по выделенной памяти и разница с прошлым вызовом.
+    Первый вызов включает tracemalloc (он замедляет выделения), /debug/memory?stop=1 выключает его.
+    """
+    global _last_snapshot
+    if request.query.get("stop"):
+        tracemalloc.stop()
+        _last_snapshot = None
+        return web.json_response({'status': 'stopped'})
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        _last_snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+        logger.info("tracemalloc включен через /debug/memory.")
+        return web.json_response({'status': 'started', 'hint': 'Повторите запрос, чтобы получить разницу.'})
+    top = _int_param(request, "top", 25, 200)
+    return web.json_response(await asyncio.to_thread(_memory_diff, top), dumps=_json_dumps)
+
+# =========================================================================================
+# >> КЭШИ
+# =========================================================================================
+def _caches(bot: "SecurityBot") -> Dict:
+    language = bot.language_cache_stats
+    contexts = bot.security_contexts.stats
+    membership = bot.membership.stats
+    return {
+        'language_cache': {
+            'size': len(bot.language_cache), **language,
+            'hit_rate': _hit_rate(language['hits'], sum(language.values())),
+        },
+        'security_contexts': {
+            'size': len(bot.security_contexts), **contexts,
+            'hit_rate': _hit_rate(contexts['hits'], contexts['hits'] + contexts['misses']),
+        },
+        'membership_index': {
+            **membership,
+            # Доля проверок, на которые фильтр Блума ответил без Redis.
+            'bloom_hit_rate': _hit_rate(membership['bloom_negative'], membership['bloom_negative'] + membership['redis_checks']),
+        },
+        'discord': {
+            'guilds': len(bot.guilds), 'users': len(bot.users),
+            'cached_messages': len(bot.cached_messages),
+        },
+        'event_loop': bot.loop_monitor.stats,
+    }
+
+def setup_debug_routes(app: web.Application, bot: "SecurityBot"):
+    if not DEBUG_ENDPOINTS_TOKEN:
+        logger.info("DEBUG_ENDPOINTS_TOKEN не задан, эндпоинты /debug/* отключены.")
+        return
+
+    @_require_token
+    async def caches_handler(request: web.Request) -> web.StreamResponse:
+        """/debug/caches - размеры и доля попаданий кэшей бота."""
+        return web.json_response(_caches(bot), dumps=_json_dumps)
+
+    app.router.add_get("/debug/profile", profile_handler)
+    app.router.add_get("/debug/tasks", tasks_handler)
+    app.router.add_get("/debug/memory", memory_handler)
+    app.router.add_get("/debug/caches", caches_handler)
+    logger.info("Эндпоинты /debug/* включены на сервере метрик.")
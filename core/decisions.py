@@ -0,0 +1,176 @@
+# core/decisions.py
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import secrets
+import logging
+import discord
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд владелец может принять решение по инциденту.
+DECISION_TTL = int(os.getenv("DECISION_TTL", 86400))
+DECISION_KEY_PREFIX = "decision"
+# Сколько секунд живет захваченное решение, пока его выполняет обработчик.
+DECISION_PROCESSING_TTL = 300
+
+# handler(interaction, decision, choice). Вызывается после defer(), ответ - через followup.
+# Если обработчик вернул False, решение не применено и возвращается владельцу (кнопки остаются рабочими).
+DecisionHandler = Callable[[discord.Interaction, Dict[str, Any], str], Awaitable[Optional[bool]]]
+# (choice, label, style, emoji)
+DecisionChoice = Tuple[str, str, discord.ButtonStyle, Optional[str]]
+
+_handlers: Dict[str, DecisionHandler] = {}
+
+def register_handler(kind: str, handler: DecisionHandler):
+    _handlers[kind] = handler
+
+def unregister_handler(kind: str):
+    _handlers.pop(kind, None)
+
+# Переносит решение в ключ обработки и возвращает {решение, оставшийся TTL в мс}.
+# Скрипт атомарен: из одновременных нажатий решение получает только одно.
+_CLAIM_DECISION_SCRIPT = """
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+    return false
+end
+local ttl = redis.call('PTTL', KEYS[1])
+redis.call('DEL', KEYS[1])
+redis.call('SET', KEYS[2], raw, 'EX', ARGV[1])
+return {raw, ttl}
+"""
+
+def _decision_key(token: str) -> str:
+    return f"{DECISION_KEY_PREFIX}:{token}"
+
+def _processing_key(token: str) -> str:
+    return f"{DECISION_KEY_PREFIX}:{token}:processing"
+
+async def _release_decision(bot: "SecurityBot", token: str, raw: str, ttl_ms: int):
+    """Возвращает захваченное решение на место с прежним оставшимся сроком."""
+    try:
+        async with bot.redis.pipeline(transaction=True) as pipe:
+            pipe.set(_decision_key(token), raw, px=ttl_ms if ttl_ms > 0 else None)
+            pipe.delete(_processing_key(token))
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Не удалось вернуть решение {token} после неудачной обработки: {e}")
+
+# =========================================================================================
+# >> ПОСТОЯННАЯ КНОПКА РЕШЕНИЯ
+# =========================================================================================
+class DecisionButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"decision:(?P<kind>[a-z_]+):(?P<guild_id>[0-9]+):(?P<target_id>[0-9]+):(?P<token>[0-9a-f]+):(?P<choice>[a-z_]+)"
+):
+    """
+    Кнопка, чье состояние целиком закодировано в custom_id.
+    Класс регистрируется один раз при запуске (bot.add_dynamic_items), поэтому
+    кнопки работают после перезапуска бота, а объекты View в памяти не копятся.
+    """
+    def __init__(self, kind: str, guild_id: int, target_id: int, token: str, choice: str, *,
+                 label: Optional[str] = None, style: discord.ButtonStyle = discord.ButtonStyle.secondary, emoji: Optional[str] = None):
+        super().__init__(discord.ui.Button(
+            label=label, style=style, emoji=emoji,
+            custom_id=f"decision:{kind}:{guild_id}:{target_id}:{token}:{choice}"
+        ))
+        self.kind = kind
+        self.guild_id = guild_id
+        self.target_id = target_id
+        self.token = token
+        self.choice = choice
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(
+            match['kind'], int(match['guild_id']), int(match['target_id']), match['token'], match['choice'],
+            label=item.label, style=item.style, emoji=item.emoji
+        )
+
+    async def callback(self, interaction: discord.Interaction):
+        await dispatch_decision(interaction.client, interaction, self)
+
+# =========================================================================================
+# >> СОЗДАНИЕ И ОБРАБОТКА РЕШЕНИЙ
+# =========================================================================================
+async def create_decision(
+    bot: "SecurityBot", kind: str, guild_id: int, target_id: int, owner_id: int,
+    choices: Sequence[DecisionChoice], payload: Optional[Dict[str, Any]] = None, ttl: int = DECISION_TTL
+) -> discord.ui.View:
+    """
+    Сохраняет ожидающее решение в Redis и возвращает View с кнопками для отправки.
+    """
+    token = secrets.token_hex(6)
+    decision = {'kind': kind, 'guild_id': guild_id, 'target_id': target_id, 'owner_id': owner_id, 'payload': payload or {}}
+    await bot.redis.set(_decision_key(token), json.dumps(decision), ex=ttl)
+
+    view = discord.ui.View(timeout=None)
+    for choice, label, style, emoji in choices:
+        view.add_item(DecisionButton(kind, guild_id, target_id, token, choice, label=label, style=style, emoji=emoji))
+    # Останавливаем View до отправки: нажатия обрабатывает зарегистрированный DecisionButton,
+    # а остановленный View не сохраняется в хранилище discord.py.
+    view.stop()
+    return view
+
+async def close_decision_message(interaction: discord.Interaction, title: str, color: discord.Color):
+    """Меняет заголовок и цвет эмбеда решения и убирает кнопки."""
+    message = interaction.message
+    if not message:
+        return
+    embed = message.embeds[0] if message.embeds else discord.Embed()
+    embed.title = title
+    embed.color = color
+    try:
+        await interaction.edit_original_response(embed=embed, view=None)
+    except discord.HTTPException as e:
+        logger.warning(f"Не удалось обновить сообщение с решением {message.id}: {e}")
+
+async def dispatch_decision(bot: "SecurityBot", interaction: discord.Interaction, button: DecisionButton):
+    t = bot.translator.get
+    lang = await bot.get_guild_language(button.guild_id)
+    key = _decision_key(button.token)
+
+    raw = await bot.redis.get(key)
+    if raw is None:
+        # Решение истекло (таймаут) или уже принято в другом месте.
+        await interaction.response.defer()
+        await close_decision_message(interaction, t("security.embed_titles.action_timeout", lang), discord.Color.dark_grey())
+        await interaction.followup.send(t("ui.decision_expired", lang), ephemeral=True)
+        return
+
+    decision = json.loads(raw)
+    if interaction.user.id != decision['owner_id']:
+        await interaction.response.send_message(t("ui.interaction_denied", lang), ephemeral=True)
+        return
+
+    handler = _handlers.get(button.kind)
+    if not handler:
+        logger.error(f"Нет обработчика для решения типа '{button.kind}' (токен {button.token}).")
+        await interaction.response.send_message(t("system.unexpected_error", lang), ephemeral=True)
+        return
+
+    # Решение не удаляется, а переносится в ключ обработки: при ошибке обработчика его можно вернуть.
+    claimed = await bot.redis.eval(_CLAIM_DECISION_SCRIPT, 2, key, _processing_key(button.token), DECISION_PROCESSING_TTL)
+    if not claimed:
+        await interaction.response.send_message(t("management.quarantine.action_already_taken", lang), ephemeral=True)
+        return
+    raw, ttl_ms = claimed[0], int(claimed[1])
+
+    await interaction.response.defer()
+    try:
+        applied = await handler(interaction, decision, button.choice)
+    except Exception as e:
+        logger.error(f"Ошибка при обработке решения '{button.kind}' ({button.choice}): {e}", exc_info=True)
+        await _release_decision(bot, button.token, raw, ttl_ms)
+        await interaction.followup.send(t("system.unexpected_error", lang), ephemeral=True)
+        return
+    if applied is False:
+        await _release_decision(bot, button.token, raw, ttl_ms)
+    else:
+        await bot.redis.delete(_processing_key(button.token))
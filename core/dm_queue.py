@@ -0,0 +1,82 @@
+# core/dm_queue.py
+# -*- coding: utf-8 -*-
+
+import os
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+import discord
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+# Сколько личных сообщений в секунду бот отправляет из очереди.
+DM_QUEUE_RATE = float(os.getenv("DM_QUEUE_RATE", 1.0))
+# Максимальная длина очереди: при переполнении новые уведомления отбрасываются.
+DM_QUEUE_MAX_SIZE = int(os.getenv("DM_QUEUE_MAX_SIZE", 1000))
+
+@dataclass
+class QueuedDM:
+    user: discord.abc.User
+    content: Optional[str] = None
+    embed: Optional[discord.Embed] = None
+    # Для логов: о чем сообщение и с каким сервером связано.
+    description: str = ""
+
+class DMQueue:
+    """
+    Очередь личных сообщений (уведомления владельцам серверов). Сообщения отправляются
+    в фоне с ограничением скорости: массовые уведомления не блокируют вызывающий код
+    и не упираются в лимиты Discord на открытие личных каналов.
+    """
+    def __init__(self, bot: "SecurityBot", rate: float = DM_QUEUE_RATE, max_size: int = DM_QUEUE_MAX_SIZE):
+        self.bot = bot
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._queue: "asyncio.Queue[QueuedDM]" = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'sent': 0, 'failed': 0, 'dropped': 0}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if not self._queue.empty():
+            logger.warning(f"Очередь личных сообщений остановлена, не отправлено: {self._queue.qsize()}.")
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def enqueue(self, user: discord.abc.User, content: Optional[str] = None, embed: Optional[discord.Embed] = None, description: str = "") -> bool:
+        try:
+            self._queue.put_nowait(QueuedDM(user, content, embed, description))
+            return True
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            logger.warning(f"Очередь личных сообщений переполнена, сообщение для {user.id} отброшено ({description}).")
+            return False
+
+    async def _run(self):
+        while True:
+            dm = await self._queue.get()
+            try:
+                await dm.user.send(content=dm.content, embed=dm.embed)
+                self.stats['sent'] += 1
+            except discord.Forbidden:
+                self.stats['failed'] += 1
+                logger.warning(f"Не удалось отправить ЛС пользователю {dm.user.id}: личные сообщения закрыты ({dm.description}).")
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Ошибка при отправке ЛС пользователю {dm.user.id} ({dm.description}): {e}")
+            finally:
+                self._queue.task_done()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,46 @@
+# core/live_stats.py
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Бот публикует события в канал stats_events:{guild_id}, web API держит
+# одну общую psubscribe-подписку на stats_events:* и раздает события клиентам.
+STATS_CHANNEL_PREFIX = "stats_events"
+STATS_CHANNEL_PATTERN = f"{STATS_CHANNEL_PREFIX}:*"
+
+EVENT_STATS = "stats"
+EVENT_ANTINUKE = "antinuke"
+
+def channel_for_guild(guild_id: int) -> str:
+    return f"{STATS_CHANNEL_PREFIX}:{guild_id}"
+
+def guild_id_from_channel(channel: str) -> Optional[int]:
+    try:
+        return int(channel.rsplit(":", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+def encode_event(event_type: str, guild_id: int, data: Dict[str, Any]) -> str:
+    return json.dumps({"type": event_type, "guildId": str(guild_id), "ts": int(time.time()), "data": data}, ensure_ascii=False)
+
+def decode_event(raw: str) -> Optional[Dict[str, Any]]:
+    try:
+        event = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    return event if isinstance(event, dict) and "type" in event else None
+
+async def publish_event(redis_client, guild_id: int, event_type: str, data: Dict[str, Any]):
+    """
+    Публикует событие для дашборда. Ошибки только логируются:
+    live-поток вторичен и не должен ломать основную логику бота.
+    """
+    try:
+        await redis_client.publish(channel_for_guild(guild_id), encode_event(event_type, guild_id, data))
+    except Exception as e:
+        logger.warning(f"Не удалось опубликовать событие '{event_type}' для сервера {guild_id}: {e}")
@@ -0,0 +1,110 @@
+# core/loop_monitor.py
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+import contextlib
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Как часто измеряется задержка цикла событий (секунды).
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.5))
+# Задержка, начиная с которой цикл считается заблокированным и снимается стек.
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", 0.25))
+# Режим отладки asyncio: каждый колбэк дольше порога логируется с местом создания.
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "false").lower() == "true"
+
+# Сколько кадров стека сохраняется в снимке и сколько последних блокировок хранится.
+STACK_LIMIT = 30
+RECENT_STALLS = 20
+
+class LoopMonitor:
+    """
+    Сторож цикла событий. Корутина-метроном спит interval секунд и пишет опоздание
+    в citadel_event_loop_lag_seconds. Фоновый поток следит за ее пульсом: если цикл
+    не отвечает дольше порога, поток снимает стек главного потока - это и есть код,
+    который выполняется синхронно и держит цикл. Снимок логируется, когда цикл оживет
+    (логирование из чужого потока небезопасно для DiscordLogHandler).
+    """
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self._heartbeat = time.monotonic()
+        self._sampled_heartbeat: Optional[float] = None
+        self._sample: Optional[str] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self.recent_stalls: Deque[Dict] = deque(maxlen=RECENT_STALLS)
+        self.stats = {'lag': 0.0, 'max_lag': 0.0, 'stalls': 0}
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if LOOP_DEBUG:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+            logging.getLogger("asyncio").setLevel(logging.WARNING)
+            logger.warning(f"Включен режим отладки asyncio: колбэки дольше {self.threshold} с будут логироваться.")
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._run())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Монитор цикла событий запущен: интервал {self.interval} с, порог {self.threshold} с.")
+
+    async def stop(self):
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - started - self.interval)
+            self.stats['lag'] = lag
+            self.stats['max_lag'] = max(self.stats['max_lag'], lag)
+            metrics.EVENT_LOOP_LAG.set(lag)
+            if lag >= self.threshold:
+                self._report_stall(lag)
+
+    def _report_stall(self, lag: float):
+        # Снимок мог не успеть сняться, если цикл отвис быстрее, чем проснулся сторож.
+        sample, self._sample = self._sample, None
+        self.stats['stalls'] += 1
+        metrics.EVENT_LOOP_STALLS.inc()
+        self.recent_stalls.append({'at': time.time(), 'lag': lag, 'stack': sample})
+        if sample:
+            logger.warning(f"Цикл событий был заблокирован на {lag:.3f} с. Стек в момент блокировки:\n{sample}")
+        else:
+            logger.warning(f"Цикл событий отстал на {lag:.3f} с (много коротких задач или блокировка короче порога сторожа).")
+
+    def _watch(self):
+        while not self._stop_event.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            if heartbeat == self._sampled_heartbeat:
+                continue
+            if time.monotonic() - heartbeat - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            # Один снимок на блокировку: следующий - только после нового пульса.
+            self._sampled_heartbeat = heartbeat
+            self._sample = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
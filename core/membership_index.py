@@ -0,0 +1,178 @@
+# core/membership_index.py
+# -*- coding: utf-8 -*-
+
+import os
+import math
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+QUARANTINED = "quarantined"
+ALLOWED_BOTS = "allowed_bots"
+
+# (запрос по всем серверам, запрос по одному серверу) для каждого индекса.
+INDEX_QUERIES: Dict[str, Tuple[str, str]] = {
+    QUARANTINED: (
+        "SELECT guild_id, user_id FROM quarantined_users WHERE status = 'active'",
+        "SELECT user_id FROM quarantined_users WHERE guild_id = %s AND status = 'active'",
+    ),
+    ALLOWED_BOTS: (
+        "SELECT guild_id, bot_id FROM allowed_bots",
+        "SELECT bot_id FROM allowed_bots WHERE guild_id = %s",
+    ),
+}
+
+# Служебный элемент набора: отличает загруженный пустой набор от отсутствующего ключа.
+SET_LOADED_MARKER = "loaded"
+
+MEMBERSHIP_BLOOM_ENABLED = os.getenv("MEMBERSHIP_BLOOM_ENABLED", "true").lower() == "true"
+MEMBERSHIP_BLOOM_CAPACITY = int(os.getenv("MEMBERSHIP_BLOOM_CAPACITY", 100000))
+MEMBERSHIP_BLOOM_ERROR_RATE = float(os.getenv("MEMBERSHIP_BLOOM_ERROR_RATE", 0.01))
+
+class BloomFilter:
+    """
+    Фильтр Блума по парам (сервер, ID). Ответ "нет" точный, ответ "возможно" проверяется в Redis.
+    Удаление не поддерживается: удаленные элементы дают лишь ложные "возможно".
+    """
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, guild_id: int, item_id: int):
+        digest = hashlib.blake2b(f"{guild_id}:{item_id}".encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, guild_id: int, item_id: int):
+        for position in self._positions(guild_id, item_id):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, guild_id: int, item_id: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(guild_id, item_id))
+
+class MembershipIndex:
+    """
+    Индексы принадлежности для горячих путей (вход участника или бота на сервер).
+    Источник истины - MySQL; Redis хранит набор ID на сервер; фильтр Блума в памяти
+    отвечает "точно нет" без сетевого запроса. Наборы обновляются сервисами при записи
+    и пересобираются при запуске бота.
+    """
+    def __init__(self, bot: "SecurityBot"):
+        self.bot = bot
+        self._blooms: Dict[str, BloomFilter] = {}
+        # Фильтр используется только после полной сборки: до этого проверка идет в Redis.
+        self._ready: Dict[str, bool] = {}
+        self.stats = {'bloom_negative': 0, 'redis_checks': 0, 'db_fallbacks': 0}
+
+    @staticmethod
+    def _key(kind: str, guild_id: int) -> str:
+        return f"{kind}:{guild_id}"
+
+    def keys_for_guild(self, guild_id: int) -> List[str]:
+        return [self._key(kind, guild_id) for kind in INDEX_QUERIES]
+
+    async def rebuild(self, guild_ids: Optional[Iterable[int]] = None):
+        """
+        Пересобирает все индексы одним запросом на таблицу. Если передан guild_ids,
+        наборы в Redis создаются только для этих серверов (остальные загрузятся при первой проверке).
+        """
+        wanted = set(guild_ids) if guild_ids is not None else None
+        for kind, (query_all, _) in INDEX_QUERIES.items():
+            bloom = BloomFilter(MEMBERSHIP_BLOOM_CAPACITY, MEMBERSHIP_BLOOM_ERROR_RATE) if MEMBERSHIP_BLOOM_ENABLED else None
+            # Новый фильтр подключается сразу, чтобы не потерять записи, сделанные во время сборки.
+            if bloom:
+                self._blooms[kind] = bloom
+            self._ready[kind] = False
+            try:
+                async with self.bot.db_pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(query_all)
+                        rows = await cursor.fetchall()
+                grouped: Dict[int, List[int]] = {guild_id: [] for guild_id in (wanted or ())}
+                for guild_id, item_id in rows:
+                    if bloom:
+                        bloom.add(guild_id, item_id)
+                    if wanted is None or guild_id in wanted:
+                        grouped.setdefault(guild_id, []).append(item_id)
+                async with self.bot.redis.pipeline(transaction=False) as pipe:
+                    for guild_id, item_ids in grouped.items():
+                        key = self._key(kind, guild_id)
+                        pipe.delete(key)
+                        pipe.sadd(key, SET_LOADED_MARKER, *map(str, item_ids))
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"Не удалось пересобрать индекс '{kind}': {e}", exc_info=True)
+                continue
+            self._ready[kind] = bloom is not None
+            logger.info(f"Индекс '{kind}' пересобран: {len(rows)} записей, {len(grouped)} наборов в Redis.")
+
+    async def _load_guild(self, kind: str, guild_id: int) -> List[int]:
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(INDEX_QUERIES[kind][1], (guild_id,))
+                return [row[0] for row in await cursor.fetchall()]
+
+    async def contains(self, kind: str, guild_id: int, item_id: int) -> bool:
+        bloom = self._blooms.get(kind)
+        if bloom and self._ready.get(kind) and not bloom.might_contain(guild_id, item_id):
+            self.stats['bloom_negative'] += 1
+            return False
+
+        self.stats['redis_checks'] += 1
+        key = self._key(kind, guild_id)
+        try:
+            loaded, present = await self.bot.redis.smismember(key, [SET_LOADED_MARKER, str(item_id)])
+            if loaded:
+                return bool(present)
+            item_ids = await self._load_guild(kind, guild_id)
+            async with self.bot.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.sadd(key, SET_LOADED_MARKER, *map(str, item_ids))
+                await pipe.execute()
+            return item_id in item_ids
+        except Exception as e:
+            logger.error(f"Не удалось проверить индекс '{kind}' для {item_id} на сервере {guild_id} через Redis: {e}")
+            self.stats['db_fallbacks'] += 1
+            return item_id in await self._load_guild(kind, guild_id)
+
+    async def add(self, kind: str, guild_id: int, item_ids: Iterable[int]):
+        item_ids = list(item_ids)
+        if not item_ids:
+            return
+        bloom = self._blooms.get(kind)
+        if bloom:
+            for item_id in item_ids:
+                bloom.add(guild_id, item_id)
+        await self._update_set(kind, guild_id, add=item_ids)
+
+    async def remove(self, kind: str, guild_id: int, item_ids: Iterable[int]):
+        item_ids = list(item_ids)
+        if item_ids:
+            await self._update_set(kind, guild_id, remove=item_ids)
+
+    async def _update_set(self, kind: str, guild_id: int, add: List[int] = (), remove: List[int] = ()):
+        """Если набор еще не загружен, он соберется из БД при первой проверке."""
+        key = self._key(kind, guild_id)
+        try:
+            async with self.bot.redis.pipeline(transaction=False) as pipe:
+                if add:
+                    pipe.sadd(key, *map(str, add))
+                if remove:
+                    pipe.srem(key, *map(str, remove))
+                await pipe.execute()
+        except Exception as e:
+            # Устаревший набор опаснее медленного: удаляем его, чтобы он пересобрался из БД.
+            logger.error(f"Не удалось обновить индекс '{kind}' для сервера {guild_id}: {e}")
+            try:
+                await self.bot.redis.delete(key)
+            except Exception:
+                pass
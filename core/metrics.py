@@ -1,7 +1,7 @@
 # core/metrics.py
 # -*- coding: utf-8 -*-
 
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 # Определяем наши метрики. Это глобальные объекты.
 
@@ -16,6 +16,21 @@ COMMANDS_PROCESSED = Counter(
     ['command_name']
 )
 
+# Итоги слэш-команд. 'outcome' - success / error / check_failure,
+# 'code' - класс ошибки или код ошибки Discord API (http_10062 и т.п.), для успеха - ok.
+COMMAND_RESULTS = Counter(
+    'citadel_command_results_total',
+    'Slash command results by outcome and error code',
+    ['command_name', 'outcome', 'code']
+)
+
+# Взаимодействия, на которые бот не ответил за 3 секунды (Discord показывает "Приложение не отвечает").
+COMMAND_ACK_MISSED = Counter(
+    'citadel_command_ack_missed_total',
+    'Slash command interactions that missed the 3-second acknowledgement window',
+    ['command_name']
+)
+
 # Счетчик срабатываний системы анти-нюка (когда кто-то попадает в карантин).
 ANTI_NUKE_TRIGGERS = Counter(
     'citadel_antinuke_triggers_total',
@@ -42,4 +57,63 @@ GUILDS_COUNT = Gauge(
 QUARANTINED_USERS_COUNT = Gauge(
     'citadel_quarantined_users_current',
     'Current number of users in quarantine across all guilds'
-)
\ No newline at end of file
+)
+
+# Задержка цикла событий: насколько позже запланированного проснулся метроном (core/loop_monitor.py).
+EVENT_LOOP_LAG = Gauge(
+    'citadel_event_loop_lag_seconds',
+    'Event loop lag measured by the loop monitor'
+)
+
+# Счетчик блокировок цикла событий дольше порога LOOP_LAG_THRESHOLD.
+EVENT_LOOP_STALLS = Counter(
+    'citadel_event_loop_stalls_total',
+    'Times the event loop lag exceeded the stall threshold'
+)
+
+# Время загрузки каждого кога при последнем запуске (импорт модуля + setup).
+COG_LOAD_SECONDS = Gauge(
+    'citadel_cog_load_seconds',
+    'Time spent loading each cog at startup',
+    ['cog']
+)
+
+# Сколько новых модулей импортировал ког при загрузке - показатель цены его импортов.
+COG_IMPORTED_MODULES = Gauge(
+    'citadel_cog_imported_modules',
+    'Number of modules first imported while loading each cog',
+    ['cog']
+)
+
+# --- Histograms (Распределения длительностей, см. core/tracing.py) ---
+
+# Границы корзин: от миллисекунды (Redis) до минут (бэкапы).
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0)
+
+# Длительность слушателей событий, слэш-команд и именованных операций.
+# 'kind' - listener / command / operation, 'name' - имя слушателя, команды или операции.
+OPERATION_DURATION = Histogram(
+    'citadel_operation_duration_seconds',
+    'Duration of event listeners, slash commands and named operations',
+    ['kind', 'name'],
+    buckets=DURATION_BUCKETS
+)
+
+# Время вложенных вызовов (БД, Redis, Discord REST, HTTP) внутри корневой операции.
+# Показывает, куда уходит время конкретного слушателя или команды.
+SPAN_DURATION = Histogram(
+    'citadel_span_duration_seconds',
+    'Duration of DB, Redis and HTTP calls grouped by the root listener or command',
+    ['root', 'kind'],
+    buckets=DURATION_BUCKETS
+)
+
+# Время от создания взаимодействия до первого ответа (defer или сообщение).
+# 'response_type' - тип ответа Discord: deferred_channel_message, channel_message, modal и т.д.
+# Команды, у которых медленный channel_message, - кандидаты на defer().
+COMMAND_FIRST_RESPONSE = Histogram(
+    'citadel_command_first_response_seconds',
+    'Time from interaction creation to the first response, by response type',
+    ['command_name', 'response_type'],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0, 10.0)
+)
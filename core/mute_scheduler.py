@@ -0,0 +1,111 @@
+# core/mute_scheduler.py
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+CLOSE_BATCH_SIZE = 200
+RETRY_DELAY = 30.0
+
+def _to_epoch(value: datetime) -> float:
+    # MySQL TIMESTAMP возвращается без часового пояса, время в нем - UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class MuteScheduler:
+    """
+    Планировщик окончания мьютов. Держит кучу (end_timestamp, mute_id),
+    спит до ближайшего окончания и закрывает истекшие мьюты пачками.
+    Состояние восстанавливается из таблицы mutes при каждом запуске.
+    """
+    def __init__(self, bot: "SecurityBot"):
+        self.bot = bot
+        self._heap: List[Tuple[float, int]] = []
+        # Актуальный срок каждого мьюта: записи кучи с другим сроком устарели (мьют продлен).
+        self._deadlines: Dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def load(self):
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT mute_id, end_timestamp FROM mutes WHERE status = 'active' AND end_timestamp IS NOT NULL")
+                rows = await cursor.fetchall()
+        self._heap = [(_to_epoch(end_timestamp), mute_id) for mute_id, end_timestamp in rows]
+        self._deadlines = {mute_id: epoch for epoch, mute_id in self._heap}
+        heapq.heapify(self._heap)
+        logger.info(f"Планировщик мьютов загружен, активных мьютов: {len(self._heap)}.")
+
+    def schedule(self, mute_id: int, end_timestamp: datetime):
+        entry = (_to_epoch(end_timestamp), mute_id)
+        self._deadlines[mute_id] = entry[0]
+        heapq.heappush(self._heap, entry)
+        # Будим цикл, только если новый мьют заканчивается раньше всех остальных.
+        if self._heap[0] == entry:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = datetime.now(timezone.utc).timestamp()
+            due: List[int] = []
+            while self._heap and self._heap[0][0] <= now:
+                epoch, mute_id = heapq.heappop(self._heap)
+                # Старая запись продленного мьюта: он закроется по новой записи.
+                if self._deadlines.get(mute_id) != epoch:
+                    continue
+                del self._deadlines[mute_id]
+                due.append(mute_id)
+            if due:
+                await self._close_mutes(due)
+
+            timeout = max(self._heap[0][0] - now, 0) if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _close_mutes(self, mute_ids: List[int]):
+        for i in range(0, len(mute_ids), CLOSE_BATCH_SIZE):
+            batch = mute_ids[i:i + CLOSE_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            try:
+                async with self.bot.db_pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        # Условие по статусу делает закрытие идемпотентным: снятые вручную мьюты не трогаем.
+                        await cursor.execute(
+                            f"UPDATE mutes SET status = 'inactive' WHERE mute_id IN ({placeholders}) AND status = 'active'",
+                            batch
+                        )
+                        closed = cursor.rowcount
+                if closed:
+                    logger.info(f"Закрыто истекших мьютов: {closed}.")
+            except Exception as e:
+                logger.error(f"Не удалось закрыть истекшие мьюты {batch}: {e}. Повтор через {RETRY_DELAY} сек.")
+                retry_at = datetime.now(timezone.utc).timestamp() + RETRY_DELAY
+                for mute_id in batch:
+                    # Мьют могли продлить, пока шел запрос: тогда повтор не нужен.
+                    if mute_id not in self._deadlines:
+                        self._deadlines[mute_id] = retry_at
+                        heapq.heappush(self._heap, (retry_at, mute_id))
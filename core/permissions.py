@@ -1,7 +1,9 @@
 # core/permissions.py
 # -*- coding: utf-8 -*-
 
+import os
 import discord
+from discord.ext import commands
 
 async def is_guild_owner_check(interaction: discord.Interaction) -> bool:
     """
@@ -26,4 +28,14 @@ async def is_guild_owner_check(interaction: discord.Interaction) -> bool:
         # чтобы использовать текст из локализации. Просто возвращаем False.
         return False
 
-    return True
\ No newline at end of file
+    return True
+
+async def is_bot_owner_classic(ctx: commands.Context) -> bool:
+    """
+    Проверка для классических (префиксных) команд обслуживания бота.
+    Пропускает владельца из OWNER_DISCORD_ID или владельца приложения Discord.
+    """
+    owner_id = os.getenv("OWNER_DISCORD_ID", "")
+    if owner_id.isdigit() and ctx.author.id == int(owner_id):
+        return True
+    return await ctx.bot.is_owner(ctx.author)
@@ -0,0 +1,89 @@
+# core/raid_detection.py
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+import discord
+
+# Сколько последних входов хранится на сервер (кольцевой буфер в памяти).
+RAID_BUFFER_SIZE = int(os.getenv("RAID_BUFFER_SIZE", 500))
+# Сколько похожих имен в окне считается "кластером".
+RAID_NAME_CLUSTER_SIZE = int(os.getenv("RAID_NAME_CLUSTER_SIZE", 3))
+# Длина префикса нормализованного имени, по которому сравниваются ники.
+RAID_NAME_PREFIX = 5
+
+_NON_LETTERS_RE = re.compile(r"[^a-zа-яё]")
+
+def name_key(name: str) -> str:
+    """
+    Ключ для поиска похожих ников: без диакритики, цифр и символов, в нижнем регистре.
+    "Raider_123" и "raider4567" дают один ключ, "Рейдер_1" и "рейдер22" тоже.
+    Слишком короткие имена не группируются.
+    """
+    # Снимаются только диакритические знаки: кириллица остается буквами, а не выбрасывается.
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    normalized = "".join(char for char in decomposed if not unicodedata.combining(char))
+    letters = _NON_LETTERS_RE.sub("", normalized)
+    return letters[:RAID_NAME_PREFIX] if len(letters) >= 3 else ""
+
+@dataclass
+class JoinRecord:
+    member_id: int
+    joined_at: float
+    name_key: str
+    risk: int
+
+class JoinVelocityTracker:
+    """
+    Скорость входов на сервер по кольцевому буферу в памяти процесса.
+    Каждый вход получает оценку риска (0-3): новый аккаунт, аватар по умолчанию,
+    ник из кластера похожих имен среди недавних входов.
+    """
+    def __init__(self, buffer_size: int = RAID_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._joins: Dict[int, Deque[JoinRecord]] = {}
+
+    def recent(self, guild_id: int, window: float, now: Optional[float] = None) -> List[JoinRecord]:
+        """Входы за последние window секунд, от старых к новым."""
+        now = time.monotonic() if now is None else now
+        joins = self._joins.get(guild_id)
+        if not joins:
+            return []
+        result = []
+        for record in reversed(joins):
+            if now - record.joined_at > window:
+                break
+            result.append(record)
+        result.reverse()
+        return result
+
+    def record(self, member: discord.Member, settings: Dict[str, float], now: Optional[float] = None) -> Tuple[JoinRecord, int]:
+        """Учитывает вход и возвращает (запись, число входов в окне включая этот)."""
+        now = time.monotonic() if now is None else now
+        window = settings['window']
+        recent = self.recent(member.guild.id, window, now)
+        key = name_key(member.name)
+
+        risk = 0
+        if member.created_at and discord.utils.utcnow() - member.created_at < timedelta(days=settings['account_age_days']):
+            risk += 1
+        if member.avatar is None:
+            risk += 1
+        if key and sum(1 for record in recent if record.name_key == key) + 1 >= RAID_NAME_CLUSTER_SIZE:
+            risk += 1
+
+        record = JoinRecord(member.id, now, key, risk)
+        joins = self._joins.get(member.guild.id)
+        if joins is None:
+            joins = self._joins[member.guild.id] = deque(maxlen=self.buffer_size)
+        joins.append(record)
+        return record, len(recent) + 1
+
+    def forget(self, guild_id: int):
+        self._joins.pop(guild_id, None)
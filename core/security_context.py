@@ -0,0 +1,200 @@
+# core/security_context.py
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import logging
+import discord
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+
+from core import crypto
+from core.services.settings_service import (
+    ANTINUKE_DEFAULTS, ANTINUKE_ENGINE_DEFAULT, ANTINUKE_ENGINES, ANTINUKE_WINDOW_DEFAULTS,
+    RAID_DEFAULTS, RAID_ACTION_DEFAULT, RAID_ACTIONS,
+)
+from core.threat_detectors import WindowRule, parse_window_rules
+
+if TYPE_CHECKING:
+    from apps.discord_bot.main import SecurityBot
+
+logger = logging.getLogger(__name__)
+
+# Страховочный срок жизни контекста: основное обновление идет через invalidate().
+SECURITY_CONTEXT_TTL = float(os.getenv("SECURITY_CONTEXT_TTL", 600))
+
+CONTEXT_CONFIG_KEYS = (
+    'quarantine_role_id', 'moderation_log_channel_id', 'log_channel_id',
+    'telegram_user_id', 'telegram_bot_token_encrypted',
+)
+
+@dataclass
+class GuildSecurityContext:
+    """
+    Все, что нужно для реакции на инцидент, собранное заранее.
+    Роли и каналы хранятся как ID и берутся из кэша discord.py,
+    поэтому удаленная роль или канал сразу дают None без обращения к БД.
+    """
+    guild: discord.Guild
+    language: str
+    settings: Dict[str, float]
+    engine: str = ANTINUKE_ENGINE_DEFAULT
+    window_rules: Dict[str, List[WindowRule]] = field(default_factory=dict)
+    raid_settings: Dict[str, float] = field(default_factory=lambda: RAID_DEFAULTS.copy())
+    raid_action: str = RAID_ACTION_DEFAULT
+    quarantine_role_id: int = 0
+    log_channel_id: int = 0
+    telegram_chat_id: Optional[str] = None
+    telegram_token: Optional[str] = None
+    built_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def quarantine_role(self) -> Optional[discord.Role]:
+        return self.guild.get_role(self.quarantine_role_id) if self.quarantine_role_id else None
+
+    @property
+    def log_channel(self) -> Optional[discord.abc.GuildChannel]:
+        return self.guild.get_channel(self.log_channel_id) if self.log_channel_id else None
+
+    @property
+    def owner(self) -> Optional[discord.Member]:
+        return self.guild.owner
+
+    @property
+    def telegram_enabled(self) -> bool:
+        return bool(self.telegram_chat_id and self.telegram_token)
+
+    @property
+    def is_expired(self) -> bool:
+        return time.monotonic() - self.built_at > SECURITY_CONTEXT_TTL
+
+class SecurityContextCache:
+    """
+    Кэш GuildSecurityContext в памяти процесса. Заполняется одним запросом при запуске
+    и сбрасывается при изменении конфигурации сервера.
+    """
+    def __init__(self, bot: "SecurityBot"):
+        self.bot = bot
+        self._contexts: Dict[int, GuildSecurityContext] = {}
+        # Защита от записи устаревшего контекста, если его сбросили во время сборки.
+        self._generation = 0
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def invalidate(self, guild_id: int):
+        self._generation += 1
+        self._contexts.pop(guild_id, None)
+
+    def clear(self):
+        self._generation += 1
+        self._contexts.clear()
+
+    async def get(self, guild: discord.Guild) -> GuildSecurityContext:
+        context = self._contexts.get(guild.id)
+        if context and not context.is_expired:
+            self.stats['hits'] += 1
+            return context
+        self.stats['misses'] += 1
+        generation = self._generation
+        configs = await self._fetch_configs([guild.id])
+        context = await self._build(guild, (configs or {}).get(guild.id, {}))
+        # При ошибке БД контекст с настройками по умолчанию используется, но не кэшируется.
+        if configs is not None and generation == self._generation:
+            self._contexts[guild.id] = context
+        return context
+
+    async def preload(self, guilds: Iterable[discord.Guild]):
+        guilds = list(guilds)
+        if not guilds:
+            return
+        generation = self._generation
+        configs = await self._fetch_configs([guild.id for guild in guilds])
+        if configs is None:
+            return
+        contexts = {guild.id: await self._build(guild, configs.get(guild.id, {})) for guild in guilds}
+        if generation == self._generation:
+            self._contexts.update(contexts)
+        logger.info(f"Подготовлены контексты безопасности для {len(contexts)} серверов.")
+
+    async def _fetch_configs(self, guild_ids: List[int]) -> Optional[Dict[int, Dict[str, str]]]:
+        configs: Dict[int, Dict[str, str]] = {}
+        guild_placeholders = ", ".join(["%s"] * len(guild_ids))
+        key_placeholders = ", ".join(["%s"] * len(CONTEXT_CONFIG_KEYS))
+        try:
+            async with self.bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        f"SELECT guild_id, config_key, config_value FROM guild_configs WHERE guild_id IN ({guild_placeholders}) "
+                        f"AND (config_key IN ({key_placeholders}) OR config_key LIKE 'antinuke_%%' OR config_key LIKE 'raid_%%')",
+                        (*guild_ids, *CONTEXT_CONFIG_KEYS)
+                    )
+                    for guild_id, key, value in await cursor.fetchall():
+                        configs.setdefault(guild_id, {})[key] = value
+        except Exception as e:
+            logger.error(f"Не удалось загрузить конфигурацию безопасности для серверов {guild_ids[:10]}: {e}")
+            return None
+        return configs
+
+    async def _build(self, guild: discord.Guild, config: Dict[str, str]) -> GuildSecurityContext:
+        settings = ANTINUKE_DEFAULTS.copy()
+        window_values = ANTINUKE_WINDOW_DEFAULTS.copy()
+        engine = ANTINUKE_ENGINE_DEFAULT
+        raid_settings = RAID_DEFAULTS.copy()
+        raid_action = RAID_ACTION_DEFAULT
+        for key, value in config.items():
+            if key == "raid_action":
+                raid_action = value if value in RAID_ACTIONS else raid_action
+                continue
+            if key.startswith("raid_"):
+                try:
+                    raid_settings[key[len("raid_"):]] = float(value)
+                except ValueError:
+                    logger.warning(f"Некорректное значение настройки '{key}' на сервере {guild.id}: {value}")
+                continue
+            if not key.startswith("antinuke_"):
+                continue
+            name = key[len("antinuke_"):]
+            if name == "engine":
+                engine = value if value in ANTINUKE_ENGINES else engine
+            elif name.startswith("window_"):
+                window_values[name[len("window_"):]] = value
+            else:
+                try:
+                    settings[name] = float(value)
+                except ValueError:
+                    logger.warning(f"Некорректное значение настройки '{key}' на сервере {guild.id}: {value}")
+
+        window_rules: Dict[str, List[WindowRule]] = {}
+        for action, value in window_values.items():
+            try:
+                window_rules[action] = parse_window_rules(value)
+            except ValueError as e:
+                logger.warning(f"Сервер {guild.id}: {e}. Используется правило по умолчанию для '{action}'.")
+                window_rules[action] = parse_window_rules(ANTINUKE_WINDOW_DEFAULTS[action])
+
+        telegram_token = None
+        if config.get('telegram_bot_token_encrypted'):
+            try:
+                telegram_token = crypto.decrypt_data(config['telegram_bot_token_encrypted'])
+            except Exception as e:
+                logger.error(f"Не удалось расшифровать токен Telegram для сервера {guild.id}: {e}")
+
+        def _int(key: str) -> int:
+            value = config.get(key, "")
+            return int(value) if value.isdigit() else 0
+
+        return GuildSecurityContext(
+            guild=guild,
+            language=await self.bot.get_guild_language(guild.id),
+            settings=settings,
+            engine=engine,
+            window_rules=window_rules,
+            raid_settings=raid_settings,
+            raid_action=raid_action,
+            quarantine_role_id=_int('quarantine_role_id'),
+            log_channel_id=_int('moderation_log_channel_id') or _int('log_channel_id'),
+            telegram_chat_id=config.get('telegram_user_id'),
+            telegram_token=telegram_token,
+        )
@@ -9,7 +9,7 @@ import discord
 import aiofiles
 import asyncio
 
-from core import metrics
+from core import metrics, tracing
 
 if TYPE_CHECKING:
     from apps.discord_bot.main import SecurityBot
@@ -39,6 +39,7 @@ async def get_backups_list(bot: "SecurityBot", guild_id: int) -> List[Dict[str,
         logger.error(f"Не удалось получить список бэкапов для сервера {guild_id}: {e}", exc_info=True)
         return []
 
+@tracing.traced(tracing.KIND_OPERATION, "backup.create")
 async def create_backup(
     bot: "SecurityBot", 
     guild: discord.Guild, 
@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import logging
-from typing import Dict, Any, List, TYPE_CHECKING
+from typing import Dict, Any, List, Sequence, TYPE_CHECKING
+
+from core.membership_index import ALLOWED_BOTS
 
 if TYPE_CHECKING:
     from apps.discord_bot.main import SecurityBot
@@ -34,23 +36,34 @@ async def add_bot_to_whitelist(bot: "SecurityBot", guild_id: int, bot_id: int) -
                     "INSERT INTO allowed_bots (guild_id, bot_id) VALUES (%s, %s) ON DUPLICATE KEY UPDATE bot_id=bot_id",
                     (guild_id, bot_id)
                 )
+        await bot.membership.add(ALLOWED_BOTS, guild_id, [bot_id])
         return {'status': 'success'}
     except Exception as e:
         logger.error(f"Не удалось добавить бота {bot_id} в белый список для сервера {guild_id}: {e}")
         return {'status': 'error', 'code': 'db_error'}
 
-async def remove_bot_from_whitelist(bot: "SecurityBot", guild_id: int, bot_id: int) -> Dict[str, Any]:
+async def remove_bots_from_whitelist(bot: "SecurityBot", guild_id: int, bot_ids: Sequence[int]) -> Dict[str, Any]:
     """
-    Удаляет бота из белого списка.
+    Удаляет нескольких ботов из белого списка одним запросом.
     """
+    if not bot_ids:
+        return {'status': 'success'}
+    placeholders = ", ".join(["%s"] * len(bot_ids))
     try:
         async with bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "DELETE FROM allowed_bots WHERE guild_id = %s AND bot_id = %s",
-                    (guild_id, bot_id)
+                    f"DELETE FROM allowed_bots WHERE guild_id = %s AND bot_id IN ({placeholders})",
+                    (guild_id, *bot_ids)
                 )
+        await bot.membership.remove(ALLOWED_BOTS, guild_id, bot_ids)
         return {'status': 'success'}
     except Exception as e:
-        logger.error(f"Не удалось удалить бота {bot_id} из белого списка для сервера {guild_id}: {e}")
-        return {'status': 'error', 'code': 'db_error'}
\ No newline at end of file
+        logger.error(f"Не удалось удалить ботов {list(bot_ids)} из белого списка для сервера {guild_id}: {e}")
+        return {'status': 'error', 'code': 'db_error'}
+
+async def remove_bot_from_whitelist(bot: "SecurityBot", guild_id: int, bot_id: int) -> Dict[str, Any]:
+    """
+    Удаляет бота из белого списка.
+    """
+    return await remove_bots_from_whitelist(bot, guild_id, [bot_id])
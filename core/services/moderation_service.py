@@ -1,8 +1,10 @@
 # core/services/moderation_service.py
 # -*- coding: utf-8 -*-
 
+import asyncio
 import logging
 import re
+from collections import Counter
 from typing import Dict, Any, TYPE_CHECKING
 from datetime import timedelta
 import discord
@@ -48,18 +50,28 @@ async def add_warning(
     try:
         async with bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute(
-                    "INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (%s, %s, %s, %s)",
-                    (guild.id, target_member.id, moderator.id, reason)
-                )
-                
-                await cursor.execute(
-                    """SELECT COUNT(*) FROM warnings 
-                       WHERE guild_id = %s AND user_id = %s AND status = 'active'""",
-                    (guild.id, target_member.id)
-                )
-                warn_count_result = await cursor.fetchone()
-                warn_count = warn_count_result[0] if warn_count_result else 0
+                # Вставка и инкремент счетчика в одной транзакции, чтобы счетчик
+                # не разошелся с таблицей при сбое между запросами.
+                await conn.begin()
+                try:
+                    await cursor.execute(
+                        "INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (%s, %s, %s, %s)",
+                        (guild.id, target_member.id, moderator.id, reason)
+                    )
+                    # LAST_INSERT_ID(expr) возвращает новое значение счетчика без отдельного SELECT COUNT(*).
+                    await cursor.execute(
+                        """INSERT INTO warning_counters (guild_id, user_id, active_count)
+                           VALUES (%s, %s, LAST_INSERT_ID(1))
+                           ON DUPLICATE KEY UPDATE active_count = LAST_INSERT_ID(active_count + 1)""",
+                        (guild.id, target_member.id)
+                    )
+                    await cursor.execute("SELECT LAST_INSERT_ID()")
+                    warn_count_result = await cursor.fetchone()
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+                warn_count = int(warn_count_result[0]) if warn_count_result else 0
 
                 await cursor.execute(
                     "SELECT config_value FROM guild_configs WHERE guild_id = %s AND config_key = 'warn_threshold'",
@@ -78,6 +90,105 @@ async def add_warning(
         return {'status': 'error', 'code': 'db_error', 'message': str(e)}
 
 
+async def archive_warning(bot: "SecurityBot", guild_id: int, user_id: int, warning_id: int) -> Dict[str, Any]:
+    """
+    Переводит предупреждение в архив. Счетчик активных предупреждений
+    уменьшается только если предупреждение действительно было активным.
+    """
+    try:
+        async with bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await conn.begin()
+                try:
+                    await cursor.execute(
+                        "UPDATE warnings SET status = 'archived' WHERE id = %s AND status = 'active'",
+                        (warning_id,)
+                    )
+                    was_active = cursor.rowcount > 0
+                    if not was_active:
+                        await cursor.execute(
+                            "UPDATE warnings SET status = 'archived' WHERE id = %s AND status <> 'archived'",
+                            (warning_id,)
+                        )
+                    else:
+                        await cursor.execute(
+                            """UPDATE warning_counters SET active_count = GREATEST(active_count - 1, 0)
+                               WHERE guild_id = %s AND user_id = %s""",
+                            (guild_id, user_id)
+                        )
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+        return {'status': 'success', 'was_active': was_active}
+    except Exception as e:
+        logger.error(f"Ошибка в сервисе archive_warning для сервера {guild_id}: {e}", exc_info=True)
+        return {'status': 'error', 'code': 'db_error', 'message': str(e)}
+
+
+async def expire_warnings(bot: "SecurityBot", batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Помечает сгоревшие предупреждения (старше warn_lifetime_days) как 'expired'.
+    Работает ограниченными пачками: каждая пачка - отдельная короткая транзакция,
+    поэтому прерванный проход просто продолжится при следующем запуске.
+    """
+    expired_total = 0
+    try:
+        async with bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    "SELECT guild_id, config_value FROM guild_configs WHERE config_key = 'warn_lifetime_days'"
+                )
+                lifetimes = [(int(row[0]), int(row[1])) for row in await cursor.fetchall() if str(row[1]).isdigit()]
+
+                for guild_id, days in lifetimes:
+                    if days <= 0:
+                        continue
+                    while True:
+                        await conn.begin()
+                        try:
+                            # FOR UPDATE блокирует пачку от одновременного /warns remove.
+                            # Граница считается в MySQL: created_at заполняется по часам сервера БД (DEFAULT CURRENT_TIMESTAMP).
+                            await cursor.execute(
+                                """SELECT id, user_id FROM warnings
+                                   WHERE status = 'active' AND created_at < NOW() - INTERVAL %s DAY AND guild_id = %s
+                                   ORDER BY created_at LIMIT %s FOR UPDATE""",
+                                (days, guild_id, batch_size)
+                            )
+                            rows = await cursor.fetchall()
+                            if not rows:
+                                await conn.commit()
+                                break
+
+                            ids = [row[0] for row in rows]
+                            placeholders = ", ".join(["%s"] * len(ids))
+                            await cursor.execute(
+                                f"UPDATE warnings SET status = 'expired' WHERE id IN ({placeholders}) AND status = 'active'",
+                                ids
+                            )
+                            per_user = Counter(row[1] for row in rows)
+                            await cursor.executemany(
+                                """UPDATE warning_counters SET active_count = GREATEST(active_count - %s, 0)
+                                   WHERE guild_id = %s AND user_id = %s""",
+                                [(count, guild_id, user_id) for user_id, count in per_user.items()]
+                            )
+                            await conn.commit()
+                        except Exception:
+                            await conn.rollback()
+                            raise
+
+                        expired_total += len(ids)
+                        if len(rows) < batch_size:
+                            break
+                        # Отдаем управление циклу событий между пачками.
+                        await asyncio.sleep(0)
+
+        return {'status': 'success', 'expired': expired_total}
+    except Exception as e:
+        logger.error(f"Ошибка в сервисе expire_warnings: {e}", exc_info=True)
+        return {'status': 'error', 'code': 'db_error', 'message': str(e), 'expired': expired_total}
+
+
 async def timeout_member(
     bot: "SecurityBot",
     target_member: discord.Member,
@@ -119,8 +230,12 @@ async def timeout_member(
             async with conn.cursor() as cursor:
                 await cursor.execute(
                     "INSERT INTO mutes (guild_id, user_id, moderator_id, reason, end_timestamp) VALUES (%s, %s, %s, %s, %s)",
-                    (target_member.guild.id, target_member.id, moderator.id, reason, end_timestamp)
+                    (target_member.guild.id, target_member.id, moderator.id, reason, end_timestamp.replace(tzinfo=None))
                 )
+                mute_id = cursor.lastrowid
+
+        if bot.mute_scheduler:
+            bot.mute_scheduler.schedule(mute_id, end_timestamp)
         
         return {'status': 'success', 'end_timestamp': end_timestamp}
 
@@ -160,6 +275,40 @@ async def untimeout_member(
         logger.error(f"Ошибка в сервисе untimeout_member для сервера {target_member.guild.id}: {e}", exc_info=True)
         return {'status': 'error', 'code': 'db_error', 'message': str(e)}
 
+async def sync_mute_with_timeout(bot: "SecurityBot", member: discord.Member) -> Dict[str, Any]:
+    """
+    Приводит активный мьют в БД к фактическому тайм-ауту в Discord:
+    закрывает запись, если тайм-аут сняли вручную, и переносит срок, если его изменили.
+    """
+    try:
+        async with bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                if not member.is_timed_out():
+                    await cursor.execute(
+                        "UPDATE mutes SET status = 'inactive' WHERE guild_id = %s AND user_id = %s AND status = 'active'",
+                        (member.guild.id, member.id)
+                    )
+                    return {'status': 'success', 'closed': cursor.rowcount}
+
+                end_timestamp = member.timed_out_until
+                await cursor.execute(
+                    "SELECT mute_id FROM mutes WHERE guild_id = %s AND user_id = %s AND status = 'active' ORDER BY created_at DESC LIMIT 1",
+                    (member.guild.id, member.id)
+                )
+                row = await cursor.fetchone()
+                if not row:
+                    return {'status': 'success', 'closed': 0}
+                await cursor.execute(
+                    "UPDATE mutes SET end_timestamp = %s WHERE mute_id = %s",
+                    (end_timestamp.replace(tzinfo=None), row[0])
+                )
+        if bot.mute_scheduler:
+            bot.mute_scheduler.schedule(row[0], end_timestamp)
+        return {'status': 'success', 'closed': 0}
+    except Exception as e:
+        logger.error(f"Ошибка в сервисе sync_mute_with_timeout для сервера {member.guild.id}: {e}", exc_info=True)
+        return {'status': 'error', 'code': 'db_error', 'message': str(e)}
+
 async def check_and_apply_auto_mute(
     bot: "SecurityBot",
     guild: discord.Guild,
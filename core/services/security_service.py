@@ -1,112 +1,241 @@
 # core/services/security_service.py
 # -*- coding: utf-8 -*-
 
+import os
+import asyncio
 import logging
 import json
-from typing import Dict, Any, List, TYPE_CHECKING
+import time
+import uuid
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Sequence, Callable, Awaitable, TYPE_CHECKING
 import discord
 
 from core import metrics
+from core.membership_index import QUARANTINED
 
 if TYPE_CHECKING:
     from apps.discord_bot.main import SecurityBot
 
 logger = logging.getLogger(__name__)
 
-async def quarantine_user(
-    bot: "SecurityBot", 
-    member: discord.Member, 
-    reason: str
+# Сколько запросов к Discord выполняется одновременно при массовых действиях.
+BULK_ACTION_CONCURRENCY = int(os.getenv("BULK_ACTION_CONCURRENCY", 5))
+# Лимит Discord на количество пользователей в одном запросе массового бана.
+BULK_BAN_CHUNK_SIZE = 200
+
+# Время жизни одобренного владельцем разрешения на действие (секунды).
+ACTION_GRANT_TTL = int(os.getenv("ACTION_GRANT_TTL", 3600))
+# Дублировать ли разрешения в таблицу action_permissions для аудита.
+ACTION_GRANT_AUDIT = os.getenv("ACTION_GRANT_AUDIT", "false").lower() == "true"
+# Сколько дней хранить записи аудита после истечения разрешения.
+ACTION_GRANT_AUDIT_RETENTION_DAYS = int(os.getenv("ACTION_GRANT_AUDIT_RETENTION_DAYS", 30))
+
+async def _run_concurrently(items: Sequence[Any], action: Callable[[Any], Awaitable[Any]]) -> List[Any]:
+    """
+    Выполняет action для каждого элемента параллельно, но не более BULK_ACTION_CONCURRENCY
+    запросов к Discord одновременно: остальные ждут, а не упираются в лимиты API.
+    """
+    semaphore = asyncio.Semaphore(BULK_ACTION_CONCURRENCY)
+
+    async def _limited(item):
+        async with semaphore:
+            return await action(item)
+
+    return await asyncio.gather(*(_limited(item) for item in items), return_exceptions=True)
+
+def _edit_error_code(error: BaseException) -> str:
+    return 'hierarchy_error' if isinstance(error, discord.Forbidden) else 'discord_error'
+
+async def quarantine_users(
+    bot: "SecurityBot",
+    guild: discord.Guild,
+    members: Sequence[discord.Member],
+    reason: str,
+    quarantine_role: Optional[discord.Role] = None
 ) -> Dict[str, Any]:
     """
-    Сервисная функция для помещения пользователя в карантин.
+    Помещает нескольких участников в карантин. Роли всех участников сохраняются
+    одним многострочным INSERT до снятия ролей, затем роли меняются параллельно.
+    Если роль карантина уже известна (контекст безопасности), она не запрашивается из БД.
+    Возвращает {'status': 'success', 'results': {user_id: {'status': ..., 'code': ...}}}.
     """
-    guild = member.guild
-    
-    quarantine_role_id = 0
+    members = [member for member in members if member.guild.id == guild.id]
+    if not members:
+        return {'status': 'success', 'results': {}}
+
     try:
         async with bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute("SELECT config_value FROM guild_configs WHERE guild_id = %s AND config_key = 'quarantine_role_id'", (guild.id,))
-                result = await cursor.fetchone()
-                if result: quarantine_role_id = int(result[0])
+                if quarantine_role is None:
+                    await cursor.execute("SELECT config_value FROM guild_configs WHERE guild_id = %s AND config_key = 'quarantine_role_id'", (guild.id,))
+                    result = await cursor.fetchone()
+                    quarantine_role_id = int(result[0]) if result else 0
+                    if not quarantine_role_id:
+                        return {'status': 'error', 'code': 'quarantine_not_configured'}
+                    quarantine_role = guild.get_role(quarantine_role_id)
+                    if not quarantine_role:
+                        return {'status': 'error', 'code': 'quarantine_role_not_found'}
+
+                # У уже изолированных участников сохраненные роли - настоящие, а текущие - только карантинная.
+                placeholders = ", ".join(["%s"] * len(members))
+                await cursor.execute(
+                    f"SELECT user_id FROM quarantined_users WHERE guild_id = %s AND status = 'active' AND user_id IN ({placeholders})",
+                    (guild.id, *[member.id for member in members])
+                )
+                already_active = {row[0] for row in await cursor.fetchall()}
+                rows = [
+                    (guild.id, member.id, json.dumps([role.id for role in member.roles if role != guild.default_role]), reason, 'active')
+                    for member in members if member.id not in already_active
+                ]
+                if rows:
+                    # IF защищает активную запись, если ее создали между SELECT и INSERT (присваивания идут слева направо).
+                    await cursor.executemany(
+                        "INSERT INTO quarantined_users (guild_id, user_id, roles_json, reason, status) VALUES (%s, %s, %s, %s, %s) "
+                        "ON DUPLICATE KEY UPDATE roles_json=IF(status='active', roles_json, VALUES(roles_json)), "
+                        "reason=IF(status='active', reason, VALUES(reason)), "
+                        "quarantined_at=IF(status='active', quarantined_at, NOW()), status='active'",
+                        rows
+                    )
     except Exception as e:
-        logger.error(f"Не удалось получить ID роли карантина для сервера {guild.id}: {e}")
+        logger.error(f"Ошибка в сервисе quarantine_users для сервера {guild.id}: {e}", exc_info=True)
         return {'status': 'error', 'code': 'db_error'}
-        
-    if not quarantine_role_id:
-        return {'status': 'error', 'code': 'quarantine_not_configured'}
-        
-    quarantine_role = guild.get_role(quarantine_role_id)
-    if not quarantine_role:
-        return {'status': 'error', 'code': 'quarantine_role_not_found'}
 
-    user_roles = [role.id for role in member.roles if role != guild.default_role]
-    
+    outcomes = await _run_concurrently(
+        members, lambda member: member.edit(roles=[quarantine_role], reason=f"Помещение в карантин: {reason}")
+    )
+
+    results: Dict[int, Dict[str, Any]] = {}
+    failed_ids: List[int] = []
+    for member, outcome in zip(members, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, discord.HTTPException):
+                logger.error(f"Не удалось поместить в карантин {member.id} на сервере {guild.id}: {outcome}", exc_info=outcome)
+            results[member.id] = {'status': 'error', 'code': _edit_error_code(outcome)}
+            failed_ids.append(member.id)
+        else:
+            results[member.id] = {'status': 'success'}
+
+    created_failed_ids = [user_id for user_id in failed_ids if user_id not in already_active]
+    if created_failed_ids:
+        # Роли не были сняты - созданная этим вызовом запись не должна оставаться активной.
+        # Прежние активные записи не трогаем: в них сохранены настоящие роли участника.
+        await _set_quarantine_inactive(bot, guild.id, created_failed_ids)
+
+    succeeded_ids = [user_id for user_id, result in results.items() if result['status'] == 'success']
+    newly_quarantined = sum(1 for user_id in succeeded_ids if user_id not in already_active)
+    if newly_quarantined:
+        metrics.QUARANTINED_USERS_COUNT.inc(newly_quarantined)
+    if succeeded_ids:
+        await bot.membership.add(QUARANTINED, guild.id, succeeded_ids)
+    return {'status': 'success', 'results': results}
+
+async def quarantine_user(
+    bot: "SecurityBot", 
+    member: discord.Member, 
+    reason: str,
+    quarantine_role: Optional[discord.Role] = None
+) -> Dict[str, Any]:
+    """
+    Сервисная функция для помещения пользователя в карантин.
+    """
+    result = await quarantine_users(bot, member.guild, [member], reason, quarantine_role)
+    if result['status'] == 'error':
+        return result
+    return result['results'][member.id]
+
+async def _set_quarantine_inactive(bot: "SecurityBot", guild_id: int, user_ids: Sequence[int]) -> int:
+    """Одним UPDATE закрывает активные записи о карантине. Возвращает число закрытых записей."""
+    if not user_ids:
+        return 0
+    placeholders = ", ".join(["%s"] * len(user_ids))
     try:
         async with bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "INSERT INTO quarantined_users (guild_id, user_id, roles_json, reason, status) VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE roles_json=VALUES(roles_json), reason=VALUES(reason), status='active', quarantined_at=NOW()",
-                    (guild.id, member.id, json.dumps(user_roles), reason, 'active')
+                    f"UPDATE quarantined_users SET status = 'inactive' WHERE guild_id = %s AND status = 'active' AND user_id IN ({placeholders})",
+                    (guild_id, *user_ids)
                 )
-        
-        await member.edit(roles=[quarantine_role], reason=f"Помещение в карантин: {reason}")
-        
-        metrics.QUARANTINED_USERS_COUNT.inc()
-        
-        return {'status': 'success'}
-
-    except discord.Forbidden:
-        return {'status': 'error', 'code': 'hierarchy_error'}
+                closed = cursor.rowcount
     except Exception as e:
-        logger.error(f"Ошибка в сервисе quarantine_user для сервера {guild.id}: {e}", exc_info=True)
-        return {'status': 'error', 'code': 'db_error'}
-
+        logger.error(f"Не удалось закрыть записи о карантине {list(user_ids)} на сервере {guild_id}: {e}", exc_info=True)
+        return 0
+    await bot.membership.remove(QUARANTINED, guild_id, user_ids)
+    return closed
 
-async def unquarantine_user(
-    bot: "SecurityBot", 
+async def restore_users(
+    bot: "SecurityBot",
     guild: discord.Guild,
-    user_id: int,
+    user_ids: Sequence[int],
     moderator_reason: str
 ) -> Dict[str, Any]:
     """
-    Сервисная функция для вывода пользователя из карантина и восстановления ролей.
+    Выводит нескольких пользователей из карантина: роли всех пользователей читаются
+    одним SELECT, восстанавливаются параллельно, записи закрываются одним UPDATE.
+    Возвращает {'status': 'success', 'results': {user_id: {...}}}; при успехе в результате есть 'member'.
     """
-    member = guild.get_member(user_id)
-    if not member:
-        return {'status': 'error', 'code': 'user_not_found'}
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {'status': 'success', 'results': {}}
 
+    placeholders = ", ".join(["%s"] * len(user_ids))
     try:
         async with bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "SELECT roles_json FROM quarantined_users WHERE user_id = %s AND guild_id = %s AND status = 'active'",
-                    (user_id, guild.id)
+                    f"SELECT user_id, roles_json FROM quarantined_users WHERE guild_id = %s AND status = 'active' AND user_id IN ({placeholders})",
+                    (guild.id, *user_ids)
                 )
-                result = await cursor.fetchone()
-                if not result:
-                    return {'status': 'error', 'code': 'not_in_quarantine'}
+                saved_roles = {user_id: json.loads(roles_json) for user_id, roles_json in await cursor.fetchall()}
+    except Exception as e:
+        logger.error(f"Ошибка в сервисе restore_users для сервера {guild.id}: {e}", exc_info=True)
+        return {'status': 'error', 'code': 'db_error'}
 
-                roles_json = result[0]
-                role_ids = json.loads(roles_json)
-                roles_to_add = [guild.get_role(rid) for rid in role_ids if guild.get_role(rid) is not None]
-                await member.edit(roles=roles_to_add, reason=moderator_reason)
+    results: Dict[int, Dict[str, Any]] = {}
+    to_restore: List[discord.Member] = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if not member:
+            results[user_id] = {'status': 'error', 'code': 'user_not_found'}
+        elif user_id not in saved_roles:
+            results[user_id] = {'status': 'error', 'code': 'not_in_quarantine'}
+        else:
+            to_restore.append(member)
 
-                await cursor.execute(
-                    "UPDATE quarantined_users SET status = 'inactive' WHERE user_id = %s AND guild_id = %s", 
-                    (user_id, guild.id)
-                )
-        
-        metrics.QUARANTINED_USERS_COUNT.dec()
-        
-        return {'status': 'success', 'member': member}
+    def _restore(member: discord.Member):
+        roles_to_add = [role for role in map(guild.get_role, saved_roles[member.id]) if role is not None]
+        return member.edit(roles=roles_to_add, reason=moderator_reason)
 
-    except discord.Forbidden:
-        return {'status': 'error', 'code': 'hierarchy_error'}
-    except Exception as e:
-        logger.error(f"Ошибка в сервисе unquarantine_user для сервера {guild.id}: {e}", exc_info=True)
-        return {'status': 'error', 'code': 'db_error'}
+    outcomes = await _run_concurrently(to_restore, _restore)
+
+    restored_ids: List[int] = []
+    for member, outcome in zip(to_restore, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, discord.HTTPException):
+                logger.error(f"Не удалось восстановить роли {member.id} на сервере {guild.id}: {outcome}", exc_info=outcome)
+            results[member.id] = {'status': 'error', 'code': _edit_error_code(outcome)}
+        else:
+            results[member.id] = {'status': 'success', 'member': member}
+            restored_ids.append(member.id)
+
+    closed = await _set_quarantine_inactive(bot, guild.id, restored_ids)
+    if closed:
+        metrics.QUARANTINED_USERS_COUNT.dec(closed)
+    return {'status': 'success', 'results': results}
+
+async def unquarantine_user(
+    bot: "SecurityBot", 
+    guild: discord.Guild,
+    user_id: int,
+    moderator_reason: str
+) -> Dict[str, Any]:
+    """
+    Сервисная функция для вывода пользователя из карантина и восстановления ролей.
+    """
+    result = await restore_users(bot, guild, [user_id], moderator_reason)
+    if result['status'] == 'error':
+        return result
+    return result['results'][user_id]
 
 async def get_quarantined_users(bot: "SecurityBot", guild_id: int) -> List[Dict[str, Any]]:
     """
@@ -128,42 +257,191 @@ async def get_quarantined_users(bot: "SecurityBot", guild_id: int) -> List[Dict[
         logger.error(f"Не удалось получить список карантина для сервера {guild_id}: {e}")
         return []
 
+def _ban_error_code(guild: discord.Guild, error: BaseException) -> str:
+    if isinstance(error, discord.NotFound):
+        return 'user_not_found'
+    if isinstance(error, discord.Forbidden):
+        # Discord отвечает 403 и при нехватке прав, и при более высокой роли цели.
+        return 'hierarchy_error' if guild.me.guild_permissions.ban_members else 'missing_permissions'
+    return 'discord_error'
+
+async def _ban_individually(guild: discord.Guild, user_ids: Sequence[int], moderator_reason: str) -> Dict[int, Dict[str, Any]]:
+    """Банит пользователей по одному (нужно только право BAN_MEMBERS) и возвращает итог с настоящей причиной ошибки."""
+    outcomes = await _run_concurrently(
+        user_ids, lambda user_id: guild.ban(discord.Object(id=user_id), reason=moderator_reason)
+    )
+    results: Dict[int, Dict[str, Any]] = {}
+    for user_id, outcome in zip(user_ids, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, discord.HTTPException):
+                logger.error(f"Не удалось забанить {user_id} на сервере {guild.id}: {outcome}", exc_info=outcome)
+            results[user_id] = {'status': 'error', 'code': _ban_error_code(guild, outcome)}
+        else:
+            results[user_id] = {'status': 'success'}
+    return results
+
+async def ban_users(bot: "SecurityBot", guild: discord.Guild, user_ids: Sequence[int], moderator_reason: str) -> Dict[str, Any]:
+    """
+    Банит нескольких пользователей и одним UPDATE закрывает их записи о карантине.
+    Одного пользователя банит обычным баном; нескольких - массовым (до 200 за запрос),
+    которому дополнительно нужно право MANAGE_GUILD. Без него, а также для тех, кого массовый
+    бан не забанил, выполняется обычный бан - он же сообщает настоящую причину отказа.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    results: Dict[int, Dict[str, Any]] = {}
+    if len(user_ids) == 1:
+        results.update(await _ban_individually(guild, user_ids, moderator_reason))
+    else:
+        for i in range(0, len(user_ids), BULK_BAN_CHUNK_SIZE):
+            chunk = user_ids[i:i + BULK_BAN_CHUNK_SIZE]
+            try:
+                ban_result = await guild.bulk_ban([discord.Object(id=user_id) for user_id in chunk], reason=moderator_reason)
+            except discord.Forbidden:
+                results.update(await _ban_individually(guild, chunk, moderator_reason))
+                continue
+            except discord.HTTPException as e:
+                logger.error(f"Не удалось забанить пользователей {chunk} на сервере {guild.id}: {e}")
+                results.update({user_id: {'status': 'error', 'code': 'discord_error'} for user_id in chunk})
+                continue
+            for user in ban_result.banned:
+                results[user.id] = {'status': 'success'}
+            if ban_result.failed:
+                results.update(await _ban_individually(guild, [user.id for user in ban_result.failed], moderator_reason))
+
+    banned_ids = [user_id for user_id, result in results.items() if result['status'] == 'success']
+    closed = await _set_quarantine_inactive(bot, guild.id, banned_ids)
+    if closed:
+        metrics.QUARANTINED_USERS_COUNT.dec(closed)
+    return {'status': 'success', 'results': results}
+
 async def ban_quarantined_user(bot: "SecurityBot", guild: discord.Guild, user_id: int, moderator_reason: str) -> Dict[str, Any]:
     """
     Банит пользователя и помечает его запись о карантине как неактивную.
     """
-    user_object = discord.Object(id=user_id)
-    try:
-        await guild.ban(user_object, reason=moderator_reason)
+    result = await ban_users(bot, guild, [user_id], moderator_reason)
+    return result['results'].get(user_id, {'status': 'error', 'code': 'discord_error'})
 
+async def keep_user_in_quarantine(bot: "SecurityBot", guild_id: int, user_id: int) -> Dict[str, Any]:
+    """
+    Помечает запись о карантине как неактивную, не меняя роли пользователя.
+    """
+    try:
         async with bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
                     "UPDATE quarantined_users SET status = 'inactive' WHERE user_id = %s AND guild_id = %s",
-                    (user_id, guild.id)
+                    (user_id, guild_id)
                 )
         
-        metrics.QUARANTINED_USERS_COUNT.dec()
+        await bot.membership.remove(QUARANTINED, guild_id, [user_id])
         return {'status': 'success'}
-    except discord.Forbidden:
-        return {'status': 'error', 'code': 'hierarchy_error'}
     except Exception as e:
-        logger.error(f"Не удалось забанить пользователя {user_id} из карантина: {e}", exc_info=True)
+        logger.error(f"Не удалось обновить статус карантина для {user_id}: {e}", exc_info=True)
         return {'status': 'error', 'code': 'db_error'}
 
-async def keep_user_in_quarantine(bot: "SecurityBot", guild_id: int, user_id: int) -> Dict[str, Any]:
+async def _apply_to_members(guild: discord.Guild, members: Sequence[discord.Member], action: Callable[[discord.Member], Awaitable[Any]], action_name: str) -> Dict[str, Any]:
+    outcomes = await _run_concurrently(members, action)
+    results: Dict[int, Dict[str, Any]] = {}
+    for member, outcome in zip(members, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, discord.HTTPException):
+                logger.error(f"Не удалось выполнить '{action_name}' для {member.id} на сервере {guild.id}: {outcome}", exc_info=outcome)
+            results[member.id] = {'status': 'error', 'code': _edit_error_code(outcome)}
+        else:
+            results[member.id] = {'status': 'success'}
+    return {'status': 'success', 'results': results}
+
+async def timeout_users(bot: "SecurityBot", guild: discord.Guild, members: Sequence[discord.Member], duration: timedelta, reason: str) -> Dict[str, Any]:
+    """Отправляет нескольких участников в тайм-аут параллельно (не более BULK_ACTION_CONCURRENCY запросов)."""
+    return await _apply_to_members(guild, members, lambda member: member.timeout(duration, reason=reason), "timeout")
+
+async def kick_users(bot: "SecurityBot", guild: discord.Guild, members: Sequence[discord.Member], reason: str) -> Dict[str, Any]:
+    """Исключает нескольких участников параллельно (не более BULK_ACTION_CONCURRENCY запросов)."""
+    return await _apply_to_members(guild, members, lambda member: member.kick(reason=reason), "kick")
+
+# ==================================================================================================
+# >> ВРЕМЕННЫЕ РАЗРЕШЕНИЯ НА ДЕЙСТВИЯ
+# ==================================================================================================
+
+# Забирает одно неистекшее разрешение из ZSET (оценка - момент истечения): сначала удаляет
+# истекшие, затем то, что истекает раньше всех. Скрипт выполняется в Redis атомарно.
+_CONSUME_GRANT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local grant = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+if grant then
+    redis.call('ZREM', KEYS[1], grant)
+end
+return grant
+"""
+
+def _action_grant_key(guild_id: int, user_id: int, action_type: str) -> str:
+    return f"action_grant:{guild_id}:{user_id}:{action_type}"
+
+async def grant_action_permission(bot: "SecurityBot", guild_id: int, user_id: int, action_type: str) -> Dict[str, Any]:
     """
-    Помечает запись о карантине как неактивную, не меняя роли пользователя.
+    Выдает одноразовое разрешение на действие. Разрешения хранятся в Redis ZSET
+    с моментом истечения в качестве оценки: каждое одобрение - один элемент со своим
+    сроком, поэтому новое одобрение не продлевает старые. TTL ключа лишь убирает пустой ZSET.
+    При включенном аудите элемент начинается с ID строки в action_permissions.
+    """
+    audit_id = 0
+    if ACTION_GRANT_AUDIT:
+        try:
+            async with bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "INSERT INTO action_permissions (guild_id, user_id, action_type, expires_at) VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)",
+                        (guild_id, user_id, action_type, ACTION_GRANT_TTL)
+                    )
+                    audit_id = cursor.lastrowid
+        except Exception as e:
+            # Аудит вторичен: разрешение все равно выдается.
+            logger.error(f"Не удалось записать аудит разрешения '{action_type}' для {user_id} на сервере {guild_id}: {e}")
+
+    key = _action_grant_key(guild_id, user_id, action_type)
+    try:
+        async with bot.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {f"{audit_id}:{uuid.uuid4().hex}": time.time() + ACTION_GRANT_TTL})
+            pipe.expire(key, ACTION_GRANT_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Не удалось сохранить разрешение '{action_type}' для {user_id} на сервере {guild_id}: {e}")
+        return {'status': 'error', 'code': 'redis_error'}
+    return {'status': 'success'}
+
+async def consume_action_permission(bot: "SecurityBot", guild_id: int, user_id: int, action_type: str) -> bool:
+    """
+    Атомарно забирает одно неистекшее разрешение. Lua-скрипт выполняется в Redis целиком,
+    поэтому одно одобрение нельзя использовать дважды даже при параллельных событиях.
     """
+    try:
+        grant = await bot.redis.eval(_CONSUME_GRANT_SCRIPT, 1, _action_grant_key(guild_id, user_id, action_type), time.time())
+    except Exception as e:
+        logger.error(f"Не удалось проверить разрешение '{action_type}' для {user_id} на сервере {guild_id}: {e}")
+        return False
+    if grant is None:
+        return False
+
+    audit_id = int(grant.split(":", 1)[0])
+    if audit_id:
+        try:
+            async with bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("UPDATE action_permissions SET is_used = TRUE WHERE id = %s", (audit_id,))
+        except Exception as e:
+            logger.error(f"Не удалось отметить использование разрешения {audit_id} в аудите: {e}")
+    return True
+
+async def purge_action_permissions_audit(bot: "SecurityBot") -> int:
+    """Удаляет записи аудита, истекшие более ACTION_GRANT_AUDIT_RETENTION_DAYS дней назад."""
     try:
         async with bot.db_pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "UPDATE quarantined_users SET status = 'inactive' WHERE user_id = %s AND guild_id = %s",
-                    (user_id, guild_id)
+                    "DELETE FROM action_permissions WHERE expires_at < NOW() - INTERVAL %s DAY",
+                    (ACTION_GRANT_AUDIT_RETENTION_DAYS,)
                 )
-        
-        return {'status': 'success'}
+                return cursor.rowcount
     except Exception as e:
-        logger.error(f"Не удалось обновить статус карантина для {user_id}: {e}", exc_info=True)
-        return {'status': 'error', 'code': 'db_error'}
\ No newline at end of file
+        logger.error(f"Не удалось очистить аудит разрешений: {e}")
+        return 0
@@ -1,6 +1,7 @@
 # core/services/settings_service.py
 # -*- coding: utf-8 -*-
 
+import os
 import logging
 from typing import Dict, Any, TYPE_CHECKING
 import discord
@@ -12,6 +13,44 @@ logger = logging.getLogger(__name__)
 
 QUARANTINE_ROLE_NAME = "🚫 Карантин"
 
+# Глобальные настройки анти-нюка. Сервер может переопределить любую из них ключом 'antinuke_<имя>'.
+ANTINUKE_DEFAULTS: Dict[str, float] = {
+    'threshold': float(os.getenv("THREAT_SCORE_THRESHOLD", 25.0)),
+    'decay': float(os.getenv("SCORE_DECAY_PER_SECOND", 2.0)),
+    'channel_delete': float(os.getenv("SCORE_PER_CHANNEL_DELETE", 10.0)),
+    'channel_create': float(os.getenv("SCORE_PER_CHANNEL_CREATE", 10.0)),
+    'role_create': float(os.getenv("SCORE_PER_ROLE_CREATE", 5.0)),
+    'ban': float(os.getenv("SCORE_PER_BAN", 8.0)),
+    'kick': float(os.getenv("SCORE_PER_KICK", 8.0)),
+    'webhook_create': float(os.getenv("SCORE_PER_WEBHOOK_CREATE", 5.0)),
+}
+
+# Движок обнаружения по умолчанию: 'score' (очки со сгоранием) или 'window' (скользящие окна).
+ANTINUKE_ENGINE_DEFAULT = os.getenv("ANTINUKE_ENGINE", "score").lower()
+ANTINUKE_ENGINES = ('score', 'window')
+
+# Правила скользящих окон по умолчанию: "N/период" через запятую. Ключ сервера: 'antinuke_window_<действие>'.
+ANTINUKE_WINDOW_DEFAULTS: Dict[str, str] = {
+    'channel_delete': os.getenv("WINDOW_CHANNEL_DELETE", "3/10s, 10/5m"),
+    'channel_create': os.getenv("WINDOW_CHANNEL_CREATE", "5/10s, 15/5m"),
+    'role_create': os.getenv("WINDOW_ROLE_CREATE", "5/10s, 15/5m"),
+    'ban': os.getenv("WINDOW_BAN", "5/10s, 20/5m"),
+    'kick': os.getenv("WINDOW_KICK", "5/10s, 20/5m"),
+    'webhook_create': os.getenv("WINDOW_WEBHOOK_CREATE", "3/10s, 10/5m"),
+}
+
+# Защита от рейдов при входе. Сервер может переопределить любую настройку ключом 'raid_<имя>'.
+RAID_DEFAULTS: Dict[str, float] = {
+    'joins': float(os.getenv("RAID_JOIN_THRESHOLD", 10)),
+    'window': float(os.getenv("RAID_JOIN_WINDOW", 10)),
+    'lockdown': float(os.getenv("RAID_LOCKDOWN_SECONDS", 300)),
+    'account_age_days': float(os.getenv("RAID_NEW_ACCOUNT_DAYS", 7)),
+    'min_risk': float(os.getenv("RAID_MIN_RISK", 0)),
+    'timeout_minutes': float(os.getenv("RAID_TIMEOUT_MINUTES", 60)),
+}
+RAID_ACTION_DEFAULT = os.getenv("RAID_ACTION", "timeout").lower()
+RAID_ACTIONS = ('off', 'timeout', 'quarantine', 'kick')
+
 async def configure_quarantine(bot: "SecurityBot", guild: discord.Guild) -> Dict[str, Any]:
     """
     Сервисная функция для настройки или проверки роли карантина.
@@ -41,7 +80,7 @@ async def configure_quarantine(bot: "SecurityBot", guild: discord.Guild) -> Dict
                     (guild.id, str(quarantine_role.id))
                 )
         
-        await bot.redis.delete(f"antinuke_settings:{guild.id}")
+        bot.security_contexts.invalidate(guild.id)
         return {'status': 'success', 'role': quarantine_role}
     except discord.Forbidden:
         return {'status': 'error', 'code': 'missing_permissions'}
@@ -64,9 +103,8 @@ async def set_guild_setting(bot: "SecurityBot", guild_id: int, key: str, value:
                 )
         
         if key == 'language':
-            await bot.redis.delete(f"lang:{guild_id}")
-        elif key.startswith('antinuke_'):
-            await bot.redis.delete(f"antinuke_settings:{guild_id}")
+            await bot.invalidate_guild_language(guild_id)
+        bot.security_contexts.invalidate(guild_id)
             
         return {'status': 'success'}
     except Exception as e:
@@ -85,8 +123,9 @@ async def delete_guild_setting(bot: "SecurityBot", guild_id: int, key: str) -> D
                     (guild_id, key)
                 )
         
-        if key.startswith('antinuke_'):
-            await bot.redis.delete(f"antinuke_settings:{guild_id}")
+        if key == 'language':
+            await bot.invalidate_guild_language(guild_id)
+        bot.security_contexts.invalidate(guild_id)
 
         return {'status': 'success'}
     except Exception as e:
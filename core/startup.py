@@ -0,0 +1,73 @@
+# core/startup.py
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, List, Optional
+
+from discord import app_commands
+
+logger = logging.getLogger(__name__)
+
+# Ключ Redis с хэшем дерева команд, которое последним было отправлено в Discord.
+COMMAND_TREE_HASH_KEY = "startup:command_tree_hash"
+
+@dataclass
+class StartupStep:
+    name: str
+    offset: float
+    duration: float
+    error: Optional[str] = None
+
+class StartupTimeline:
+    """
+    Оркестратор запуска: выполняет независимые шаги параллельно и записывает,
+    когда начался и сколько длился каждый шаг, для отчета о запуске.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: List[StartupStep] = []
+
+    async def step(self, name: str, awaitable: Awaitable, fail_fast: bool = True) -> Any:
+        offset = time.perf_counter() - self.started
+        try:
+            result = await awaitable
+        except Exception as e:
+            self.steps.append(StartupStep(name, offset, time.perf_counter() - self.started - offset, f"{type(e).__name__}: {e}"))
+            if fail_fast:
+                raise
+            logger.error(f"Шаг запуска '{name}' завершился с ошибкой: {e}", exc_info=True)
+            return None
+        self.steps.append(StartupStep(name, offset, time.perf_counter() - self.started - offset))
+        return result
+
+    async def parallel(self, steps: Dict[str, Awaitable], fail_fast: bool = True) -> Dict[str, Any]:
+        """
+        Запускает шаги одновременно. С fail_fast первая ошибка отменяет остальные шаги
+        и пробрасывается; без него ошибки логируются, а остальные шаги доводятся до конца.
+        """
+        tasks = {name: asyncio.create_task(self.step(name, awaitable, fail_fast)) for name, awaitable in steps.items()}
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+    def report(self) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"⏱️ Запуск занял **{total:.2f} с**:"]
+        for step in sorted(self.steps, key=lambda step: step.offset):
+            status = f"❌ {step.error}" if step.error else "✅"
+            lines.append(f"`+{step.offset:6.2f} с` `{step.duration:6.2f} с` {step.name} {status}")
+        return "\n".join(lines)
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """Хэш глобальных команд в том виде, в котором tree.sync() отправляет их в Discord."""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda command: (command.get('type', 1), command['name']))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
@@ -1,13 +1,38 @@
 # core/telegram_manager.py
 # -*- coding: utf-8 -*-
 
+import asyncio
+import importlib
 import logging
-import aiogram
 from core import crypto
 import re
 
 logger = logging.getLogger(__name__)
 
+_aiogram = None
+
+async def load_aiogram():
+    """
+    Импортирует aiogram при первом обращении. Импорт занимает секунды, поэтому выполняется
+    в отдельном потоке: первое оповещение во время атаки не должно останавливать цикл событий.
+    """
+    global _aiogram
+    if _aiogram is None:
+        _aiogram = await asyncio.to_thread(importlib.import_module, "aiogram")
+    return _aiogram
+
+async def warm_up(db_pool):
+    """Заранее импортирует aiogram в фоне, если Telegram настроен хотя бы на одном сервере."""
+    try:
+        async with db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT 1 FROM guild_configs WHERE config_key = %s LIMIT 1", ("telegram_bot_token_encrypted",))
+                configured = await cursor.fetchone()
+        if configured:
+            await load_aiogram()
+    except Exception as e:
+        logger.error(f"Не удалось заранее загрузить aiogram: {e}")
+
 def discord_md_to_html(text: str) -> str:
     """
     Конвертирует базовый Markdown от Discord в HTML для Telegram.
@@ -28,6 +53,21 @@ def discord_md_to_html(text: str) -> str:
     text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
     return text
 
+async def send_telegram_message(token: str, chat_id: str, message: str, guild_id: int):
+    """
+    Отправляет сообщение через Telegram-бота с уже известными токеном и получателем.
+    """
+    aiogram = await load_aiogram()
+    tg_bot = aiogram.Bot(token=token)
+    try:
+        message_html = discord_md_to_html(message)
+        await tg_bot.send_message(chat_id=chat_id, text=message_html, parse_mode="HTML")
+    except Exception as e:
+        # Ошибка будет залогирована здесь, если отправка не удалась
+        logger.error(f"Не удалось отправить оповещение в Telegram для сервера {guild_id}: {e}")
+    finally:
+        await tg_bot.session.close()
+
 async def send_telegram_alert(db_pool, guild_id: int, message: str):
     """
     Отправляет оповещение в Telegram, если он настроен для данного сервера.
@@ -43,18 +83,7 @@ async def send_telegram_alert(db_pool, guild_id: int, message: str):
         if not user_id_res or not token_res:
             return
 
-        user_id = user_id_res[0]
-        token = crypto.decrypt_data(token_res[0])
-
-        tg_bot = aiogram.Bot(token=token)
-        try:
-            message_html = discord_md_to_html(message)
-            await tg_bot.send_message(chat_id=user_id, text=message_html, parse_mode="HTML")
-        except Exception as e:
-            # Ошибка будет залогирована здесь, если отправка не удалась
-            logger.error(f"Не удалось отправить оповещение в Telegram для сервера {guild_id}: {e}")
-        finally:
-            await tg_bot.session.close()
+        await send_telegram_message(crypto.decrypt_data(token_res[0]), user_id_res[0], message, guild_id)
 
     except Exception as e:
-        logger.error(f"Критическая ошибка в send_telegram_alert для сервера {guild_id}: {e}")
\ No newline at end of file
+        logger.error(f"Критическая ошибка в send_telegram_alert для сервера {guild_id}: {e}")
@@ -0,0 +1,143 @@
+# core/threat_detectors.py
+# -*- coding: utf-8 -*-
+
+import abc
+import re
+import time
+import secrets
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from core.services.settings_service import ANTINUKE_WINDOW_DEFAULTS
+
+if TYPE_CHECKING:
+    from core.security_context import GuildSecurityContext
+
+logger = logging.getLogger(__name__)
+
+THREAT_KEY_PREFIX = "threats"
+WINDOW_KEY_PREFIX = "antinuke_window"
+
+# Правило окна: (сколько действий, за сколько секунд).
+WindowRule = Tuple[int, int]
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+_RULE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*([smh]?)\s*$")
+
+def parse_window_rules(value: str) -> List[WindowRule]:
+    """
+    Разбирает строку вида "5/10s, 20/5m" в [(5, 10), (20, 300)].
+    Единица по умолчанию - секунды. При ошибке выбрасывает ValueError.
+    """
+    rules: List[WindowRule] = []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        match = _RULE_RE.match(part)
+        if not match:
+            raise ValueError(f"Некорректное правило окна: '{part.strip()}'")
+        count, seconds = int(match[1]), int(match[2]) * _DURATION_UNITS[match[3] or "s"]
+        if count <= 0 or seconds <= 0:
+            raise ValueError(f"Правило окна должно быть положительным: '{part.strip()}'")
+        rules.append((count, seconds))
+    return sorted(rules, key=lambda rule: rule[1])
+
+def format_window_rules(rules: List[WindowRule]) -> str:
+    def _duration(seconds: int) -> str:
+        for unit, size in (("h", 3600), ("m", 60)):
+            if seconds % size == 0:
+                return f"{seconds // size}{unit}"
+        return f"{seconds}s"
+    return ", ".join(f"{count}/{_duration(seconds)}" for count, seconds in rules)
+
+@dataclass(frozen=True)
+class Detection:
+    """Результат срабатывания детектора: значение, порог и описание сработавшего правила."""
+    score: float
+    threshold: float
+    rule: str
+
+class ThreatDetector(abc.ABC):
+    """
+    Интерфейс движка обнаружения. record() учитывает одно действие пользователя и
+    возвращает Detection, если пользователь должен быть изолирован.
+    """
+    name = ""
+
+    @abc.abstractmethod
+    async def record(self, redis, context: "GuildSecurityContext", user_id: int, action: str, now: Optional[float] = None) -> Optional[Detection]:
+        ...
+
+    @abc.abstractmethod
+    async def reset(self, redis, guild_id: int, user_id: int):
+        ...
+
+class DecayScoreDetector(ThreatDetector):
+    """
+    Прежний движок: одно число очков на пользователя, которое линейно сгорает
+    (см. AntiNukeCog.decay_task). Одна команда Redis на событие.
+    """
+    name = "score"
+
+    async def record(self, redis, context, user_id, action, now=None):
+        score_to_add = context.settings.get(action, 0.0)
+        if score_to_add <= 0:
+            return None
+        key = f"{THREAT_KEY_PREFIX}:{context.guild.id}"
+        new_score = float(await redis.hincrbyfloat(key, str(user_id), score_to_add))
+        threshold = context.settings['threshold']
+        logger.debug(f"Anti-nuke: пользователь {user_id} на сервере {context.guild.id} совершил действие '{action}'. Добавлено {score_to_add} очков. Итого: {new_score:.2f}/{threshold}")
+        if new_score >= threshold:
+            return Detection(new_score, threshold, f"score {new_score:.2f}/{threshold}")
+        return None
+
+    async def reset(self, redis, guild_id, user_id):
+        await redis.hdel(f"{THREAT_KEY_PREFIX}:{guild_id}", str(user_id))
+
+class SlidingWindowDetector(ThreatDetector):
+    """
+    Скользящие окна на sorted set: отдельный ключ на (сервер, пользователь, действие),
+    значения - время событий. Все окна проверяются одним pipeline:
+    ZADD + ZREMRANGEBYSCORE + ZCOUNT на каждое окно + EXPIRE.
+    """
+    name = "window"
+
+    @staticmethod
+    def _key(guild_id: int, user_id: int, action: str) -> str:
+        return f"{WINDOW_KEY_PREFIX}:{guild_id}:{user_id}:{action}"
+
+    async def record(self, redis, context, user_id, action, now=None):
+        rules = context.window_rules.get(action)
+        if not rules:
+            return None
+        now = time.time() if now is None else now
+        longest = rules[-1][1]
+        key = self._key(context.guild.id, user_id, action)
+
+        async with redis.pipeline(transaction=False) as pipe:
+            # Случайный суффикс: несколько событий в одну и ту же миллисекунду не схлопываются.
+            pipe.zadd(key, {f"{now:.6f}:{secrets.token_hex(3)}": now})
+            pipe.zremrangebyscore(key, "-inf", f"({now - longest}")
+            for _, seconds in rules:
+                pipe.zcount(key, now - seconds, "+inf")
+            pipe.expire(key, longest + 1)
+            replies = await pipe.execute()
+
+        counts = replies[2:2 + len(rules)]
+        for (limit, seconds), count in zip(rules, counts):
+            if count >= limit:
+                logger.debug(f"Anti-nuke: пользователь {user_id} на сервере {context.guild.id}: '{action}' {count} раз за {seconds} сек. (лимит {limit}).")
+                return Detection(float(count), float(limit), f"{action} {count}/{format_window_rules([(limit, seconds)])}")
+        return None
+
+    async def reset(self, redis, guild_id, user_id):
+        # Ключи окон известны заранее по списку действий, SCAN не нужен.
+        await redis.delete(*(self._key(guild_id, user_id, action) for action in ANTINUKE_WINDOW_DEFAULTS))
+
+DETECTORS: Dict[str, ThreatDetector] = {
+    detector.name: detector for detector in (DecayScoreDetector(), SlidingWindowDetector())
+}
+
+def get_detector(name: str) -> ThreatDetector:
+    return DETECTORS.get(name) or DETECTORS[DecayScoreDetector.name]
@@ -0,0 +1,84 @@
+# core/timeseries.py
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Поля снимка статистики, которые сохраняются в историю (в порядке хранения в члене zset).
+SERIES_FIELDS = ("memberCount", "onlineCount", "roleCount", "textChannelCount", "voiceChannelCount")
+
+@dataclass(frozen=True)
+class Resolution:
+    name: str
+    step: int        # Размер бакета в секундах
+    retention: int   # Сколько секунд истории хранить
+
+    @property
+    def max_points(self) -> int:
+        return self.retention // self.step
+
+RESOLUTIONS: Dict[str, Resolution] = {
+    "1m": Resolution("1m", 60, 24 * 3600),
+    "1h": Resolution("1h", 3600, 30 * 24 * 3600),
+}
+
+def series_key(guild_id: int, resolution: Resolution) -> str:
+    return f"ts:{guild_id}:{resolution.name}"
+
+def keys_for_guild(guild_id: int) -> List[str]:
+    return [series_key(guild_id, resolution) for resolution in RESOLUTIONS.values()]
+
+def _encode_member(bucket: int, stats: Dict[str, str]) -> str:
+    # Член zset должен быть уникальным, поэтому в начало кладем сам бакет.
+    return ":".join([str(bucket)] + [str(stats.get(field, "")) for field in SERIES_FIELDS])
+
+def _decode_member(member: str) -> Optional[List[Optional[int]]]:
+    parts = member.split(":")
+    if len(parts) != len(SERIES_FIELDS) + 1:
+        return None
+    return [int(value) if value.lstrip("-").isdigit() else None for value in parts[1:]]
+
+def record_sample(pipe, guild_id: int, stats: Dict[str, str], now: int):
+    """
+    Добавляет в pipeline запись снимка во все разрешения.
+    Внутри бакета побеждает последнее значение: старый член бакета удаляется,
+    после чего история обрезается по сроку хранения.
+    """
+    for resolution in RESOLUTIONS.values():
+        key = series_key(guild_id, resolution)
+        bucket = now - now % resolution.step
+        pipe.zremrangebyscore(key, bucket, bucket)
+        pipe.zadd(key, {_encode_member(bucket, stats): bucket})
+        pipe.zremrangebyscore(key, "-inf", f"({bucket - resolution.retention}")
+        pipe.expire(key, resolution.retention + resolution.step)
+
+async def query_series(redis_client, guild_id: int, resolution: Resolution, points: int, now: int) -> Dict[str, Any]:
+    """
+    Возвращает последние `points` бакетов в виде массивов фиксированной длины.
+    Бакеты без данных заполняются None, чтобы фронтенд мог рисовать разрывы.
+    """
+    points = max(1, min(points, resolution.max_points))
+    end = now - now % resolution.step
+    start = end - (points - 1) * resolution.step
+
+    rows = await redis_client.zrangebyscore(series_key(guild_id, resolution), start, end, withscores=True)
+
+    timestamps = [start + i * resolution.step for i in range(points)]
+    series: Dict[str, List[Optional[int]]] = {field: [None] * points for field in SERIES_FIELDS}
+    for member, score in rows:
+        values = _decode_member(member)
+        if values is None:
+            continue
+        index = (int(score) - start) // resolution.step
+        if 0 <= index < points:
+            for field, value in zip(SERIES_FIELDS, values):
+                series[field][index] = value
+
+    return {
+        "resolution": resolution.name,
+        "step": resolution.step,
+        "from": start,
+        "to": end,
+        "timestamps": timestamps,
+        "series": series,
+    }
@@ -0,0 +1,272 @@
+# core/tracing.py
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import time
+import queue
+import random
+import logging
+import secrets
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import aiomysql
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Файл для выгрузки трасс (формат Chrome Trace Event: chrome://tracing, Perfetto, speedscope).
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+# Доля корневых операций, которые попадают в файл (гистограммы пишутся всегда).
+TRACE_EXPORT_SAMPLE_RATE = float(os.getenv("TRACE_EXPORT_SAMPLE_RATE", 1.0))
+
+# Виды корневых операций.
+KIND_LISTENER = "listener"
+KIND_COMMAND = "command"
+# Именованная операция: длительность пишется по имени и внутри чужой трассы.
+KIND_OPERATION = "operation"
+# Виды дочерних операций.
+KIND_DB = "db"
+KIND_REDIS = "redis"
+KIND_DISCORD = "discord"
+KIND_HTTP = "http"
+
+@dataclass
+class Span:
+    kind: str
+    name: str
+    parent: Optional["Span"] = None
+    started: float = field(default_factory=time.perf_counter)
+    started_wall: float = field(default_factory=time.time)
+    duration: float = 0.0
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    # Только у корня: все завершенные спаны трассы и решение о выгрузке.
+    finished: List["Span"] = field(default_factory=list)
+    sampled: bool = False
+    # Корень завершен: спаны задач, переживших трассу, к нему больше не добавляются.
+    ended: bool = False
+
+    @property
+    def root(self) -> "Span":
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("citadel_current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def _active_parent() -> Optional[Span]:
+    """Текущий спан, если его трасса еще идет."""
+    span = _current_span.get()
+    return span if span is not None and not span.root.ended else None
+
+def detached(func, *args, **kwargs):
+    """
+    Вызывает func вне текущей трассы. Нужен для запуска фоновых циклов и задач из слушателей:
+    иначе задача наследует контекст и пишет свои спаны в давно завершенный корень.
+    """
+    context = contextvars.copy_context()
+    context.run(_current_span.set, None)
+    return context.run(func, *args, **kwargs)
+
+# =========================================================================================
+# >> ВЫГРУЗКА В ФАЙЛ
+# =========================================================================================
+class TraceFileExporter:
+    """
+    Пишет трассы в файл в фоновом потоке, не блокируя цикл событий.
+    Закрывающая "]" не нужна: просмотрщики Trace Event Format ее не требуют.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[List[Dict[str, Any]]]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, root: Span):
+        events = [{
+            "name": span.name, "cat": span.kind, "ph": "X", "pid": os.getpid(), "tid": root.span_id,
+            "ts": int(span.started_wall * 1e6), "dur": max(1, int(span.duration * 1e6)),
+            "args": {"span_id": span.span_id, "parent_id": span.parent.span_id if span.parent else None, **span.attributes},
+        } for span in root.finished]
+        self._queue.put(events)
+
+    def _run(self):
+        try:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", encoding="utf-8") as f:
+                if new_file:
+                    f.write("[\n")
+                while True:
+                    events = self._queue.get()
+                    if events is None:
+                        return
+                    f.writelines(json.dumps(event, ensure_ascii=False, default=str) + ",\n" for event in events)
+                    f.flush()
+        except OSError as e:
+            logger.error(f"Выгрузка трасс в {self.path} остановлена: {e}")
+
+    def close(self):
+        self._queue.put(None)
+
+_exporter: Optional[TraceFileExporter] = TraceFileExporter(TRACE_EXPORT_FILE) if TRACE_EXPORT_FILE else None
+
+# =========================================================================================
+# >> СПАНЫ
+# =========================================================================================
+def _finish(span: Span):
+    span.duration = time.perf_counter() - span.started
+    root = span.root
+    if span is root or span.kind == KIND_OPERATION:
+        metrics.OPERATION_DURATION.labels(kind=span.kind, name=span.name).observe(span.duration)
+    if root.ended:
+        # Трасса уже выгружена: поздний спан не удерживается в памяти и не приписывается корню.
+        return
+    root.finished.append(span)
+    if span is not root:
+        metrics.SPAN_DURATION.labels(root=root.name, kind=span.kind).observe(span.duration)
+        return
+    root.ended = True
+    if _exporter and span.sampled:
+        _exporter.export(span)
+
+@contextmanager
+def trace(kind: str, name: str, **attributes):
+    """
+    Открывает спан. Без родителя это корень трассы (слушатель, команда, задача),
+    его длительность пишется в citadel_operation_duration_seconds; вложенные спаны
+    (БД, Redis, Discord) - в citadel_span_duration_seconds с меткой корня.
+    """
+    parent = _active_parent()
+    span = Span(kind, name, parent, attributes=attributes)
+    if parent is None:
+        span.sampled = _exporter is not None and random.random() < TRACE_EXPORT_SAMPLE_RATE
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(span)
+
+def traced(kind: str, name: Optional[str] = None):
+    """Декоратор для корутин: выполняет функцию внутри trace(kind, name)."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with trace(kind, span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def child_span(kind: str, name: str, **attributes):
+    """Спан только внутри существующей трассы: вне трассы ничего не записывает."""
+    if _active_parent() is None:
+        yield None
+        return
+    with trace(kind, name, **attributes) as span:
+        yield span
+
+# =========================================================================================
+# >> ИНСТРУМЕНТИРОВАНИЕ КЛИЕНТОВ
+# =========================================================================================
+# Сегменты пути такой длины считаются токенами (токены вебхуков - 68 символов, взаимодействий - больше).
+TOKEN_MIN_LENGTH = 32
+
+_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+`?(\w+)", re.IGNORECASE)
+
+def _statement_name(query: str) -> str:
+    """'SELECT guild_configs', 'INSERT quarantined_users' - без параметров, чтобы имена не дробились."""
+    verb = query.lstrip().split(None, 1)[0].upper() if query.strip() else "?"
+    match = _TABLE_RE.search(query)
+    return f"{verb} {match[1]}" if match else verb
+
+class TracedCursor(aiomysql.Cursor):
+    """Курсор aiomysql, который оборачивает каждый запрос в спан 'db'."""
+    async def execute(self, query, args=None):
+        with child_span(KIND_DB, _statement_name(query)):
+            return await super().execute(query, args)
+
+    async def executemany(self, query, args):
+        with child_span(KIND_DB, _statement_name(query), rows=len(args) if args else 0):
+            return await super().executemany(query, args)
+
+def instrument_redis(client):
+    """Оборачивает команды Redis (и pipeline целиком) в спаны 'redis'."""
+    original_execute_command = client.execute_command
+    original_pipeline = client.pipeline
+
+    async def execute_command(*args, **options):
+        with child_span(KIND_REDIS, str(args[0]).upper() if args else "?"):
+            return await original_execute_command(*args, **options)
+
+    def pipeline(*args, **kwargs):
+        pipe = original_pipeline(*args, **kwargs)
+        original_execute = pipe.execute
+
+        async def execute(*execute_args, **execute_kwargs):
+            with child_span(KIND_REDIS, "PIPELINE", commands=len(pipe.command_stack)):
+                return await original_execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = execute
+        return pipe
+
+    client.execute_command = execute_command
+    client.pipeline = pipeline
+    return client
+
+def _route_name(path: str) -> str:
+    """
+    Маршрут без ID и токенов: '/api/v10/interactions/:id/:token/callback'.
+    Токены вебхуков и взаимодействий не должны попадать ни в метки, ни в файл трасс.
+    """
+    return "/".join(
+        ":id" if part.isdigit() else ":token" if len(part) >= TOKEN_MIN_LENGTH else part
+        for part in path.split("/")
+    )
+
+def create_http_trace_config() -> aiohttp.TraceConfig:
+    """
+    TraceConfig для aiohttp: запросы к Discord REST (через http_trace discord.py) и
+    к внешним HTTP-сервисам попадают в трассу как спаны 'discord' / 'http'.
+    """
+    async def on_request_start(session, context, params):
+        parent = _active_parent()
+        context.span = None
+        if parent is not None:
+            kind = KIND_DISCORD if params.url.host and params.url.host.endswith("discord.com") else KIND_HTTP
+            context.span = Span(kind, f"{params.method} {_route_name(params.url.path)}", parent)
+
+    async def on_request_end(session, context, params):
+        if context.span is not None:
+            context.span.attributes["status"] = params.response.status
+            _finish(context.span)
+
+    async def on_request_exception(session, context, params):
+        if context.span is not None:
+            context.span.attributes["error"] = type(params.exception).__name__
+            _finish(context.span)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
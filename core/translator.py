@@ -2,52 +2,204 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
 import yaml
+import pickle
+import hashlib
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# C-ускоренный загрузчик, если PyYAML собран с libyaml; иначе - чистый Python.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# Повышается при изменении формата кэша, чтобы старые файлы игнорировались.
+CACHE_FORMAT_VERSION = 1
+
+# Запись плоской таблицы: (значение, нужно ли форматирование).
+TranslationEntry = Tuple[Any, bool]
+
+def _flatten(data: Dict[str, Any], prefix: str = "", result: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    Разворачивает вложенный словарь в плоский: {'a.b.c': value}.
+    Промежуточные узлы тоже сохраняются, так как get() может вернуть целый раздел.
+    """
+    if result is None:
+        result = {}
+    for key, value in data.items():
+        full_key = f"{prefix}{key}"
+        result[full_key] = value
+        if isinstance(value, dict):
+            _flatten(value, f"{full_key}.", result)
+    return result
+
+def _compile_entry(value: Any) -> TranslationEntry:
+    # Строки без фигурных скобок не требуют str.format и возвращаются как есть.
+    return value, isinstance(value, str) and ("{" in value or "}" in value)
+
 class Translator:
     """
     Усовершенствованный класс для управления локализацией.
     Теперь он загружает все доступные языки и может предоставлять переводы
     для любого из них по запросу.
+
+    При загрузке каждый язык разворачивается в плоскую таблицу с уже
+    подмешанным языком по умолчанию, поэтому get() - это один поиск в dict.
     """
-    def __init__(self):
+    def __init__(self, locales_dir: str = "locales"):
+        self.locales_dir = locales_dir
+        self.cache_dir = os.path.join(locales_dir, ".cache")
         self.strings: Dict[str, Dict[str, Any]] = {}
+        self.tables: Dict[str, Dict[str, TranslationEntry]] = {}
         self.default_lang = os.getenv("BOT_LANGUAGE", "en").lower()
-        self._load_strings()
+        self._reported_missing: Set[Tuple[str, str]] = set()
+        self.mtimes = self.scan_mtimes()
+        self.strings = self._load_strings()
+        self.tables = self._build_tables(self.strings)
+
+    def scan_mtimes(self) -> Dict[str, int]:
+        """Возвращает время изменения всех .yml файлов локализации (для отслеживания правок)."""
+        if not os.path.isdir(self.locales_dir):
+            return {}
+        return {
+            entry.name: entry.stat().st_mtime_ns
+            for entry in os.scandir(self.locales_dir)
+            if entry.is_file() and entry.name.endswith(".yml")
+        }
+
+    def _read_locale_file(self, filepath: str) -> Tuple[Any, bool]:
+        """
+        Читает языковой файл через предкомпилированный pickle-кэш.
+        Кэш действителен, если совпадают mtime и размер файла, либо sha1 его содержимого.
+        Возвращает (данные, взяты_из_кэша).
+        """
+        stat = os.stat(filepath)
+        cache_path = os.path.join(self.cache_dir, os.path.basename(filepath) + ".pickle")
+        cached = None
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if not isinstance(cached, dict) or cached.get('version') != CACHE_FORMAT_VERSION:
+                cached = None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            cached = None
+
+        if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return cached['data'], True
+
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        from_cache = bool(cached) and cached['sha1'] == digest
+        data = cached['data'] if from_cache else yaml.load(raw.decode('utf-8'), Loader=YAML_LOADER)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({
+                    'version': CACHE_FORMAT_VERSION, 'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size, 'sha1': digest, 'data': data
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Не удалось записать кэш локализации {cache_path}: {e}")
+        return data, from_cache
 
-    def _load_strings(self):
+    def _load_strings(self, strict: bool = False) -> Dict[str, Dict[str, Any]]:
         """
-        Сканирует директорию /locales, находит все .yml файлы,
-        и загружает их содержимое в словарь self.strings.
+        Сканирует директорию /locales, находит все .yml файлы
+        и возвращает их содержимое в виде словаря {язык: данные}.
+        В строгом режиме (перезагрузка) ошибка в любом файле прерывает загрузку,
+        чтобы не заменить рабочие переводы частично загруженными.
         """
-        locales_dir = "locales"
+        locales_dir = self.locales_dir
         
         if not os.path.isdir(locales_dir):
             logger.critical(f"Директория локализации '{locales_dir}' не найдена! Бот не может работать без текстов.")
             raise FileNotFoundError(f"Directory not found: {locales_dir}")
 
-        for filename in os.listdir(locales_dir):
+        strings: Dict[str, Dict[str, Any]] = {}
+        self.last_load_cache_hits = 0
+        for filename in sorted(os.listdir(locales_dir)):
             if filename.endswith(".yml"):
                 lang_code = filename[:-4].lower()
                 filepath = os.path.join(locales_dir, filename)
                 
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        self.strings[lang_code] = yaml.safe_load(f)
-                    logger.info(f"Успешно загружен языковой файл: {filepath} для языка '{lang_code}'")
+                    strings[lang_code], from_cache = self._read_locale_file(filepath)
+                    self.last_load_cache_hits += from_cache
+                    logger.info(f"Успешно загружен языковой файл: {filepath} для языка '{lang_code}'{' (из кэша)' if from_cache else ''}")
                 except yaml.YAMLError as e:
                     logger.critical(f"Ошибка парсинга YAML в файле {filepath}: {e}")
+                    if strict: raise
                 except Exception as e:
                     logger.critical(f"Не удалось загрузить или прочитать файл {filepath}: {e}")
+                    if strict: raise
         
-        if self.default_lang not in self.strings:
+        if self.default_lang not in strings:
             logger.critical(f"Язык по умолчанию '{self.default_lang}', указанный в .env, не был найден в директории /locales!")
+            if strict:
+                raise FileNotFoundError(f"Default language '{self.default_lang}' not found in {locales_dir}")
+        return strings
+
+    def reload(self) -> Dict[str, Any]:
+        """
+        Перечитывает языковые файлы и атомарно подменяет таблицы переводов.
+        При ошибке текущие переводы остаются без изменений (исключение пробрасывается).
+        Возвращает замеры времени для отчета.
+        """
+        started = time.perf_counter()
+        mtimes = self.scan_mtimes()
+        strings = self._load_strings(strict=True)
+        loaded = time.perf_counter()
+        tables = self._build_tables(strings)
+        built = time.perf_counter()
+
+        # get() читает self.tables один раз за вызов, поэтому видит либо старый, либо новый набор целиком.
+        self.strings = strings
+        self.tables = tables
+        self.mtimes = mtimes
+        self._reported_missing = set()
+        return {
+            'languages': sorted(tables),
+            'files': len(strings),
+            'cache_hits': self.last_load_cache_hits,
+            'load_ms': (loaded - started) * 1000,
+            'build_ms': (built - loaded) * 1000,
+            'total_ms': (built - started) * 1000,
+        }
+
+    def _build_tables(self, strings: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, TranslationEntry]]:
+        """
+        Строит плоские таблицы переводов и один раз логирует отчет о покрытии:
+        какие ключи языка по умолчанию отсутствуют в остальных языках.
+        """
+        default_flat = _flatten(strings.get(self.default_lang) or {})
+        default_leaves = {key for key, value in default_flat.items() if not isinstance(value, dict)}
+
+        tables: Dict[str, Dict[str, TranslationEntry]] = {}
+        for lang_code, data in strings.items():
+            flat = _flatten(data or {})
+            merged = {key: _compile_entry(value) for key, value in default_flat.items()}
+            merged.update((key, _compile_entry(value)) for key, value in flat.items())
+            tables[lang_code] = merged
+
+            if lang_code != self.default_lang:
+                missing = sorted(default_leaves - flat.keys())
+                if missing:
+                    preview = ", ".join(missing[:10]) + (" ..." if len(missing) > 10 else "")
+                    logger.warning(f"Язык '{lang_code}': отсутствует {len(missing)} ключ(ей), используется язык по умолчанию '{self.default_lang}': {preview}")
+                else:
+                    logger.info(f"Язык '{lang_code}': покрытие ключей полное.")
+
+        return tables
+
+    def _report_missing_once(self, key: str, lang: str):
+        if (key, lang) not in self._reported_missing:
+            self._reported_missing.add((key, lang))
+            logger.warning(f"Ключ локализации не найден ни для '{lang}', ни по умолчанию: '{key}'")
 
-    # --- ИЗМЕНЕННЫЙ МЕТОД ---
     def get(self, key: str, lang: str, **kwargs) -> Any:
         """
         Получает строку перевода для указанного языка, поддерживая вложенные ключи.
@@ -59,33 +211,16 @@ class Translator:
         :return: Отформатированную строку, словарь или строку с ошибкой.
         """
         lang = lang.lower()
-        
-        def _find_key(data_dict: Dict, key_path: str):
-            """Вспомогательная функция для поиска вложенного ключа."""
-            keys = key_path.split('.')
-            current_level = data_dict
-            for k in keys:
-                if not isinstance(current_level, dict) or k not in current_level:
-                    raise KeyError(key_path)
-                current_level = current_level[k]
-            return current_level
+        table = self.tables.get(lang) or self.tables.get(self.default_lang) or {}
+        entry = table.get(key)
+        if entry is None:
+            self._report_missing_once(key, lang)
+            return f"MISSING_TRANSLATION_FOR_{key.upper()}"
 
-        try:
-            # Сначала пытаемся найти ключ в запрошенном языке
-            template = _find_key(self.strings.get(lang, {}), key)
-        except KeyError:
-            try:
-                # Если не нашли, пытаемся найти в языке по умолчанию (фоллбэк)
-                logger.warning(f"Ключ '{key}' не найден для языка '{lang}'. Используется язык по умолчанию '{self.default_lang}'.")
-                template = _find_key(self.strings[self.default_lang], key)
-            except KeyError:
-                # Если и там нет, возвращаем строку-ошибку
-                logger.warning(f"Ключ локализации не найден ни для '{lang}', ни по умолчанию: '{key}'")
-                return f"MISSING_TRANSLATION_FOR_{key.upper()}"
-        
-        if isinstance(template, dict):
+        template, is_template = entry
+        if not is_template:
             return template
-            
+
         try:
             return template.format(**kwargs)
         except KeyError as e:
@@ -93,4 +228,4 @@ class Translator:
             return f"FORMATTING_ERROR_{key.upper()}_MISSING_{str(e).upper()}"
         except Exception as e:
             logger.error(f"Неизвестная ошибка при форматировании строки для ключа '{key}': {e}")
-            return f"FORMATTING_ERROR_FOR_{key.upper()}"
\ No newline at end of file
+            return f"FORMATTING_ERROR_FOR_{key.upper()}"
@@ -1,12 +1,17 @@
 # core/ui.py
 # -*- coding: utf-8 -*-
 
+import abc
 import logging
 import json
 import discord
-from typing import Optional, List, TYPE_CHECKING
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, List, Sequence, TYPE_CHECKING
 import math
 
+from core.membership_index import QUARANTINED
+from core.services import management_service
+
 # --- ИСПРАВЛЕНИЕ ИМПОРТА ---
 if TYPE_CHECKING:
     from apps.discord_bot.main import SecurityBot
@@ -114,13 +119,11 @@ class BotRemoveView(discord.ui.View):
         await interaction.response.defer()
         removed_bots_info = []
         try:
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    bot_ids_to_remove = [int(bot_id) for bot_id in self.select_menu.values]
-                    placeholders = ', '.join(['%s'] * len(bot_ids_to_remove))
-                    sql_query = f"DELETE FROM allowed_bots WHERE guild_id = %s AND bot_id IN ({placeholders})"
-                    await cursor.execute(sql_query, (interaction.guild.id, *bot_ids_to_remove))
-                    
+            bot_ids_to_remove = [int(bot_id) for bot_id in self.select_menu.values]
+            result = await management_service.remove_bots_from_whitelist(self.bot, interaction.guild.id, bot_ids_to_remove)
+            if result['status'] == 'error':
+                raise RuntimeError(result['code'])
+
             for bot_id_str in self.select_menu.values:
                 option = next((opt for opt in self.select_menu.options if opt.value == bot_id_str), None)
                 if option: 
@@ -138,6 +141,210 @@ class BotRemoveView(discord.ui.View):
             await interaction.edit_original_response(content=t("system.db_error", lang=lang), view=None)
 
 
+# =========================================================================================
+# >> ИСТОЧНИКИ СТРАНИЦ ДЛЯ ПАГИНАЦИИ
+# =========================================================================================
+class PageSource(abc.ABC):
+    """
+    Базовый источник страниц для PaginationView.
+    Страницы запрашиваются по требованию, а не собираются заранее.
+    """
+    def __init__(self, per_page: int):
+        self.per_page = per_page
+
+    @abc.abstractmethod
+    async def get_total(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    async def get_page(self, page: int) -> List[Any]:
+        ...
+
+    @abc.abstractmethod
+    def format_page(self, entries: List[Any], page: int) -> discord.Embed:
+        ...
+
+
+class KeysetPageSource(PageSource):
+    """
+    Ленивый источник страниц из таблицы БД.
+    Последовательные переходы используют keyset-запросы (WHERE key < last_key),
+    несколько последних страниц кэшируются, а переход на произвольную страницу
+    откатывается на OFFSET, если граница предыдущей страницы еще неизвестна.
+    """
+    def __init__(
+        self,
+        bot: "SecurityBot",
+        *,
+        table: str,
+        columns: str,
+        where: str,
+        args: Sequence[Any],
+        per_page: int,
+        formatter: Callable[[List[tuple], int], discord.Embed],
+        key: str = "id",
+        cached_pages: int = 5
+    ):
+        super().__init__(per_page)
+        self.bot = bot
+        self.table = table
+        self.columns = columns
+        self.where = where
+        self.args = tuple(args)
+        self.formatter = formatter
+        self.key = key
+        self.cached_pages = cached_pages
+        self._total: Optional[int] = None
+        self._cache: "OrderedDict[int, List[tuple]]" = OrderedDict()
+        self._last_keys: Dict[int, Any] = {}
+
+    async def get_total(self) -> int:
+        if self._total is None:
+            async with self.bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {self.where}", self.args)
+                    result = await cursor.fetchone()
+                    self._total = result[0] if result else 0
+        return self._total
+
+    async def _fetch(self, after_key: Any = None, offset: int = 0) -> List[tuple]:
+        query = f"SELECT {self.key}, {self.columns} FROM {self.table} WHERE {self.where}"
+        args = list(self.args)
+        if after_key is not None:
+            query += f" AND {self.key} < %s"
+            args.append(after_key)
+        query += f" ORDER BY {self.key} DESC LIMIT %s"
+        args.append(self.per_page)
+        if offset:
+            query += " OFFSET %s"
+            args.append(offset)
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, args)
+                return list(await cursor.fetchall())
+
+    async def get_page(self, page: int) -> List[tuple]:
+        if page in self._cache:
+            self._cache.move_to_end(page)
+            rows = self._cache[page]
+        else:
+            if page == 0:
+                rows = await self._fetch()
+            elif page - 1 in self._last_keys:
+                rows = await self._fetch(after_key=self._last_keys[page - 1])
+            else:
+                rows = await self._fetch(offset=page * self.per_page)
+            self._cache[page] = rows
+            if rows:
+                self._last_keys[page] = rows[-1][0]
+            while len(self._cache) > self.cached_pages:
+                self._cache.popitem(last=False)
+        return [row[1:] for row in rows]
+
+    def format_page(self, entries: List[tuple], page: int) -> discord.Embed:
+        return self.formatter(entries, page * self.per_page)
+
+# =========================================================================================
+# >> УНИВЕРСАЛЬНЫЙ VIEW ДЛЯ ПАГИНАЦИИ
+# =========================================================================================
+class JumpToPageModal(discord.ui.Modal):
+    def __init__(self, view: "PaginationView"):
+        super().__init__(title=view.t("ui.pagination_jump_title", lang=view.lang))
+        self.view = view
+        self.page_input = discord.ui.TextInput(
+            label=view.t("ui.pagination_jump_label", lang=view.lang, total=view.total_pages),
+            max_length=6
+        )
+        self.add_item(self.page_input)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        value = self.page_input.value.strip()
+        if not value.isdigit() or not 1 <= int(value) <= self.view.total_pages:
+            await interaction.response.send_message(
+                self.view.t("ui.pagination_jump_invalid", lang=self.view.lang, total=self.view.total_pages), ephemeral=True
+            )
+            return
+        await self.view.show_page(interaction, int(value) - 1)
+
+
+class PaginationView(discord.ui.View):
+    """
+    Универсальный View для пагинации. Данные страниц берутся из PageSource,
+    кнопка с номером страницы открывает окно перехода к произвольной странице.
+    """
+    def __init__(self, interaction: discord.Interaction, source: PageSource, bot_instance: "SecurityBot", lang: str):
+        super().__init__(timeout=300.0)
+        self.interaction = interaction
+        self.source = source
+        self.bot = bot_instance
+        self.t = self.bot.translator.get
+        self.lang = lang
+        
+        self.current_page = 0
+        self.total_pages = 1
+
+        self.prev_button = discord.ui.Button(label=self.t("ui.button_previous", lang=self.lang), style=discord.ButtonStyle.secondary, emoji="⬅️", disabled=True, row=2)
+        self.page_indicator = discord.ui.Button(style=discord.ButtonStyle.primary, row=2)
+        self.next_button = discord.ui.Button(label=self.t("ui.button_next", lang=self.lang), style=discord.ButtonStyle.secondary, emoji="➡️", row=2)
+
+        self.prev_button.callback = self.prev_page
+        self.page_indicator.callback = self.jump_to_page
+        self.next_button.callback = self.next_page
+
+        self.add_item(self.prev_button)
+        self.add_item(self.page_indicator)
+        self.add_item(self.next_button)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.interaction.user.id:
+            await interaction.response.send_message(self.t("ui.interaction_denied", lang=self.lang), ephemeral=True)
+            return False
+        return True
+    
+    def update_buttons(self):
+        self.prev_button.disabled = self.current_page == 0
+        self.next_button.disabled = self.current_page >= self.total_pages - 1
+        self.page_indicator.disabled = self.total_pages <= 1
+        self.page_indicator.label = self.t("ui.pagination_page_indicator", lang=self.lang, current=self.current_page + 1, total=self.total_pages)
+
+    async def on_page_loaded(self, entries: List[Any]):
+        """Хук для наследников, которым нужно перестроить элементы под текущую страницу."""
+        pass
+
+    async def _build_page(self, page: int) -> discord.Embed:
+        entries = await self.source.get_page(page)
+        self.current_page = page
+        await self.on_page_loaded(entries)
+        self.update_buttons()
+        return self.source.format_page(entries, page)
+
+    async def start(self, *, ephemeral: bool = False):
+        """Отправляет первую страницу в ответ на исходное взаимодействие."""
+        total = await self.source.get_total()
+        self.total_pages = max(1, math.ceil(total / self.source.per_page))
+        embed = await self._build_page(0)
+        await self.interaction.response.send_message(embed=embed, view=self, ephemeral=ephemeral)
+
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        try:
+            embed = await self._build_page(page)
+        except Exception as e:
+            logger.error(f"Не удалось загрузить страницу {page + 1} для пагинации: {e}", exc_info=True)
+            await interaction.response.send_message(self.t("system.db_error", lang=self.lang), ephemeral=True)
+            return
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    async def prev_page(self, interaction: discord.Interaction):
+        if self.current_page > 0:
+            await self.show_page(interaction, self.current_page - 1)
+
+    async def next_page(self, interaction: discord.Interaction):
+        if self.current_page < self.total_pages - 1:
+            await self.show_page(interaction, self.current_page + 1)
+
+    async def jump_to_page(self, interaction: discord.Interaction):
+        await interaction.response.send_modal(JumpToPageModal(self))
+
 # =========================================================================================
 # >> VIEW ДЛЯ ПАНЕЛИ УПРАВЛЕНИЯ КАРАНТИНОМ
 # =========================================================================================
@@ -209,6 +416,7 @@ class QuarantineListActionView(discord.ui.View):
                     roles_to_add = [guild.get_role(rid) for rid in role_ids if guild.get_role(rid) is not None]
                     await member.edit(roles=roles_to_add, reason="Вывод из карантина по команде Владельца")
                     await cursor.execute("DELETE FROM quarantined_users WHERE user_id = %s AND guild_id = %s", (target_user_id, guild.id))
+            await self.bot.membership.remove(QUARANTINED, guild.id, [target_user_id])
             
             new_embed = discord.Embed(title=t("security.embed_titles.roles_restored", lang=lang), description=t("management.quarantine.unquarantine_success", lang=lang, user_mention=member.mention), color=discord.Color.green())
             await self._disable_all_items()
@@ -247,185 +455,3 @@ class QuarantineListActionView(discord.ui.View):
         new_embed = interaction.message.embeds[0]
         new_embed.set_footer(text=t("security.action_cancelled_footer", lang=lang))
         await interaction.edit_original_response(embed=new_embed, view=self)
-
-# =========================================================================================
-# >> VIEW ДЛЯ УВЕДОМЛЕНИЯ ВЛАДЕЛЬЦУ ПРИ АТАКЕ
-# =========================================================================================
-class QuarantineActionView(discord.ui.View):
-    """
-    View для принятия решения по пользователю в карантине (отправляется в ЛС владельцу).
-    """
-    def __init__(self, author: discord.User, bot_instance: "SecurityBot", target_user_id: int, guild_id: int):
-        super().__init__(timeout=86400.0)
-        self.author = author
-        self.bot = bot_instance
-        self.target_user_id = target_user_id
-        self.guild_id = guild_id
-        self.interaction: Optional[discord.Interaction] = None
-        
-        lang = self.bot.default_language
-        t = self.bot.translator.get
-        
-        self.ban_button = discord.ui.Button(label=t("ui.button_ban_user", lang=lang), style=discord.ButtonStyle.danger, emoji="🔨")
-        self.restore_button = discord.ui.Button(label=t("ui.button_restore_roles", lang=lang), style=discord.ButtonStyle.success, emoji="✅")
-        self.keep_button = discord.ui.Button(label=t("ui.button_keep_quarantined", lang=lang), style=discord.ButtonStyle.secondary, emoji="🗣️")
-        
-        self.ban_button.callback = self.ban_callback
-        self.restore_button.callback = self.restore_callback
-        self.keep_button.callback = self.keep_callback
-
-        self.add_item(self.ban_button)
-        self.add_item(self.restore_button)
-        self.add_item(self.keep_button)
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.author.id:
-            await interaction.response.send_message("Вы не можете использовать эти кнопки.", ephemeral=True)
-            return False
-        return True
-
-    async def _disable_all_and_stop(self):
-        for item in self.children: item.disabled = True
-        if self.interaction:
-            try:
-                await self.interaction.message.edit(view=self)
-            except discord.HTTPException: pass
-        self.stop()
-        
-    async def ban_callback(self, interaction: discord.Interaction):
-        lang = await self.bot.get_guild_language(self.guild_id)
-        t = self.bot.translator.get
-        
-        self.interaction = interaction
-        await interaction.response.defer(ephemeral=True)
-        guild = self.bot.get_guild(self.guild_id)
-        if not guild:
-            await interaction.followup.send("Не удалось найти сервер.", ephemeral=True)
-            return
-        target_user = discord.Object(id=self.target_user_id)
-        try:
-            await guild.ban(target_user, reason="Решение Владельца после инцидента безопасности")
-            await interaction.followup.send(t("security.confirm.quarantine.ban_log", lang=lang, user_mention=f"<@{self.target_user_id}>"), ephemeral=True)
-            logging.getLogger('bot.info').info(t("security.confirm.quarantine.ban_log", lang=lang, user_mention=f"<@{self.target_user_id}>"))
-        except Exception as e:
-            await interaction.followup.send(f"Не удалось забанить пользователя: {e}", ephemeral=True)
-            logger.error(f"Не удалось забанить пользователя {self.target_user_id}: {e}", exc_info=True)
-        await self._disable_all_and_stop()
-
-    async def restore_callback(self, interaction: discord.Interaction):
-        lang = await self.bot.get_guild_language(self.guild_id)
-        t = self.bot.translator.get
-        
-        self.interaction = interaction
-        await interaction.response.defer(ephemeral=True)
-        guild = self.bot.get_guild(self.guild_id)
-        if not guild:
-            await interaction.followup.send("Не удалось найти сервер.", ephemeral=True)
-            return
-        member = guild.get_member(self.target_user_id)
-        if not member:
-            await interaction.followup.send("Пользователь не найден на сервере.", ephemeral=True)
-            await self._disable_all_and_stop()
-            return
-        try:
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT roles_json FROM quarantined_users WHERE user_id = %s AND guild_id = %s", (self.target_user_id, guild.id))
-                    result = await cursor.fetchone()
-                    if not result:
-                        await interaction.followup.send(t("management.quarantine.action_already_taken", lang=lang), ephemeral=True)
-                        await self._disable_all_and_stop()
-                        return
-                    roles_json = result[0]
-                    role_ids = json.loads(roles_json)
-                    roles_to_add = [guild.get_role(rid) for rid in role_ids if guild.get_role(rid) is not None]
-                    await member.edit(roles=roles_to_add, reason="Восстановление ролей по решению Владельца")
-                    await cursor.execute("DELETE FROM quarantined_users WHERE user_id = %s AND guild_id = %s", (self.target_user_id, guild.id))
-            await interaction.followup.send(t("security.confirm.quarantine.restore_log", lang=lang, user_mention=member.mention), ephemeral=True)
-            logging.getLogger('bot.info').info(t("security.confirm.quarantine.restore_log", lang=lang, user_mention=member.mention))
-        except Exception as e:
-            await interaction.followup.send(f"Не удалось восстановить роли: {e}", ephemeral=True)
-            logger.error(f"Не удалось восстановить роли для {self.target_user_id}: {e}", exc_info=True)
-        await self._disable_all_and_stop()
-        
-    async def keep_callback(self, interaction: discord.Interaction):
-        lang = await self.bot.get_guild_language(self.guild_id)
-        t = self.bot.translator.get
-        
-        self.interaction = interaction
-        await interaction.response.defer(ephemeral=True)
-        await interaction.followup.send(t("security.confirm.quarantine.keep_log", lang=lang, user_mention=f"<@{self.target_user_id}>"), ephemeral=True)
-        logging.getLogger('bot.info').info(t("security.confirm.quarantine.keep_log", lang=lang, user_mention=f"<@{self.target_user_id}>"))
-        await self._disable_all_and_stop()
-
-# =========================================================================================
-# >> УНИВЕРСАЛЬНЫЙ VIEW ДЛЯ ПАГИНАЦИИ
-# =========================================================================================
-class PaginationView(discord.ui.View):
-    """
-    Универсальный View для пагинации списка данных в Embed-сообщении.
-    """
-    def __init__(self, interaction: discord.Interaction, full_data_list: List[str], items_per_page: int, bot_instance: "SecurityBot", lang: str, embed_title: str, separator: str = "\n\n"):
-        super().__init__(timeout=300.0)
-        self.interaction = interaction
-        self.full_data_list = full_data_list
-        self.items_per_page = items_per_page
-        self.bot = bot_instance
-        self.t = self.bot.translator.get
-        self.lang = lang
-        self.embed_title = embed_title
-        self.separator = separator
-        
-        self.current_page = 0
-        self.total_pages = math.ceil(len(self.full_data_list) / self.items_per_page)
-
-        self.prev_button = discord.ui.Button(label=self.t("ui.button_previous", lang=self.lang), style=discord.ButtonStyle.secondary, emoji="⬅️", disabled=True)
-        self.next_button = discord.ui.Button(label=self.t("ui.button_next", lang=self.lang), style=discord.ButtonStyle.secondary, emoji="➡️")
-        self.page_indicator = discord.ui.Button(style=discord.ButtonStyle.primary, disabled=True)
-
-        self.prev_button.callback = self.prev_page
-        self.next_button.callback = self.next_page
-
-        self.add_item(self.prev_button)
-        self.add_item(self.page_indicator)
-        self.add_item(self.next_button)
-
-        self.update_buttons()
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.interaction.user.id:
-            await interaction.response.send_message(self.t("ui.interaction_denied", lang=self.lang), ephemeral=True)
-            return False
-        return True
-    
-    def update_buttons(self):
-        self.prev_button.disabled = self.current_page == 0
-        self.next_button.disabled = self.current_page >= self.total_pages - 1
-        self.page_indicator.label = self.t("ui.pagination_page_indicator", lang=self.lang, current=self.current_page + 1, total=self.total_pages)
-
-    def create_page_embed(self) -> discord.Embed:
-        start_index = self.current_page * self.items_per_page
-        end_index = start_index + self.items_per_page
-        
-        page_data = self.full_data_list[start_index:end_index]
-        
-        embed = discord.Embed(
-            title=self.embed_title,
-            description=self.separator.join(page_data),
-            color=discord.Color.orange()
-        )
-        return embed
-
-    async def prev_page(self, interaction: discord.Interaction):
-        if self.current_page > 0:
-            self.current_page -= 1
-            self.update_buttons()
-            embed = self.create_page_embed()
-            await interaction.response.edit_message(embed=embed, view=self)
-
-    async def next_page(self, interaction: discord.Interaction):
-        if self.current_page < self.total_pages - 1:
-            self.current_page += 1
-            self.update_buttons()
-            embed = self.create_page_embed()
-            await interaction.response.edit_message(embed=embed, view=self)
\ No newline at end of file